@@ -0,0 +1,83 @@
+"""Empaqueta los efectos de sonido en el banco que el juego proyecta en memoria
+
+Lee los WAV de un directorio (<nombre del efecto>.wav: 44,1 kHz, 16 bits, mono
+o estéreo), los convierte al formato de salida y escribe mansion_efectos.bin.
+El nombre de cada archivo es el que usa el juego al disparar el efecto (susto,
+recoger_item, linterna_on, nueva_habitacion...). Todo el trabajo de decodificar
+se hace aquí, una vez; el juego solo lee el índice al arrancar.
+
+Uso:
+    python banco_efectos.py                     Empaqueta sonidos/*.wav
+    python banco_efectos.py efectos/ -o b.bin   Otro directorio u otro banco
+    python banco_efectos.py --listar            Muestra el contenido del banco
+"""
+
+import argparse
+import glob
+import os
+import sys
+import wave
+
+import main
+
+EFECTOS_DIRECTORIO = "sonidos"
+
+
+def leer_clip(ruta):
+    """PCM estéreo de 16 bits del WAV, listo para el mezclador"""
+    with wave.open(ruta, 'rb') as archivo:
+        if archivo.getsampwidth() != 2 or archivo.getframerate() != main.FRECUENCIA_MUSICA \
+                or archivo.getnchannels() not in (1, 2):
+            raise ValueError(f"{ruta}: se esperaba PCM de 16 bits a {main.FRECUENCIA_MUSICA} Hz")
+        datos = archivo.readframes(archivo.getnframes())
+        if archivo.getnchannels() == 1:
+            datos = main._mono_a_estereo(datos)
+    return datos
+
+
+def empaquetar_directorio(directorio, ruta=main.BANCO_EFECTOS_ARCHIVO):
+    """Empaqueta todos los WAV del directorio; devuelve el índice escrito"""
+    clips = {}
+    for archivo in sorted(glob.glob(os.path.join(glob.escape(directorio), "*.wav"))):
+        nombre = os.path.splitext(os.path.basename(archivo))[0]
+        clips[nombre] = leer_clip(archivo)
+    return main.BancoEfectos.empaquetar(clips, ruta)
+
+
+def listar(ruta=main.BANCO_EFECTOS_ARCHIVO):
+    """Líneas con los efectos del banco, su duración y su posición en el archivo"""
+    banco = main.BancoEfectos(ruta)
+    try:
+        lineas = [f"{'Efecto':24s} {'Duración (s)':>12s} {'Desplazamiento':>15s} {'Bytes':>10s}"]
+        for nombre in banco.nombres():
+            inicio, tamano = banco.indice[nombre]
+            lineas.append(f"{nombre[:24]:24s} {banco.duracion(nombre):12.2f} {inicio:15d} {tamano:10d}")
+        return lineas
+    finally:
+        banco.cerrar()
+
+
+def main_banco(argumentos=None):
+    parser = argparse.ArgumentParser(description="Empaqueta los efectos de sonido del juego")
+    parser.add_argument("directorio", nargs="?", default=EFECTOS_DIRECTORIO, help="directorio con los WAV")
+    parser.add_argument("-o", "--salida", default=main.BANCO_EFECTOS_ARCHIVO, help="archivo del banco")
+    parser.add_argument("--listar", action="store_true", help="muestra el contenido del banco sin reescribirlo")
+    args = parser.parse_args(argumentos)
+
+    try:
+        if args.listar:
+            print("\n".join(listar(args.salida)))
+            return 0
+        if not os.path.isdir(args.directorio):
+            print(f"No existe el directorio {args.directorio}")
+            return 1
+        indice = empaquetar_directorio(args.directorio, args.salida)
+    except (OSError, EOFError, wave.Error, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"{len(indice)} efectos empaquetados en {args.salida} ({os.path.getsize(args.salida)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_banco())
@@ -0,0 +1,384 @@
+"""Benchmarks reproducibles de las rutas críticas del motor de La Mansión Embrujada
+
+Uso:
+    python benchmarks.py                  Ejecuta y compara con la línea base
+    python benchmarks.py --actualizar     Regraba la línea base con los resultados actuales
+    python benchmarks.py --agregar        Añade a la línea base solo los benchmarks nuevos
+    python benchmarks.py --salida r.json  Guarda además los resultados en un archivo
+
+Todos los benchmarks usan semillas y tamaños de mapa fijos y dejan el perfilador
+del motor desactivado (su valor predeterminado), así que miden el motor y no la
+instrumentación. El programa termina con código 1 si algún resultado empeora
+más allá de la tolerancia registrada en la línea base.
+
+Los tiempos dependen de la máquina: la línea base solo sirve en la máquina
+donde se grabó. Al cambiar de equipo o de ejecutor de CI hay que regenerarla
+allí con --actualizar antes de usarla para detectar regresiones. Al añadir un
+benchmark se usa --agregar: regrabar los demás ocultaría las regresiones
+acumuladas desde que se grabaron.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import main
+
+BASE_ARCHIVO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_base.json")
+SEMILLA = 1234
+TAMANOS_MAPA = (100, 1000)
+REPETICIONES = 5
+TOLERANCIA_PREDETERMINADA = 0.5  # 50% de margen antes de considerar una regresión
+
+BENCHMARKS = []
+
+
+def benchmark(nombre, unidad, mayor_es_mejor=False, tolerancia=TOLERANCIA_PREDETERMINADA):
+    """Registra una función de benchmark que devuelve una única medición"""
+    def decorador(funcion):
+        BENCHMARKS.append({
+            "nombre": nombre,
+            "unidad": unidad,
+            "mayor_es_mejor": mayor_es_mejor,
+            "tolerancia": tolerancia,
+            "funcion": funcion
+        })
+        return funcion
+    return decorador
+
+
+def _motor_sin_interfaz(habitaciones=None):
+    """Crea un motor listo para jugar sin ventana ni temporizador"""
+    motor = main.MotorJuego(main.Configuracion())
+    motor.habitaciones = habitaciones or motor.generador_mapa.generar_mansion()
+    motor.tiempo_inicio = time.time()
+    motor.jugador.mover_a("recibidor")
+    return motor
+
+
+@benchmark("generar_mansion", "ms")
+def bench_generar_mansion():
+    generador = main.GeneradorMapa()
+    vueltas = 200
+    inicio = time.perf_counter()
+    for _ in range(vueltas):
+        generador.generar_mansion()
+    return (time.perf_counter() - inicio) * 1000 / vueltas
+
+
+def _bench_mansion_procedural(tamano):
+    def medir():
+        generador = main.GeneradorMapa()
+        inicio = time.perf_counter()
+        generador.generar_mansion_procedural(tamano, SEMILLA)
+        return (time.perf_counter() - inicio) * 1000
+    return medir
+
+
+for _tamano in TAMANOS_MAPA:
+    benchmark(f"generar_mansion_procedural_{_tamano}", "ms")(_bench_mansion_procedural(_tamano))
+
+
+@benchmark("guardar_cargar_partida", "ms")
+def bench_guardar_cargar():
+    motor = _motor_sin_interfaz()
+    for direccion in ("norte", "norte", "sur", "sur"):
+        motor.mover_jugador(direccion)
+    vueltas = 50
+    inicio = time.perf_counter()
+    for _ in range(vueltas):
+        motor.guardar_partida(1)
+        motor.gestor_guardado.cargar_partidas()
+        motor.cargar_partida(1)
+        motor.timer_actualizacion.cancel()
+    return (time.perf_counter() - inicio) * 1000 / vueltas
+
+
+@benchmark("movimientos_por_segundo", "mov/s", mayor_es_mejor=True)
+def bench_movimientos():
+    motor = _motor_sin_interfaz()
+    vueltas = 20000
+    inicio = time.perf_counter()
+    for i in range(vueltas):
+        motor.mover_jugador("norte" if i % 2 == 0 else "sur")
+    return vueltas / (time.perf_counter() - inicio)
+
+
+@benchmark("comprobaciones_eventos_por_segundo", "comp/s", mayor_es_mejor=True)
+def bench_eventos():
+    motor = _motor_sin_interfaz()
+    atico = motor.habitaciones["atico"]
+    # Eventos que nunca se disparan: se mide solo el coste de comprobarlos
+    for evento in atico.eventos:
+        evento.probabilidad = 0
+    for _ in range(20):
+        atico.agregar_evento(main.Evento("susto", "", probabilidad=0))
+    motor.jugador.mover_a("atico")
+    vueltas = 20000
+    inicio = time.perf_counter()
+    for _ in range(vueltas):
+        motor._comprobar_eventos()
+    return vueltas / (time.perf_counter() - inicio)
+
+
+@benchmark("simulacion_una_hora", "ms", tolerancia=1.0)
+def bench_simulacion_una_hora():
+    vueltas = 20
+    total = 0.0
+    for _ in range(vueltas):
+        motor = main.MotorJuego(main.Configuracion(), reloj=main.RelojJuego(simulado=True, inicio=0.0))
+        motor.iniciar_nuevo_juego()
+        motor.jugador.mover_a("atico")
+        inicio = time.perf_counter()
+        motor.simular(3600)
+        total += time.perf_counter() - inicio
+    return total * 1000 / vueltas
+
+
+@benchmark("memoria_mansion_por_sesion", "KB")
+def bench_memoria_mansion():
+    generador = main.GeneradorMapa()
+    generador.plantilla_mansion()  # La plantilla compartida no cuenta por sesión
+    sesiones = []
+    num_sesiones = 500
+    tracemalloc.start()
+    try:
+        for _ in range(num_sesiones):
+            habitaciones = generador.nueva_mansion()
+            habitaciones["recibidor"].obtener_descripcion()  # Sesión recién empezada e inactiva
+            sesiones.append(habitaciones)
+        return tracemalloc.get_traced_memory()[0] / 1024 / num_sesiones
+    finally:
+        tracemalloc.stop()
+
+
+@benchmark("instantanea_y_restauracion", "us")
+def bench_instantanea():
+    motor = main.MotorJuego(main.Configuracion(), reloj=main.RelojJuego(simulado=True, inicio=0.0))
+    motor.iniciar_nuevo_juego()
+    for direccion in ("norte", "norte", "norte", "este"):
+        motor.mover_jugador(direccion)
+    motor.simular(60)
+    vueltas = 5000
+    inicio = time.perf_counter()
+    for _ in range(vueltas):
+        motor.restaurar(motor.instantanea())
+    return (time.perf_counter() - inicio) * 1e6 / vueltas
+
+
+@benchmark("inserciones_puntuacion_por_segundo", "ins/s", mayor_es_mejor=True)
+def bench_puntuaciones():
+    sistema = main.SistemaPuntuacion()
+    vueltas = 300
+    inicio = time.perf_counter()
+    for i in range(vueltas):
+        sistema.agregar_puntuacion(f"Jugador {i}", random.randint(0, 3000), 600, 5, True, "Normal")
+    return vueltas / (time.perf_counter() - inicio)
+
+
+EFECTOS_BANCO = ("susto", "recoger_item", "linterna_on", "linterna_off", "nueva_habitacion",
+                 "descubrimiento", "encender_vela", "usar_item", "pausa", "cargar_bateria")
+
+
+def _banco_efectos():
+    """Banco con los efectos que dispara el motor (1 s de ruido cada uno), creado una vez"""
+    if not os.path.exists(main.BANCO_EFECTOS_ARCHIVO):
+        aleatorio = random.Random(SEMILLA)
+        tamano = main.FRECUENCIA_MUSICA * main.BYTES_POR_FRAME_MUSICA
+        main.BancoEfectos.empaquetar({nombre: aleatorio.randbytes(tamano) for nombre in EFECTOS_BANCO})
+    return main.BANCO_EFECTOS_ARCHIVO
+
+
+@benchmark("arranque_banco_efectos", "ms", tolerancia=1.0)
+def bench_arranque_banco_efectos():
+    ruta = _banco_efectos()
+    sonido = main.SistemaSonido(main.Configuracion())
+    inicio = time.perf_counter()
+    sonido.cargar_banco_efectos(ruta)
+    duracion = (time.perf_counter() - inicio) * 1000
+    sonido.banco.cerrar()
+    return duracion
+
+
+@benchmark("latencia_efecto", "us")
+def bench_latencia_efecto():
+    sonido = main.SistemaSonido(main.Configuracion(), reloj=main.RelojJuego(simulado=True, inicio=0.0))
+    sonido.activar_musica(None)  # Sin salida: se mide el disparo, no la tarjeta
+    sonido.cargar_banco_efectos(_banco_efectos())
+    vueltas = 5000
+    inicio = time.perf_counter()
+    for i in range(vueltas):
+        sonido.reproducir_efecto(EFECTOS_BANCO[i % len(EFECTOS_BANCO)])
+    duracion = (time.perf_counter() - inicio) * 1e6 / vueltas
+    sonido.reproductor.cerrar()
+    sonido.banco.cerrar()
+    return duracion
+
+
+@benchmark("recarga_habitacion", "ms", tolerancia=1.0)
+def bench_recarga_habitacion():
+    plantilla = main.GeneradorMapa._plantilla
+    motor = main.MotorJuego(main.Configuracion(), reloj=main.RelojJuego(simulado=True, inicio=0.0),
+                            semilla=SEMILLA)
+    motor.iniciar_nuevo_juego()
+    vigilante = main.VigilanteContenido("contenido_bench")
+    main.VigilanteContenido.exportar(motor.generador_mapa.generar_mansion(), vigilante.directorio)
+    vigilante.recompilar()
+    ruta = os.path.join(vigilante.directorio, "recibidor.json")
+    with open(ruta, 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+    datos["descripcion"] += " Algo ha cambiado."
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(datos, f)
+    estado = os.stat(ruta)
+    os.utime(ruta, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000))
+    try:
+        # Edición de una habitación con el jugador dentro: detectar, recompilar y aplicar
+        inicio = time.perf_counter()
+        motor.recargar_habitaciones(*vigilante.recompilar())
+        return (time.perf_counter() - inicio) * 1000
+    finally:
+        main.GeneradorMapa._plantilla = plantilla
+
+
+@benchmark("arranque_interfaz", "ms", tolerancia=1.0)
+def bench_arranque_interfaz():
+    if main.tk is None:
+        return None  # Python sin Tk
+    try:
+        root = main.tk.Tk()
+    except main.tk.TclError:
+        return None  # Sin servidor gráfico
+    try:
+        inicio = time.perf_counter()
+        main.InterfazMansion(root)
+        root.update_idletasks()
+        return (time.perf_counter() - inicio) * 1000
+    finally:
+        root.destroy()
+
+
+@benchmark("primer_fotograma_interfaz", "ms", tolerancia=1.0)
+def bench_primer_fotograma():
+    if main.tk is None:
+        return None  # Python sin Tk
+    try:
+        root = main.tk.Tk()
+    except main.tk.TclError:
+        return None  # Sin servidor gráfico
+    try:
+        interfaz = main.InterfazMansion(root)
+        while interfaz.tiempo_primer_fotograma_ms is None:
+            root.update()
+        return interfaz.tiempo_primer_fotograma_ms
+    finally:
+        root.destroy()
+
+
+def ejecutar_benchmarks(repeticiones=REPETICIONES):
+    """Ejecuta todos los benchmarks en un directorio temporal y devuelve la mediana de cada uno"""
+    resultados = {}
+    directorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as directorio:
+        os.chdir(directorio)
+        try:
+            for definicion in BENCHMARKS:
+                mediciones = []
+                for _ in range(repeticiones):
+                    # Estado limpio y semilla fija en cada repetición
+                    for archivo in (main.GUARDADO_ARCHIVO, main.PUNTUACION_ARCHIVO, main.RESULTADOS_ARCHIVO):
+                        if os.path.exists(archivo):
+                            os.remove(archivo)
+                    random.seed(SEMILLA)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        valor = definicion["funcion"]()
+                    if valor is None:
+                        break
+                    mediciones.append(valor)
+                resultados[definicion["nombre"]] = {
+                    "valor": statistics.median(mediciones) if mediciones else None,
+                    "unidad": definicion["unidad"],
+                    "mayor_es_mejor": definicion["mayor_es_mejor"],
+                    "tolerancia": definicion["tolerancia"]
+                }
+        finally:
+            os.chdir(directorio_original)
+    return resultados
+
+
+def comparar_con_base(resultados, base):
+    """Devuelve la lista de regresiones respecto a la línea base"""
+    regresiones = []
+    for nombre, actual in resultados.items():
+        referencia = base.get(nombre)
+        if not referencia or referencia.get("valor") is None or actual["valor"] is None:
+            continue
+        tolerancia = referencia.get("tolerancia", TOLERANCIA_PREDETERMINADA)
+        if referencia.get("mayor_es_mejor"):
+            limite = referencia["valor"] * (1 - tolerancia)
+            empeora = actual["valor"] < limite
+        else:
+            limite = referencia["valor"] * (1 + tolerancia)
+            empeora = actual["valor"] > limite
+        if empeora:
+            regresiones.append((nombre, actual["valor"], limite, actual["unidad"]))
+    return regresiones
+
+
+def main_benchmarks(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del motor de La Mansión Embrujada")
+    parser.add_argument("--actualizar", action="store_true", help="regraba la línea base")
+    parser.add_argument("--agregar", action="store_true",
+                        help="añade a la línea base los benchmarks que no tiene, sin tocar los demás")
+    parser.add_argument("--base", default=BASE_ARCHIVO, help="archivo de línea base")
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    args = parser.parse_args(argumentos)
+
+    resultados = ejecutar_benchmarks(args.repeticiones)
+    for nombre, datos in resultados.items():
+        valor = "omitido" if datos["valor"] is None else f"{datos['valor']:.3f} {datos['unidad']}"
+        print(f"{nombre:40s} {valor}")
+
+    documento = {
+        "version": main.VERSION_JUEGO,
+        "semilla": SEMILLA,
+        "python": sys.version.split()[0],
+        "benchmarks": resultados
+    }
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(documento, f, indent=4)
+
+    if args.actualizar or not os.path.exists(args.base):
+        with open(args.base, 'w', encoding='utf-8') as f:
+            json.dump(documento, f, indent=4)
+        print(f"Línea base guardada en {args.base}")
+        return 0
+
+    with open(args.base, 'r', encoding='utf-8') as f:
+        documento_base = json.load(f)
+    base = documento_base.setdefault("benchmarks", {})
+    if args.agregar:
+        nuevos = [nombre for nombre in resultados if nombre not in base]
+        for nombre in nuevos:
+            base[nombre] = resultados[nombre]
+        with open(args.base, 'w', encoding='utf-8') as f:
+            json.dump(documento_base, f, indent=4)
+        print(f"Añadidos a la línea base: {', '.join(nuevos) or 'ninguno'}")
+    regresiones = comparar_con_base(resultados, base)
+    for nombre, valor, limite, unidad in regresiones:
+        print(f"REGRESIÓN en {nombre}: {valor:.3f} {unidad} (límite {limite:.3f} {unidad})")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_benchmarks())
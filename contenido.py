@@ -0,0 +1,65 @@
+"""Prepara y comprueba los archivos de habitaciones que el juego recarga en caliente
+
+Cada archivo del directorio de contenido es una habitación completa, con sus
+objetos y eventos, en el formato de Habitacion.to_dict. Con la opción
+vigilar_contenido de la configuración, la interfaz mira el directorio cada
+medio segundo y aplica a la partida en curso las habitaciones que cambian,
+sin reiniciar el juego.
+
+Uso:
+    python contenido.py --exportar     Escribe la mansión original en contenido/
+    python contenido.py                Compila todos los archivos e informa de errores
+    python contenido.py otra/ --exportar
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import main
+
+
+def comprobar(directorio=main.CONTENIDO_DIRECTORIO):
+    """Compila todos los archivos; devuelve (habitaciones, errores, milisegundos)"""
+    vigilante = main.VigilanteContenido(directorio)
+    inicio = time.perf_counter()
+    habitaciones, _ = vigilante.recompilar()
+    duracion = (time.perf_counter() - inicio) * 1000
+    conocidas = set(main.GeneradorMapa().plantilla_mansion()) | set(habitaciones)
+    errores = dict(vigilante.errores)
+    for habitacion in habitaciones.values():
+        destinos = [destino for destino in habitacion.conexiones.values() if destino not in conocidas]
+        if destinos:
+            errores[habitacion.id] = f"conexiones a habitaciones que no existen: {', '.join(destinos)}"
+    return habitaciones, errores, duracion
+
+
+def main_contenido(argumentos=None):
+    parser = argparse.ArgumentParser(description="Archivos de contenido editables de la mansión")
+    parser.add_argument("directorio", nargs="?", default=main.CONTENIDO_DIRECTORIO)
+    parser.add_argument("--exportar", action="store_true", help="escribe la mansión original en el directorio")
+    args = parser.parse_args(argumentos)
+
+    if args.exportar:
+        try:
+            cantidad = main.VigilanteContenido.exportar(main.GeneradorMapa().generar_mansion(), args.directorio)
+        except OSError as e:
+            print(f"Error: {e}")
+            return 1
+        print(f"{cantidad} habitaciones exportadas a {args.directorio}")
+        return 0
+
+    if not os.path.isdir(args.directorio):
+        print(f"No existe el directorio {args.directorio}")
+        return 1
+    habitaciones, errores, duracion = comprobar(args.directorio)
+    for origen, error in sorted(errores.items()):
+        print(f"ERROR en {origen}: {error}")
+    print(f"{len(habitaciones)} habitaciones compiladas en {duracion:.1f} ms"
+          + (f", {len(errores)} con errores" if errores else ""))
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_contenido())
@@ -1,5 +1,12 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, filedialog
+try:
+    import tkinter as tk
+    from tkinter import ttk, messagebox, simpledialog, filedialog
+except ImportError:  # Consolas sin Tk: el motor y la interfaz de terminal siguen funcionando
+    tk = None
+try:
+    from PIL import Image as ImagenPIL
+except ImportError:  # Sin Pillow, Tk decodifica PNG/GIF/PPM al crear la imagen
+    ImagenPIL = None
 import random
 import time
 import threading
@@ -7,15 +14,71 @@ import math
 import json
 import os
 import sys
+import bisect
+import functools
+import heapq
+import itertools
+import copy
+import atexit
+import logging
+import logging.handlers
+import queue
+import base64
+import wave
+import mmap
+import struct
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from types import MappingProxyType
 
 # Constantes del juego
 ANCHO_VENTANA = 1024
 ALTO_VENTANA = 768
-VERSION_JUEGO = "1.0.0"
+VERSION_JUEGO = "1.1.0"
 NOMBRE_JUEGO = "La Mansión Embrujada"
 CONFIG_ARCHIVO = "mansion_config.json"
 GUARDADO_ARCHIVO = "mansion_guardado.json"
 PUNTUACION_ARCHIVO = "mansion_puntuaciones.json"
+RESULTADOS_ARCHIVO = "mansion_resultados.jsonl"  # Todas las partidas terminadas, una por línea
+RENDIMIENTO_ARCHIVO = "mansion_rendimiento.json"
+REGISTRO_ARCHIVO = "mansion.log"
+MUSICA_DIRECTORIO = "musica"  # Pistas <nombre>.wav: 44,1 kHz, 16 bits, mono o estéreo
+IMAGENES_DIRECTORIO = "imagenes"  # Ilustraciones: <id de habitación o item>.png/.gif/.ppm
+CONTENIDO_DIRECTORIO = "contenido"  # Habitaciones editables: <id>.json con el formato de Habitacion.to_dict
+
+# Sustos aleatorios: tiempo mínimo entre sustos y multiplicador de probabilidad por dificultad
+TICKS_ENTRE_SUSTOS = 60
+MODIFICADOR_SUSTOS = {
+    "Fácil": 0.5,
+    "Normal": 1.0,
+    "Difícil": 1.5,
+    "Pesadilla": 2.0
+}
+
+# Efectos con duración, en ticks (ver EfectosTemporales)
+DURACION_VELA = 300
+DURACION_AMULETO = 300
+PERIODO_REGENERACION_CORDURA = 15  # Con el amuleto activo se recupera 1 punto de cordura cada tantos ticks
+
+# Pesos de la puntuación final (ver calcular_puntuacion)
+PESOS_PUNTUACION = {
+    "base_victoria": 1000,
+    "base_derrota": 500,
+    "tiempo_max": 3600,  # A partir de 1 hora no hay bonificación por tiempo
+    "bonus_tiempo": 500,
+    "vida": 2,
+    "cordura": 2,
+    "objeto": 50,
+    "secreto": 100,
+    "susto": 25,  # Penalización por susto recibido
+    "dificultad": {
+        "Fácil": 0.8,
+        "Normal": 1.0,
+        "Difícil": 1.2,
+        "Pesadilla": 1.5
+    }
+}
 
 # Colores
 COLOR_NEGRO = "#000000"
@@ -27,6 +90,151 @@ COLOR_GRIS_OSCURO = "#222222"
 COLOR_PLATA = "#C0C0C0"
 COLOR_BLANCO_ANTIGUO = "#F5F5DC"
 
+# Registro por subsistemas: los mensajes se formatean solo si su nivel está activo
+# y se escriben desde un hilo en segundo plano para no bloquear el juego
+SUBSISTEMAS_REGISTRO = ("sonido", "guardado", "motor", "ui")
+TAMANO_COLA_REGISTRO = 10000
+
+log_sonido = logging.getLogger("mansion.sonido")
+log_guardado = logging.getLogger("mansion.guardado")
+log_motor = logging.getLogger("mansion.motor")
+log_ui = logging.getLogger("mansion.ui")
+
+
+class _ManejadorColaRegistro(logging.handlers.QueueHandler):
+    """Encola los registros sin bloquear; si la cola está llena, los descarta"""
+    
+    def __init__(self, cola):
+        super().__init__(cola)
+        self.descartados = 0
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+_oyente_registro = None
+
+
+def _detener_registro():
+    """Vacía la cola de registro y detiene el hilo que la escribe"""
+    global _oyente_registro
+    if _oyente_registro is not None:
+        _oyente_registro.stop()
+        _oyente_registro = None
+
+
+def configurar_registro(niveles=None, destino=None):
+    """Configura el registro del juego
+    
+    niveles: {"sonido": "DEBUG", "motor": "INFO", ...}. La variable de entorno
+    MANSION_LOG ("sonido=DEBUG,guardado=WARNING") tiene prioridad.
+    destino: ruta de un archivo de registro; por defecto se usa la salida estándar.
+    """
+    global _oyente_registro
+    raiz = logging.getLogger("mansion")
+    
+    if _oyente_registro is None or destino is not None:
+        if _oyente_registro is None:
+            atexit.register(_detener_registro)
+        else:
+            _detener_registro()
+            for manejador in list(raiz.handlers):
+                raiz.removeHandler(manejador)
+        
+        salida = logging.FileHandler(destino, encoding='utf-8') if destino else logging.StreamHandler(sys.stdout)
+        salida.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+        cola = queue.Queue(TAMANO_COLA_REGISTRO)
+        raiz.addHandler(_ManejadorColaRegistro(cola))
+        raiz.propagate = False
+        raiz.setLevel(logging.INFO)
+        _oyente_registro = logging.handlers.QueueListener(cola, salida)
+        _oyente_registro.start()
+    
+    niveles = dict(niveles or {})
+    for asignacion in os.environ.get("MANSION_LOG", "").split(","):
+        if "=" in asignacion:
+            subsistema, nivel = asignacion.split("=", 1)
+            niveles[subsistema.strip()] = nivel.strip()
+    for subsistema, nivel in niveles.items():
+        if subsistema in SUBSISTEMAS_REGISTRO:
+            logging.getLogger(f"mansion.{subsistema}").setLevel(str(nivel).upper())
+
+
+# Telemetría de juego: un evento JSON por línea, escrito desde el mismo tipo de
+# cola en segundo plano que el registro y rotado por tamaño
+TELEMETRIA_ARCHIVO = "mansion_telemetria.jsonl"
+TAMANO_MAXIMO_TELEMETRIA = 16 * 1024 * 1024
+COPIAS_TELEMETRIA = 5
+
+log_telemetria = logging.getLogger("mansion_telemetria")  # Fuera de "mansion": no se mezcla con el registro
+log_telemetria.propagate = False
+log_telemetria.setLevel(logging.CRITICAL + 1)  # Desactivada hasta configurar_telemetria
+
+
+class _FormatoTelemetria(logging.Formatter):
+    """Serializa el evento en el hilo escritor, no en el del juego"""
+    
+    def format(self, record):
+        return json.dumps(record.msg, ensure_ascii=False, separators=(",", ":"))
+
+
+class _ManejadorColaTelemetria(_ManejadorColaRegistro):
+    """Encola el evento tal cual: QueueHandler lo convertiría en texto en el hilo del juego"""
+    
+    def prepare(self, record):
+        return record
+
+
+_oyente_telemetria = None
+
+
+def _detener_telemetria():
+    """Vacía la cola de telemetría y cierra el archivo"""
+    global _oyente_telemetria
+    if _oyente_telemetria is not None:
+        _oyente_telemetria.stop()
+        for manejador in _oyente_telemetria.handlers:
+            manejador.close()
+        _oyente_telemetria = None
+    for manejador in list(log_telemetria.handlers):
+        log_telemetria.removeHandler(manejador)
+    log_telemetria.setLevel(logging.CRITICAL + 1)
+
+
+atexit.register(_detener_telemetria)
+
+
+def configurar_telemetria(ruta=TELEMETRIA_ARCHIVO, tamano_maximo=TAMANO_MAXIMO_TELEMETRIA, copias=COPIAS_TELEMETRIA):
+    """Activa la telemetría de juego en ruta (ruta.1, ruta.2... son las copias rotadas)
+    
+    La variable de entorno MANSION_TELEMETRIA=0 la deja desactivada.
+    """
+    global _oyente_telemetria
+    _detener_telemetria()
+    if os.environ.get("MANSION_TELEMETRIA", "1") == "0":
+        return
+
+    salida = logging.handlers.RotatingFileHandler(ruta, maxBytes=tamano_maximo, backupCount=copias,
+                                                  encoding='utf-8', delay=True)
+    salida.setFormatter(_FormatoTelemetria())
+    cola = queue.Queue(TAMANO_COLA_REGISTRO)
+    log_telemetria.addHandler(_ManejadorColaTelemetria(cola))
+    log_telemetria.setLevel(logging.INFO)
+    _oyente_telemetria = logging.handlers.QueueListener(cola, salida)
+    _oyente_telemetria.start()
+
+
+def emitir_telemetria(tipo, **datos):
+    """Encola un evento de telemetría; no hace nada si la telemetría está desactivada"""
+    if log_telemetria.isEnabledFor(logging.INFO):
+        datos["t"] = round(time.time(), 3)
+        datos["tipo"] = tipo
+        log_telemetria.info(datos)
+
+
 class Configuracion:
     """Clase para manejar la configuración del juego"""
 
@@ -52,7 +260,12 @@ class Configuracion:
         self.sensibilidad_raton = 50
         self.subtitulos = True
         self.calidad_graficos = "Media"  # Baja, Media, Alta
+        self.movimientos_por_segundo = 5  # Ritmo máximo al mantener pulsada una dirección
+        self.movimientos_por_segundo_corriendo = 10  # Con la tecla de correr pulsada
+        self.vigilar_contenido = False  # Recarga en caliente de CONTENIDO_DIRECTORIO (para diseñadores)
+        self.perfilador_activo = False  # Medir las fases del motor desde el arranque (F3 lo activa al vuelo)
         self.idioma = "Español"
+        self.niveles_registro = {subsistema: "INFO" for subsistema in SUBSISTEMAS_REGISTRO}
         
         # Cargar configuración guardada si existe
         self.cargar_configuracion()
@@ -69,12 +282,12 @@ class Configuracion:
                         if hasattr(self, key):
                             setattr(self, key, value)
                     
-                    print("Configuración cargada correctamente")
+                    log_motor.info("Configuración cargada correctamente")
             else:
-                print("No se encontró archivo de configuración. Usando valores predeterminados")
+                log_motor.info("No se encontró archivo de configuración. Usando valores predeterminados")
                 self.guardar_configuracion()  # Crear archivo de configuración
         except Exception as e:
-            print(f"Error al cargar configuración: {e}")
+            log_motor.error("Error al cargar configuración: %s", e)
     
     def guardar_configuracion(self):
         """Guarda la configuración actual en un archivo"""
@@ -89,90 +302,631 @@ class Configuracion:
                 "sensibilidad_raton": self.sensibilidad_raton,
                 "subtitulos": self.subtitulos,
                 "calidad_graficos": self.calidad_graficos,
-                "idioma": self.idioma
+                "movimientos_por_segundo": self.movimientos_por_segundo,
+                "movimientos_por_segundo_corriendo": self.movimientos_por_segundo_corriendo,
+                "vigilar_contenido": self.vigilar_contenido,
+                "perfilador_activo": self.perfilador_activo,
+                "idioma": self.idioma,
+                "niveles_registro": self.niveles_registro
             }
             
             with open(CONFIG_ARCHIVO, 'w', encoding='utf-8') as f:
                 json.dump(config, f, indent=4)
                 
-            print("Configuración guardada correctamente")
+            log_motor.info("Configuración guardada correctamente")
         except Exception as e:
-            print(f"Error al guardar configuración: {e}")
+            log_motor.error("Error al guardar configuración: %s", e)
+
+
+class RelojJuego:
+    """Reloj del juego: tiempo real, acelerado N veces o totalmente simulado
+    
+    En modo simulado el tiempo solo avanza con avanzar(), lo que permite
+    ejecutar partidas sin interfaz tan rápido como lo permita la CPU.
+    """
+    
+    def __init__(self, velocidad=1.0, simulado=False, inicio=None):
+        self.velocidad = velocidad
+        self.simulado = simulado
+        self._origen_real = time.time()
+        self._origen_virtual = self._origen_real if inicio is None else inicio
+        self._adelanto = 0.0  # Segundos virtuales añadidos con avanzar()
+    
+    def ahora(self):
+        """Devuelve el instante actual del juego en segundos"""
+        if self.simulado:
+            return self._origen_virtual + self._adelanto
+        return self._origen_virtual + (time.time() - self._origen_real) * self.velocidad + self._adelanto
+    
+    def avanzar(self, segundos):
+        """Adelanta el reloj los segundos indicados"""
+        self._adelanto += segundos
+    
+    def cambiar_velocidad(self, velocidad):
+        """Cambia la velocidad del reloj sin saltos en el tiempo actual"""
+        self._origen_virtual = self.ahora() - self._adelanto
+        self._origen_real = time.time()
+        self.velocidad = velocidad
+    
+    def intervalo_real(self, segundos):
+        """Convierte segundos de juego en segundos reales de espera"""
+        return segundos / self.velocidad
+
+
+# Formato de salida de la música (PCM de 16 bits con signo)
+FRECUENCIA_MUSICA = 44100
+CANALES_MUSICA = 2
+BYTES_POR_FRAME_MUSICA = 2 * CANALES_MUSICA
+FRAMES_BLOQUE_MUSICA = 2048  # Frames que mezcla la etapa de salida de una vez (~46 ms)
+CAPACIDAD_BUFFER_MUSICA = FRECUENCIA_MUSICA * BYTES_POR_FRAME_MUSICA  # 1 s por pista, dure lo que dure
+DURACION_FUNDIDO_MUSICA = 2.0  # Segundos del fundido cruzado entre pistas
+MUSICA_SIN_BUCLE = ("victoria", "derrota")
+
+# Banco de efectos: un archivo con los efectos ya decodificados en el formato de salida
+BANCO_EFECTOS_ARCHIVO = "mansion_efectos.bin"
+MAGIA_BANCO_EFECTOS = b"MFX1"
+ALINEACION_BANCO_EFECTOS = 16
+MAX_EFECTOS_SIMULTANEOS = 8  # Al superarse se corta el efecto más antiguo
+
+
+class BufferCircular:
+    """Buffer circular de bytes de tamaño fijo entre un hilo productor y uno consumidor"""
+    
+    def __init__(self, capacidad):
+        self.capacidad = capacidad
+        self._datos = bytearray(capacidad)
+        self._inicio = 0
+        self._ocupado = 0
+        self._condicion = threading.Condition()
+        self.cerrado = False
+    
+    def escribir(self, datos):
+        """Escribe todos los datos, esperando mientras esté lleno; devuelve False si se ha cerrado"""
+        vista = memoryview(datos)
+        while vista:
+            with self._condicion:
+                while self._ocupado == self.capacidad and not self.cerrado:
+                    self._condicion.wait()
+                if self.cerrado:
+                    return False
+                n = min(self.capacidad - self._ocupado, len(vista))
+                fin = (self._inicio + self._ocupado) % self.capacidad
+                primera = min(n, self.capacidad - fin)
+                self._datos[fin:fin + primera] = vista[:primera]
+                self._datos[:n - primera] = vista[primera:n]
+                self._ocupado += n
+                self._condicion.notify_all()
+            vista = vista[n:]
+        return True
+    
+    def leer(self, n):
+        """Lee hasta n bytes sin esperar (menos si no hay tantos)"""
+        with self._condicion:
+            n = min(n, self._ocupado)
+            primera = min(n, self.capacidad - self._inicio)
+            datos = bytes(self._datos[self._inicio:self._inicio + primera]) + bytes(self._datos[:n - primera])
+            self._inicio = (self._inicio + n) % self.capacidad
+            self._ocupado -= n
+            self._condicion.notify_all()
+            return datos
+    
+    def disponibles(self):
+        return self._ocupado
+    
+    def cerrar(self):
+        """Despierta al productor y hace que deje de escribir"""
+        with self._condicion:
+            self.cerrado = True
+            self._condicion.notify_all()
+
+
+def _mono_a_estereo(datos):
+    mono = array('h', datos)
+    estereo = array('h', bytes(len(datos) * 2))
+    estereo[0::2] = mono
+    estereo[1::2] = mono
+    return estereo.tobytes()
+
+
+class PistaMusica:
+    """Pista WAV que un hilo decodificador va leyendo por bloques a su buffer circular
+    
+    La memoria de la pista es la del buffer, no la del archivo. Las pistas en
+    bucle vuelven al principio al terminar.
+    """
+    
+    def __init__(self, nombre, ruta, bucle=True, capacidad=CAPACIDAD_BUFFER_MUSICA):
+        self.nombre = nombre
+        self.ruta = ruta
+        self.bucle = bucle
+        with wave.open(ruta, 'rb') as archivo:
+            if archivo.getsampwidth() != 2 or archivo.getframerate() != FRECUENCIA_MUSICA \
+                    or archivo.getnchannels() not in (1, 2):
+                raise ValueError(f"{ruta}: se esperaba PCM de 16 bits a {FRECUENCIA_MUSICA} Hz")
+            self._mono = archivo.getnchannels() == 1
+        self.buffer = BufferCircular(capacidad)
+        self.agotada = False  # El decodificador ha llegado al final (sin bucle)
+        self._hilo = threading.Thread(target=self._decodificar, daemon=True)
+        self._hilo.start()
+    
+    def _decodificar(self):
+        try:
+            while not self.buffer.cerrado:
+                with wave.open(self.ruta, 'rb') as archivo:
+                    while True:
+                        datos = archivo.readframes(FRAMES_BLOQUE_MUSICA)
+                        if not datos:
+                            break
+                        if self._mono:
+                            datos = _mono_a_estereo(datos)
+                        if not self.buffer.escribir(datos):
+                            return
+                if not self.bucle:
+                    break
+        except (OSError, EOFError, wave.Error) as e:
+            log_sonido.warning("Error al leer la música %s: %s", self.ruta, e)
+        finally:
+            self.agotada = True
+    
+    def leer(self, n):
+        return self.buffer.leer(n)
+    
+    def terminada(self):
+        """True cuando ya se ha reproducido todo (solo en pistas sin bucle o con error)"""
+        return self.agotada and not self.buffer.disponibles()
+    
+    def detener(self):
+        self.buffer.cerrar()
+
+
+class SalidaNula:
+    """Salida de audio que descarta los datos (pruebas y equipos sin tarjeta de sonido)
+    
+    Con tiempo_real espera lo que duraría el bloque, como una tarjeta de verdad.
+    """
+    
+    def __init__(self, tiempo_real=True):
+        self.tiempo_real = tiempo_real
+        self.frames = 0
+    
+    def escribir(self, datos):
+        frames = len(datos) // BYTES_POR_FRAME_MUSICA
+        self.frames += frames
+        if self.tiempo_real:
+            time.sleep(frames / FRECUENCIA_MUSICA)
+    
+    def cerrar(self):
+        pass
+
+
+class SalidaArchivo(SalidaNula):
+    """Salida de audio que escribe lo reproducido en un WAV"""
+    
+    def __init__(self, ruta, tiempo_real=False):
+        super().__init__(tiempo_real)
+        self._archivo = wave.open(ruta, 'wb')
+        self._archivo.setnchannels(CANALES_MUSICA)
+        self._archivo.setsampwidth(2)
+        self._archivo.setframerate(FRECUENCIA_MUSICA)
+    
+    def escribir(self, datos):
+        self._archivo.writeframes(datos)
+        super().escribir(datos)
+    
+    def cerrar(self):
+        self._archivo.close()
+
+
+class SalidaDispositivo:
+    """Salida a la tarjeta de sonido con el paquete opcional sounddevice"""
+    
+    def __init__(self, sounddevice):
+        self._flujo = sounddevice.RawOutputStream(samplerate=FRECUENCIA_MUSICA, channels=CANALES_MUSICA,
+                                                  dtype="int16", blocksize=FRAMES_BLOQUE_MUSICA)
+        self._flujo.start()
+    
+    def escribir(self, datos):
+        self._flujo.write(datos)  # Bloquea hasta que la tarjeta tiene sitio: marca el ritmo
+    
+    def cerrar(self):
+        self._flujo.close()
+
+
+def salida_musica_predeterminada():
+    """Salida a la tarjeta de sonido, o None si no hay sounddevice, dispositivo, pistas ni efectos"""
+    if not os.path.isdir(MUSICA_DIRECTORIO) and not os.path.exists(BANCO_EFECTOS_ARCHIVO):
+        return None
+    try:
+        import sounddevice  # Opcional y lento de importar: solo si hay algo que reproducir
+        return SalidaDispositivo(sounddevice)
+    except Exception as e:  # ImportError, OSError sin PortAudio o error del dispositivo
+        log_sonido.info("Música desactivada: %s", e)
+        return None
+
+
+class BancoEfectos:
+    """Efectos de sonido precodificados en un único archivo proyectado en memoria
+    
+    Formato: MAGIA_BANCO_EFECTOS, la longitud del índice (uint32 little-endian),
+    el índice JSON {nombre: [desplazamiento, bytes]} y los datos PCM en el
+    formato de salida, cada clip alineado a ALINEACION_BANCO_EFECTOS. Al abrirlo
+    solo se lee el índice; las páginas de audio las trae el sistema operativo
+    cuando se reproducen. clip() devuelve una vista sin copia ni decodificación.
+    """
+    
+    def __init__(self, ruta=BANCO_EFECTOS_ARCHIVO):
+        self.ruta = ruta
+        with open(ruta, 'rb') as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._mapa[:4] != MAGIA_BANCO_EFECTOS:
+                raise ValueError(f"{ruta}: no es un banco de efectos")
+            longitud, = struct.unpack_from("<I", self._mapa, 4)
+            self.indice = json.loads(self._mapa[8:8 + longitud])
+            for inicio, tamano in self.indice.values():
+                if inicio < 8 + longitud or tamano % 2 or inicio + tamano > len(self._mapa):
+                    raise ValueError("clip fuera del archivo")
+        except (ValueError, TypeError, struct.error) as e:
+            self._mapa.close()
+            raise ValueError(f"{ruta}: banco de efectos dañado ({e})") from e
+        # Vistas de muestras de 16 bits: el mezclador las recorre sin copiarlas
+        with memoryview(self._mapa) as vista:
+            self._clips = {nombre: vista[inicio:inicio + tamano].cast('h')
+                           for nombre, (inicio, tamano) in self.indice.items()}
+    
+    def clip(self, nombre):
+        """Muestras del efecto (memoryview de 16 bits sobre el archivo) o None"""
+        return self._clips.get(nombre)
+    
+    def nombres(self):
+        return sorted(self._clips)
+    
+    def duracion(self, nombre):
+        """Segundos que dura el efecto"""
+        return len(self._clips[nombre]) / (FRECUENCIA_MUSICA * CANALES_MUSICA)
+    
+    def cerrar(self):
+        for clip in self._clips.values():
+            clip.release()
+        self._clips = {}
+        self._mapa.close()
+    
+    @staticmethod
+    def empaquetar(clips, ruta=BANCO_EFECTOS_ARCHIVO):
+        """Escribe un banco con los clips {nombre: PCM estéreo de 16 bits}; el reemplazo es atómico"""
+        indice = {}
+        desplazamiento = 0
+        for nombre, datos in clips.items():
+            indice[nombre] = [desplazamiento, len(datos)]
+            desplazamiento += -(-len(datos) // ALINEACION_BANCO_EFECTOS) * ALINEACION_BANCO_EFECTOS
+        # El índice lleva desplazamientos absolutos, que dependen de su propia longitud
+        inicio = 0
+        while True:
+            indice_absoluto = {nombre: [inicio + d, n] for nombre, (d, n) in indice.items()}
+            codificado = json.dumps(indice_absoluto, ensure_ascii=False).encode('utf-8')
+            cabecera = 8 + len(codificado)
+            necesario = -(-cabecera // ALINEACION_BANCO_EFECTOS) * ALINEACION_BANCO_EFECTOS
+            if necesario == inicio:
+                break
+            inicio = necesario
+        temporal = ruta + ".tmp"
+        with open(temporal, 'wb') as f:
+            f.write(MAGIA_BANCO_EFECTOS + struct.pack("<I", len(codificado)) + codificado)
+            f.write(bytes(inicio - cabecera))
+            for nombre, datos in clips.items():
+                f.write(datos)
+                f.write(bytes(-len(datos) % ALINEACION_BANCO_EFECTOS))
+        os.replace(temporal, ruta)
+        return indice_absoluto
+
+
+def _cargar_numpy():
+    """NumPy si está instalado (mezcla el audio por bloques enteros) o None"""
+    try:
+        import numpy  # Opcional y lento de importar: solo al crear el reproductor
+    except ImportError:
+        return None
+    return numpy
+
+
+class ReproductorMusica:
+    """Reproduce la música en streaming con fundidos cruzados entre pistas
+    
+    Cada pista tiene su hilo decodificador; la etapa de salida (otro hilo)
+    mezcla bloques de las pistas entrante y saliente y los entrega a la
+    salida, que marca el ritmo. generar() hace un paso de mezcla sin hilos.
+    Los efectos (clips del BancoEfectos) se suman encima de la música. Con
+    NumPy la mezcla trata el bloque entero; sin él, muestra a muestra.
+    """
+    
+    def __init__(self, salida, configuracion, directorio=MUSICA_DIRECTORIO, fundido=DURACION_FUNDIDO_MUSICA):
+        self.salida = salida
+        self.configuracion = configuracion
+        self.directorio = directorio
+        self.frames_fundido = max(1, int(fundido * FRECUENCIA_MUSICA))
+        self.pista = None
+        self.saliente = None
+        self._ganancia_saliente = 1.0  # Ganancia de la saliente al empezar el fundido
+        self._progreso_fundido = self.frames_fundido  # Frames mezclados desde el último cambio
+        self.subejecuciones = 0  # Bloques en los que el decodificador no llegó a tiempo
+        self._clips = []  # [muestras, posición, ganancia] de los efectos que suenan
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._np = _cargar_numpy()
+    
+    def _ganancias(self, progreso, ganancia_saliente=None):
+        if ganancia_saliente is None:
+            ganancia_saliente = self._ganancia_saliente
+        entrante = min(1.0, progreso / self.frames_fundido)
+        return entrante, ganancia_saliente * (1.0 - entrante)
+    
+    def reproducir(self, nombre, bucle=True):
+        """Empieza una pista (None = silencio) con fundido desde lo que estuviera sonando"""
+        nueva = None
+        ruta = os.path.join(self.directorio, f"{nombre}.wav") if nombre else None
+        if ruta and os.path.exists(ruta):
+            try:
+                nueva = PistaMusica(nombre, ruta, bucle)
+            except (OSError, EOFError, wave.Error, ValueError) as e:
+                log_sonido.warning("No se puede reproducir %s: %s", ruta, e)
+        with self._lock:
+            entrante, saliente = self._ganancias(self._progreso_fundido)
+            if self.pista is not None:
+                # La pista actual pasa a saliente desde el volumen que tenga ahora
+                if self.saliente is not None:
+                    self.saliente.detener()
+                self.saliente, self._ganancia_saliente = self.pista, entrante
+            elif self.saliente is not None:
+                self._ganancia_saliente = saliente
+            self.pista = nueva
+            self._progreso_fundido = 0
+        self._arrancar_salida()
+    
+    def reproducir_clip(self, muestras, volumen=1.0):
+        """Mezcla un efecto encima de la música; las muestras no se copian"""
+        with self._lock:
+            if len(self._clips) >= MAX_EFECTOS_SIMULTANEOS:
+                self._clips.pop(0)
+            self._clips.append([muestras, 0, volumen])
+        self._arrancar_salida()
+    
+    def detener_efectos(self):
+        with self._lock:
+            self._clips = []
+    
+    def _arrancar_salida(self):
+        if self.salida is not None and (self._hilo is None or not self._hilo.is_alive()):
+            self._hilo = threading.Thread(target=self._bucle_salida, daemon=True)
+            self._hilo.start()
+    
+    def detener(self):
+        """Funde la música a silencio"""
+        self.reproducir(None)
+    
+    def sonando(self):
+        return self.pista is not None or self.saliente is not None or bool(self._clips)
+    
+    def generar(self, frames=FRAMES_BLOQUE_MUSICA):
+        """Mezcla y devuelve el siguiente bloque de audio (silencio donde no hay datos)
+        
+        Con el cerrojo solo se leen los bloques y se avanza el estado; la mezcla
+        se hace después sobre esa foto, sin frenar a reproducir() ni a los efectos.
+        """
+        n = frames * BYTES_POR_FRAME_MUSICA
+        with self._lock:
+            pista, saliente = self.pista, self.saliente
+            datos = pista.leer(n) if pista else b""
+            if pista and len(datos) < n:
+                if pista.terminada():
+                    self.pista = None
+                else:
+                    self.subejecuciones += 1
+            otros = saliente.leer(n) if saliente else b""
+            progreso = self._progreso_fundido
+            self._progreso_fundido = min(progreso + frames, self.frames_fundido)
+            ganancia_saliente = self._ganancia_saliente
+            if saliente is not None and (self._progreso_fundido >= self.frames_fundido or saliente.terminada()):
+                saliente.detener()
+                self.saliente = None
+            clips = self._avanzar_clips(frames * CANALES_MUSICA)
+        
+        volumen = self.configuracion.volumen_musica / 100
+        datos = datos.ljust(n, b"\0")
+        if saliente is None and progreso >= self.frames_fundido:
+            # Sin fundido solo hay que aplicar el volumen
+            bloque = datos if volumen >= 1.0 else self._escalar(datos, volumen)
+        else:
+            bloque = self._fundir(datos, otros.ljust(n, b"\0"), frames, progreso, ganancia_saliente, volumen)
+        if clips:
+            bloque = self._mezclar_clips(bloque, clips)
+        return bloque
+    
+    def _avanzar_clips(self, n):
+        """Devuelve (muestras, posición, ganancia) de cada efecto para este bloque
+        y avanza sus posiciones, retirando los que terminan. Se llama con el cerrojo.
+        """
+        foto = []
+        sonando = []
+        for clip in self._clips:
+            muestras, posicion, ganancia = clip
+            foto.append((muestras, posicion, ganancia))
+            clip[1] = posicion + n
+            if clip[1] < len(muestras):
+                sonando.append(clip)
+        self._clips = sonando
+        return foto
+    
+    def _escalar(self, datos, volumen):
+        np = self._np
+        if np is not None:
+            return (np.frombuffer(datos, dtype=np.int16) * volumen).astype(np.int16).tobytes()
+        return array('h', (int(muestra * volumen) for muestra in array('h', datos))).tobytes()
+    
+    def _fundir(self, datos, otros, frames, progreso, ganancia_saliente, volumen):
+        """Fundido cruzado entre la pista entrante (datos) y la saliente (otros)"""
+        np = self._np
+        if np is not None:
+            g_entrante = np.minimum(1.0, np.arange(progreso, progreso + frames) / self.frames_fundido)
+            g_saliente = ganancia_saliente * (1.0 - g_entrante)
+            entrantes = np.frombuffer(datos, dtype=np.int16).reshape(frames, CANALES_MUSICA)
+            salientes = np.frombuffer(otros, dtype=np.int16).reshape(frames, CANALES_MUSICA)
+            mezcla = (entrantes * g_entrante[:, None] + salientes * g_saliente[:, None]) * volumen
+            return mezcla.astype(np.int16).tobytes()
+        
+        entrantes = array('h', datos)
+        salientes = array('h', otros)
+        mezcla = array('h', bytes(len(datos)))
+        for frame in range(frames):
+            g_entrante, g_saliente = self._ganancias(progreso + frame, ganancia_saliente)
+            for i in range(frame * CANALES_MUSICA, (frame + 1) * CANALES_MUSICA):
+                mezcla[i] = int((entrantes[i] * g_entrante + salientes[i] * g_saliente) * volumen)
+        return mezcla.tobytes()
+    
+    def _mezclar_clips(self, bloque, clips):
+        """Suma los efectos al bloque con recorte"""
+        np = self._np
+        if np is not None:
+            mezcla = np.frombuffer(bloque, dtype=np.int16).astype(np.int32)
+            for muestras, posicion, ganancia in clips:
+                tramo = (np.asarray(muestras[posicion:posicion + len(mezcla)], dtype=np.int16) * ganancia)
+                mezcla[:len(tramo)] += tramo.astype(np.int32)
+                np.clip(mezcla, -32768, 32767, out=mezcla)
+            return mezcla.astype(np.int16).tobytes()
+        
+        mezcla = array('h', bloque)
+        for muestras, posicion, ganancia in clips:
+            for i, muestra in enumerate(muestras[posicion:posicion + len(mezcla)]):
+                valor = mezcla[i] + int(muestra * ganancia)
+                mezcla[i] = 32767 if valor > 32767 else -32768 if valor < -32768 else valor
+        return mezcla.tobytes()
+    
+    def _bucle_salida(self):
+        """Etapa de salida: mezcla y entrega bloques mientras haya algo sonando"""
+        while self.sonando():
+            self.salida.escribir(self.generar())
+    
+    def cerrar(self):
+        """Detiene la música de inmediato y libera la salida"""
+        with self._lock:
+            for pista in (self.pista, self.saliente):
+                if pista is not None:
+                    pista.detener()
+            self.pista = self.saliente = None
+            self._clips = []
+        if self._hilo is not None:
+            self._hilo.join(timeout=1.0)
+        if self.salida is not None:
+            self.salida.cerrar()
 
 
 class SistemaSonido:
     """Sistema de sonido simulado para el juego"""
     
-    def __init__(self, configuracion):
+    def __init__(self, configuracion, reloj=None):
         self.configuracion = configuracion
+        self.reloj = reloj or RelojJuego()
         self.efectos_activos = {}
         self.musica_actual = None
         self.sonidos_ambientales = []
         self.ultimo_susto = 0
+        self.root = None  # Ventana para la campana (None en modo sin interfaz)
+        self.reproductor = None  # ReproductorMusica; sin él la música solo se registra
+        self.banco = None  # BancoEfectos; sin él los efectos suenan con la campana
+    
+    def activar_musica(self, salida, directorio=MUSICA_DIRECTORIO):
+        """Reproduce de verdad la música por la salida indicada (ver ReproductorMusica)"""
+        self.reproductor = ReproductorMusica(salida, self.configuracion, directorio)
+        if self.musica_actual:
+            self.reproductor.reproducir(self.musica_actual, self.musica_actual not in MUSICA_SIN_BUCLE)
+        return self.reproductor
+    
+    def cargar_banco_efectos(self, ruta=BANCO_EFECTOS_ARCHIVO):
+        """Proyecta en memoria el banco de efectos, si existe (ver BancoEfectos)"""
+        if not os.path.exists(ruta):
+            return None
+        try:
+            self.banco = BancoEfectos(ruta)
+        except (OSError, ValueError) as e:
+            log_sonido.warning("No se puede cargar el banco de efectos: %s", e)
+            return None
+        log_sonido.info("Banco de efectos cargado: %d efectos", len(self.banco.indice))
+        return self.banco
         
     def reproducir_efecto(self, nombre, loop=False, volumen=None):
         """Simula reproducir un efecto de sonido"""
         vol = volumen if volumen is not None else self.configuracion.volumen_efectos
-        print(f"Reproduciendo efecto: {nombre} (Volumen: {vol}%)")
+        log_sonido.debug("Reproduciendo efecto: %s (Volumen: %s%%)", nombre, vol)
         
         # En un juego real, aquí se utilizaría pygame.mixer o similar
         # Para simular, solo registramos el efecto
+        ahora = self.reloj.ahora()
+        self._purgar_efectos(ahora)
         self.efectos_activos[nombre] = {
             "volumen": vol,
             "loop": loop,
-            "timestamp": time.time()
+            "timestamp": ahora,
+            # Los efectos no en loop se limpian pasado un tiempo
+            "expira": None if loop else ahora + 2.0
         }
         
-        # Simular el sonido con la campana del sistema
-        if nombre == "susto":
-            for _ in range(3):
+        clip = self.banco.clip(nombre) if self.banco is not None and self.reproductor is not None else None
+        if clip is not None:
+            self.reproductor.reproducir_clip(clip, vol / 100)
+        # Simular el sonido con la campana del sistema (si hay ventana)
+        elif self.root is not None:
+            if nombre == "susto":
+                for _ in range(3):
+                    self.root.bell()
+                    time.sleep(0.1)
+            else:
                 self.root.bell()
-                time.sleep(0.1)
-        else:
-            self.root.bell()
-            
-        # Limpiar efectos no en loop después de un tiempo
-        if not loop:
-            self.efectos_activos[nombre]["timer"] = threading.Timer(2.0, lambda: self.efectos_activos.pop(nombre, None))
-            self.efectos_activos[nombre]["timer"].start()
+    
+    def _purgar_efectos(self, ahora):
+        """Quita los efectos que ya han terminado (sin hilos temporizadores)"""
+        for nombre, datos in list(self.efectos_activos.items()):
+            if datos["expira"] is not None and datos["expira"] <= ahora:
+                self.efectos_activos.pop(nombre, None)
     
     def reproducir_musica(self, nombre, volumen=None):
         """Simula reproducir música de fondo"""
         vol = volumen if volumen is not None else self.configuracion.volumen_musica
-        print(f"Reproduciendo música: {nombre} (Volumen: {vol}%)")
+        log_sonido.debug("Reproduciendo música: %s (Volumen: %s%%)", nombre, vol)
         
         # Detener la música actual si hay alguna
         if self.musica_actual:
-            print(f"Deteniendo música anterior: {self.musica_actual}")
+            log_sonido.debug("Deteniendo música anterior: %s", self.musica_actual)
         
         self.musica_actual = nombre
+        if self.reproductor:
+            self.reproductor.reproducir(nombre, nombre not in MUSICA_SIN_BUCLE)
     
     def detener_musica(self):
         """Detiene la música actual"""
         if self.musica_actual:
-            print(f"Deteniendo música: {self.musica_actual}")
+            log_sonido.debug("Deteniendo música: %s", self.musica_actual)
             self.musica_actual = None
+            if self.reproductor:
+                self.reproductor.detener()
     
     def detener_todos_sonidos(self):
         """Detiene todos los sonidos activos"""
-        for nombre, datos in list(self.efectos_activos.items()):
-            if "timer" in datos:
-                datos["timer"].cancel()
-            self.efectos_activos.pop(nombre, None)
+        self.efectos_activos.clear()
+        if self.reproductor:
+            self.reproductor.detener_efectos()
         
         self.detener_musica()
-        print("Todos los sonidos detenidos")
+        log_sonido.debug("Todos los sonidos detenidos")
     
     def reproducir_susto(self):
         """Reproduce un efecto de susto aleatorio"""
         # Verificar si ha pasado suficiente tiempo desde el último susto
-        tiempo_actual = time.time()
+        tiempo_actual = self.reloj.ahora()
         if tiempo_actual - self.ultimo_susto < 30:  # Mínimo 30 segundos entre sustos
             return False
             
         self.ultimo_susto = tiempo_actual
         self.reproducir_efecto("susto")
-        print("¡SUSTO GENERADO!")
+        log_sonido.debug("¡SUSTO GENERADO!")
         return True
     
     def set_root(self, root):
@@ -180,24 +934,106 @@ class SistemaSonido:
         self.root = root
 
 
+# Migraciones de partidas guardadas
+VERSION_GUARDADO_INICIAL = "1.0.0"  # Versión de los guardados que no la indican
+MIGRACIONES_GUARDADO = {}  # {versión de origen: (versión de destino, paso)}
+
+
+def migracion(origen, destino):
+    """Registra un paso que convierte una partida guardada de la versión origen a la destino"""
+    def decorador(paso):
+        MIGRACIONES_GUARDADO[origen] = (destino, paso)
+        return paso
+    return decorador
+
+
+def migrar_partida(partida, version=None):
+    """Lleva una partida guardada a VERSION_JUEGO aplicando en cadena los pasos registrados
+    
+    version es la del archivo, para las partidas que no indican la suya.
+    Una versión sin pasos registrados (por ejemplo, posterior a la del juego)
+    se deja como está.
+    """
+    version = partida.get("version", version or VERSION_GUARDADO_INICIAL)
+    while version in MIGRACIONES_GUARDADO:
+        version, paso = MIGRACIONES_GUARDADO[version]
+        partida = paso(partida)
+        partida["version"] = version
+    if version != VERSION_JUEGO:
+        log_guardado.warning("Partida %s en versión %s sin migración a %s", partida.get("slot"), version, VERSION_JUEGO)
+    return partida
+
+
+def migrar_guardado(datos):
+    """Partidas de un archivo de guardado ya migradas y cuántas han cambiado
+    
+    Acepta el formato actual ({"version", "partidas"}) y la lista sin cabecera
+    de los guardados anteriores a 1.1.0. Si el archivo está al día no se toca
+    ninguna partida.
+    """
+    if isinstance(datos, list):
+        version, partidas = VERSION_GUARDADO_INICIAL, datos
+    else:
+        version, partidas = datos.get("version", VERSION_GUARDADO_INICIAL), datos.get("partidas", [])
+    if version == VERSION_JUEGO:
+        return partidas, 0
+    migradas = 0
+    for i, partida in enumerate(partidas):
+        anterior = partida.get("version", version)
+        partidas[i] = migrar_partida(partida, version)
+        migradas += partidas[i].get("version") != anterior
+    return partidas, migradas
+
+
+def escribir_guardado(ruta, partidas):
+    """Escribe un archivo de guardado de forma atómica
+    
+    La versión va la primera para que se pueda comprobar leyendo solo el
+    principio del archivo.
+    """
+    temporal = ruta + ".tmp"
+    # Se serializa de una vez: json.dump con indent escribe el texto en miles de trozos pequeños
+    texto = json.dumps({"version": VERSION_JUEGO, "partidas": partidas}, indent=4)
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write(texto)
+    os.replace(temporal, ruta)
+
+
+@migracion("1.0.0", "1.1.0")
+def _migrar_recorrido_y_efectos(partida):
+    """Recorrido acotado (RecorridoVisitas) y efectos temporales del jugador"""
+    jugador = partida.setdefault("jugador", {})
+    if "recorrido" not in jugador:
+        jugador["recorrido"] = RecorridoVisitas.desde_lista(jugador.pop("historia_visitada", [])).to_dict()
+    if "efectos" not in jugador:
+        efectos = EfectosTemporales()
+        if jugador.get("linterna_activa"):
+            efectos.iniciar("linterna", jugador.get("bateria_linterna", 0), -1)
+        jugador["efectos"] = efectos.to_dict()
+    return partida
+
+
 class GestorGuardado:
     """Gestiona el guardado y carga de partidas"""
     
-    def __init__(self):
+    def __init__(self, cargar=True):
         self.partidas_guardadas = []
-        self.cargar_partidas()
+        if cargar:
+            self.cargar_partidas()
     
     def cargar_partidas(self):
         """Carga las partidas guardadas desde el archivo"""
         try:
             if os.path.exists(GUARDADO_ARCHIVO):
                 with open(GUARDADO_ARCHIVO, 'r', encoding='utf-8') as f:
-                    self.partidas_guardadas = json.load(f)
-                print(f"Se cargaron {len(self.partidas_guardadas)} partidas guardadas")
+                    self.partidas_guardadas, migradas = migrar_guardado(json.load(f))
+                log_guardado.info("Se cargaron %d partidas guardadas", len(self.partidas_guardadas))
+                if migradas:
+                    log_guardado.info("Migradas %d partidas a la versión %s", migradas, VERSION_JUEGO)
             else:
-                print("No se encontró archivo de partidas guardadas")
+                log_guardado.info("No se encontró archivo de partidas guardadas")
         except Exception as e:
-            print(f"Error al cargar partidas guardadas: {e}")
+            log_guardado.error("Error al cargar partidas guardadas: %s", e)
     
     def guardar_partida(self, datos_partida):
         """Guarda una partida nueva o sobrescribe una existente"""
@@ -231,19 +1067,50 @@ class GestorGuardado:
     def _guardar_archivo(self):
         """Guarda las partidas en el archivo"""
         try:
-            with open(GUARDADO_ARCHIVO, 'w', encoding='utf-8') as f:
-                json.dump(self.partidas_guardadas, f, indent=4)
-            print(f"Partidas guardadas correctamente ({len(self.partidas_guardadas)} partidas)")
+            escribir_guardado(GUARDADO_ARCHIVO, self.partidas_guardadas)
+            log_guardado.info("Partidas guardadas correctamente (%d partidas)", len(self.partidas_guardadas))
         except Exception as e:
-            print(f"Error al guardar partidas: {e}")
+            log_guardado.error("Error al guardar partidas: %s", e)
+
+
+def calcular_puntuacion(victoria, tiempo_jugado, vida, cordura, items_encontrados, secretos_descubiertos,
+                        sustos_recibidos, dificultad, pesos=PESOS_PUNTUACION):
+    """Calcula la puntuación final de una partida con los pesos indicados"""
+    puntuacion_base = pesos["base_victoria"] if victoria else pesos["base_derrota"]
+    
+    # Bonificación por tiempo (menos tiempo es mejor)
+    tiempo_max = pesos["tiempo_max"]
+    tiempo_actual = min(tiempo_jugado, tiempo_max)
+    bonus_tiempo = int((1 - tiempo_actual / tiempo_max) * pesos["bonus_tiempo"])
+    
+    # Bonificación por vida y cordura
+    bonus_vida = int(vida * pesos["vida"])
+    bonus_cordura = int(cordura * pesos["cordura"])
+    
+    # Bonificación por objetos y secretos
+    bonus_objetos = items_encontrados * pesos["objeto"]
+    bonus_secretos = secretos_descubiertos * pesos["secreto"]
+    
+    # Penalización por sustos
+    penalizacion_sustos = sustos_recibidos * pesos["susto"]
+    
+    # Modificador de dificultad
+    mod_dificultad = pesos["dificultad"].get(dificultad, 1.0)
+    
+    # Puntuación final
+    puntuacion = int((puntuacion_base + bonus_tiempo + bonus_vida + bonus_cordura +
+                     bonus_objetos + bonus_secretos - penalizacion_sustos) * mod_dificultad)
+    
+    return max(puntuacion, 0)  # Asegurar que no sea negativa
 
 
 class SistemaPuntuacion:
     """Sistema para gestionar las puntuaciones más altas"""
     
-    def __init__(self):
+    def __init__(self, cargar=True):
         self.puntuaciones = []
-        self.cargar_puntuaciones()
+        if cargar:
+            self.cargar_puntuaciones()
     
     def cargar_puntuaciones(self):
         """Carga las puntuaciones desde el archivo"""
@@ -251,14 +1118,19 @@ class SistemaPuntuacion:
             if os.path.exists(PUNTUACION_ARCHIVO):
                 with open(PUNTUACION_ARCHIVO, 'r', encoding='utf-8') as f:
                     self.puntuaciones = json.load(f)
-                print(f"Se cargaron {len(self.puntuaciones)} puntuaciones")
+                log_guardado.info("Se cargaron %d puntuaciones", len(self.puntuaciones))
             else:
-                print("No se encontró archivo de puntuaciones")
+                log_guardado.info("No se encontró archivo de puntuaciones")
         except Exception as e:
-            print(f"Error al cargar puntuaciones: {e}")
+            log_guardado.error("Error al cargar puntuaciones: %s", e)
     
-    def agregar_puntuacion(self, nombre, puntos, tiempo, items_encontrados, nivel_completado, dificultad):
-        """Agrega una nueva puntuación"""
+    def agregar_puntuacion(self, nombre, puntos, tiempo, items_encontrados, nivel_completado, dificultad,
+                           detalles=None):
+        """Agrega una nueva puntuación
+        
+        detalles: datos del jugador que no se muestran en la tabla pero permiten
+        recalcular la puntuación (ver Jugador.detalles_puntuacion).
+        """
         nueva_puntuacion = {
             "nombre": nombre,
             "puntos": puntos,
@@ -268,6 +1140,8 @@ class SistemaPuntuacion:
             "dificultad": dificultad,
             "fecha": time.strftime("%d/%m/%Y %H:%M:%S")
         }
+        nueva_puntuacion.update(detalles or {})
+        self._archivar_resultado(nueva_puntuacion)
         
         self.puntuaciones.append(nueva_puntuacion)
         # Ordenar por puntos (mayor a menor)
@@ -280,14 +1154,192 @@ class SistemaPuntuacion:
         self._guardar_puntuaciones()
         return True
     
+    def _archivar_resultado(self, resultado):
+        """Añade el resultado al histórico completo (la tabla solo guarda las 20 mejores)"""
+        try:
+            with open(RESULTADOS_ARCHIVO, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+        except Exception as e:
+            log_guardado.error("Error al archivar el resultado: %s", e)
+    
     def _guardar_puntuaciones(self):
         """Guarda las puntuaciones en el archivo"""
         try:
             with open(PUNTUACION_ARCHIVO, 'w', encoding='utf-8') as f:
                 json.dump(self.puntuaciones, f, indent=4)
-            print(f"Puntuaciones guardadas correctamente ({len(self.puntuaciones)} puntuaciones)")
+            log_guardado.info("Puntuaciones guardadas correctamente (%d puntuaciones)", len(self.puntuaciones))
+        except Exception as e:
+            log_guardado.error("Error al guardar puntuaciones: %s", e)
+
+
+class HistogramaTiempos:
+    """Acumula las duraciones de una fase y calcula sus percentiles"""
+    
+    # Límites superiores de las cubetas en milisegundos
+    LIMITES_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+    
+    def __init__(self, max_muestras=1000):
+        self.muestras = deque(maxlen=max_muestras)  # Ventana de las últimas duraciones
+        self.cubetas = [0] * (len(self.LIMITES_MS) + 1)
+        self.total = 0
+        self.suma_ms = 0.0
+        self.maximo_ms = 0.0
+        self.ultimo_ms = 0.0
+    
+    def registrar(self, duracion_ms):
+        """Registra una nueva duración en milisegundos"""
+        self.muestras.append(duracion_ms)
+        self.cubetas[bisect.bisect_left(self.LIMITES_MS, duracion_ms)] += 1
+        self.total += 1
+        self.suma_ms += duracion_ms
+        self.ultimo_ms = duracion_ms
+        if duracion_ms > self.maximo_ms:
+            self.maximo_ms = duracion_ms
+    
+    def percentil(self, p):
+        """Devuelve el percentil p (0-100) de las muestras recientes"""
+        if not self.muestras:
+            return 0.0
+        ordenadas = sorted(tuple(self.muestras))  # Copia: otro hilo puede estar registrando
+        indice = min(len(ordenadas) - 1, max(0, math.ceil(p / 100 * len(ordenadas)) - 1))
+        return ordenadas[indice]
+    
+    def to_dict(self):
+        """Convierte el histograma a un diccionario para exportarlo"""
+        etiquetas = [f"<={limite}ms" for limite in self.LIMITES_MS] + [f">{self.LIMITES_MS[-1]}ms"]
+        return {
+            "total": self.total,
+            "media_ms": self.suma_ms / self.total if self.total else 0.0,
+            "ultimo_ms": self.ultimo_ms,
+            "maximo_ms": self.maximo_ms,
+            "p50_ms": self.percentil(50),
+            "p99_ms": self.percentil(99),
+            "histograma": dict(zip(etiquetas, self.cubetas))
+        }
+
+
+class _MedicionFase:
+    """Context manager que mide una fase y la registra en el perfilador"""
+    
+    __slots__ = ("perfilador", "fase", "inicio")
+    
+    def __init__(self, perfilador, fase):
+        self.perfilador = perfilador
+        self.fase = fase
+        self.inicio = 0.0
+    
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.perfilador.registrar(self.fase, (time.perf_counter() - self.inicio) * 1000)
+        return False
+
+
+class _MedicionNula:
+    """Context manager vacío usado cuando el perfilador está desactivado"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+
+_MEDICION_NULA = _MedicionNula()
+
+
+class Perfilador:
+    """Registra el tiempo de cada fase del motor para detectar cuellos de botella
+    
+    Desactivado no mide nada y no cuesta casi nada. registrar() no toma
+    cerrojos: crear el histograma de una fase es atómico (setdefault) y, si
+    dos hilos registran a la vez la misma fase, como mucho se pierde una
+    muestra, que es más barato que pagar un cerrojo en cada medición.
+    """
+    
+    def __init__(self, habilitado=False):
+        self.habilitado = habilitado
+        self.fases = {}  # {"tick": HistogramaTiempos, "mover_jugador": ..., ...}
+    
+    def medir(self, fase):
+        """Devuelve un context manager que mide la duración del bloque"""
+        if not self.habilitado:
+            return _MEDICION_NULA
+        return _MedicionFase(self, fase)
+    
+    def registrar(self, fase, duracion_ms):
+        """Registra una duración para la fase indicada"""
+        if not self.habilitado:
+            return
+        histograma = self.fases.get(fase)
+        if histograma is None:
+            histograma = self.fases.setdefault(fase, HistogramaTiempos())
+        histograma.registrar(duracion_ms)
+    
+    def reiniciar(self):
+        """Borra todas las mediciones acumuladas"""
+        self.fases = {}
+    
+    def resumen(self):
+        """Devuelve las estadísticas de todas las fases"""
+        return {fase: histograma.to_dict() for fase, histograma in list(self.fases.items())}
+    
+    def ultimo_tick_ms(self):
+        """Devuelve la duración del último tick del motor"""
+        histograma = self.fases.get("tick")
+        return histograma.ultimo_ms if histograma else 0.0
+    
+    @staticmethod
+    def memoria_mb():
+        """Devuelve la memoria residente del proceso en MB (None si no se puede medir)"""
+        try:
+            with open("/proc/self/statm", 'r') as f:
+                paginas = int(f.read().split()[1])
+            return paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        except (OSError, ValueError, AttributeError):
+            pass
+        try:
+            import resource
+            maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # macOS devuelve bytes y Linux kilobytes
+            return maximo / (1024 * 1024) if sys.platform == "darwin" else maximo / 1024
+        except ImportError:
+            return None
+    
+    def exportar_json(self, ruta=RENDIMIENTO_ARCHIVO, extra=None):
+        """Exporta las estadísticas a un archivo JSON"""
+        datos = {
+            "version": VERSION_JUEGO,
+            "fecha": time.strftime("%d/%m/%Y %H:%M:%S"),
+            "memoria_mb": self.memoria_mb(),
+            "hilos": threading.active_count(),
+            "fases": self.resumen()
+        }
+        if extra:
+            datos.update(extra)
+        try:
+            with open(ruta, 'w', encoding='utf-8') as f:
+                json.dump(datos, f, indent=4)
+            log_motor.info("Rendimiento exportado a %s", ruta)
+            return True
         except Exception as e:
-            print(f"Error al guardar puntuaciones: {e}")
+            log_motor.error("Error al exportar rendimiento: %s", e)
+            return False
+
+
+def perfilado(fase):
+    """Decorador que mide un método del motor con su perfilador"""
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def envoltorio(self, *args, **kwargs):
+            if not self.perfilador.habilitado:
+                return metodo(self, *args, **kwargs)
+            with _MedicionFase(self.perfilador, fase):
+                return metodo(self, *args, **kwargs)
+        return envoltorio
+    return decorador
 
 
 class Item:
@@ -336,7 +1388,8 @@ class Item:
             "nombre": self.nombre,
             "descripcion": self.descripcion,
             "tipo": self.tipo,
-            "propiedades": self.propiedades,
+            "imagen": self.imagen,
+            "propiedades": dict(self.propiedades),
             "usado": self.usado,
             "cantidad": self.cantidad
         }
@@ -349,11 +1402,31 @@ class Item:
             data["nombre"],
             data["descripcion"],
             data["tipo"],
-            propiedades=data.get("propiedades", {})
+            imagen=data.get("imagen"),
+            propiedades=dict(data.get("propiedades", {}))
         )
         item.usado = data.get("usado", False)
         item.cantidad = data.get("cantidad", 1)
         return item
+    
+    def estado_instantanea(self):
+        """Devuelve el item junto con su estado mutable (ver MotorJuego.instantanea)"""
+        return (self, self.usado, self.cantidad)
+    
+    def copiar(self):
+        """Copia del item con su propio diccionario de propiedades"""
+        copia = copy.copy(self)
+        copia.propiedades = dict(self.propiedades)
+        return copia
+    
+    @staticmethod
+    def desde_instantanea(estado):
+        """Crea una copia del item con el estado capturado"""
+        item, usado, cantidad = estado
+        copia = copy.copy(item)
+        copia.usado = usado
+        copia.cantidad = cantidad
+        return copia
 
 
 class Habitacion:
@@ -407,20 +1480,26 @@ class Habitacion:
         """Agrega un evento a la habitación"""
         self.eventos.append(evento)
     
+    def activar_evento(self, evento, motor_juego):
+        """Activa un evento de la habitación y devuelve su mensaje"""
+        return evento.activar(motor_juego)
+    
     def to_dict(self):
         """Convierte la habitación a un diccionario para guardarla"""
         return {
             "id": self.id,
             "nombre": self.nombre,
             "descripcion": self.descripcion,
+            "imagen": self.imagen,
             "items": [item.to_dict() for item in self.items],
-            "conexiones": self.conexiones,
+            "conexiones": dict(self.conexiones),
             "visitada": self.visitada,
             "iluminada": self.iluminada,
             "requiere_llave": self.requiere_llave,
             "llave_requerida": self.llave_requerida,
             "nivel_peligro": self.nivel_peligro,
-            "secreto_encontrado": self.secreto_encontrado
+            "secreto_encontrado": self.secreto_encontrado,
+            "eventos": [evento.to_dict() for evento in self.eventos if evento.serializable]
         }
     
     @classmethod
@@ -430,7 +1509,8 @@ class Habitacion:
             data["id"],
             data["nombre"],
             data["descripcion"],
-            conexiones=data.get("conexiones", {})
+            imagen=data.get("imagen"),
+            conexiones=dict(data.get("conexiones", {}))
         )
         habitacion.items = [Item.from_dict(item_data) for item_data in data.get("items", [])]
         habitacion.visitada = data.get("visitada", False)
@@ -439,7 +1519,384 @@ class Habitacion:
         habitacion.llave_requerida = data.get("llave_requerida", None)
         habitacion.nivel_peligro = data.get("nivel_peligro", 0)
         habitacion.secreto_encontrado = data.get("secreto_encontrado", False)
+        habitacion.eventos = [Evento.from_dict(evento_data) for evento_data in data.get("eventos", [])]
+        return habitacion
+    
+    def estado_instantanea(self):
+        """Captura el estado de la habitación sin copiar textos ni conexiones"""
+        atributos = dict(self.__dict__)
+        items = atributos.pop("items", None)
+        eventos = atributos.pop("eventos", None)
+        return (
+            type(self),
+            atributos,
+            None if items is None else tuple(item.estado_instantanea() for item in items),
+            None if eventos is None else tuple((evento, evento.activado) for evento in eventos)
+        )
+    
+    @staticmethod
+    def desde_instantanea(estado, eventos_restaurados):
+        """Recrea una habitación capturada; anota en eventos_restaurados {id(original): copia}"""
+        clase, atributos, items, eventos = estado
+        habitacion = clase.__new__(clase)
+        habitacion.__dict__.update(atributos)
+        if items is not None:
+            habitacion.items = [Item.desde_instantanea(item) for item in items]
+        if eventos is not None:
+            habitacion.eventos = []
+            for evento, activado in eventos:
+                copia = copy.copy(evento)
+                copia.activado = activado
+                eventos_restaurados[id(evento)] = copia
+                habitacion.eventos.append(copia)
+        return habitacion
+
+
+class HabitacionSesion(Habitacion):
+    """Habitación de una partida que comparte los datos de la plantilla de la mansión
+    
+    Los atributos se leen de la plantilla hasta que la partida los cambia. Las
+    listas de objetos y eventos de la plantilla se leen tal cual y solo se copian
+    (los objetos con sus propiedades) al agregar, quitar o activar algo; no se
+    deben modificar directamente. Las conexiones de la plantilla son de solo lectura.
+    """
+    
+    def __init__(self, plantilla):
+        self._plantilla = plantilla
+    
+    def __getattr__(self, nombre):
+        plantilla = self.__dict__.get("_plantilla")
+        if plantilla is None:
+            raise AttributeError(nombre)
+        return getattr(plantilla, nombre)
+    
+    def _lista_propia(self, nombre, copiar):
+        """Devuelve la lista de la partida, copiándola de la plantilla la primera vez"""
+        lista = self.__dict__.get(nombre)
+        if lista is None:
+            # setdefault evita perder la copia si dos hilos llegan a la vez
+            lista = self.__dict__.setdefault(nombre, [copiar(elemento) for elemento in getattr(self._plantilla, nombre)])
+        return lista
+    
+    def agregar_item(self, item):
+        """Agrega un item a la lista de la partida"""
+        self._lista_propia("items", Item.copiar).append(item)
+    
+    def quitar_item(self, item_id):
+        """Quita un item por su ID; devuelve la copia de la partida, nunca el de la plantilla"""
+        items = self._lista_propia("items", Item.copiar)
+        for i, item in enumerate(items):
+            if item.id == item_id:
+                return items.pop(i)
+        return None
+    
+    def agregar_evento(self, evento):
+        """Agrega un evento a la lista de la partida"""
+        self._lista_propia("eventos", copy.copy).append(evento)
+    
+    def activar_evento(self, evento, motor_juego):
+        """Activa la copia de la partida del evento; el de la plantilla no se marca nunca"""
+        eventos = self._lista_propia("eventos", copy.copy)
+        for i, original in enumerate(self._plantilla.eventos):
+            if original is evento:
+                evento = eventos[i]
+                break
+        return evento.activar(motor_juego)
+    
+    def to_dict(self):
+        """Convierte la habitación a un diccionario sin copiar lo que no ha cambiado"""
+        datos = self._plantilla.to_dict()
+        for campo, valor in self.__dict__.items():
+            if campo == "items":
+                datos["items"] = [item.to_dict() for item in valor]
+            elif campo == "eventos":
+                datos["eventos"] = [evento.to_dict() for evento in valor if evento.serializable]
+            elif campo in datos:
+                datos[campo] = valor
+        return datos
+
+
+class MansionSesion(Mapping):
+    """Habitaciones de una partida como capa de cambios sobre una plantilla compartida
+    
+    Se comporta como el diccionario {id: Habitacion} de siempre, pero solo crea
+    una HabitacionSesion para las habitaciones que la partida llega a tocar.
+    """
+    
+    def __init__(self, plantilla):
+        self.plantilla = plantilla  # {id: Habitacion}; no se modifica nunca
+        self.vistas = {}
+    
+    def __getitem__(self, hab_id):
+        habitacion = self.vistas.get(hab_id)
+        if habitacion is None:
+            habitacion = self.vistas.setdefault(hab_id, HabitacionSesion(self.plantilla[hab_id]))
+        return habitacion
+    
+    def __contains__(self, hab_id):
+        return hab_id in self.plantilla
+    
+    def __iter__(self):
+        return iter(self.plantilla)
+    
+    def __len__(self):
+        return len(self.plantilla)
+    
+    def __deepcopy__(self, memo):
+        # La plantilla no cambia nunca: la copia la comparte y solo duplica las vistas
+        for habitacion in self.plantilla.values():
+            memo[id(habitacion)] = habitacion
+        copia = MansionSesion(self.plantilla)
+        copia.vistas = copy.deepcopy(self.vistas, memo)
+        return copia
+
+
+# Atributos de una habitación que cambian al jugar; el resto es contenido
+CAMPOS_ESTADO_HABITACION = ("visitada", "iluminada", "requiere_llave", "secreto_encontrado")
+
+
+def rebasar_habitacion(anterior, nueva, actual, sesion=True):
+    """Pasa el estado de una habitación de la partida a una versión nueva de su contenido
+    
+    anterior y nueva son la habitación de la plantilla antes y después del
+    cambio; actual, la de la partida (None si no se ha tocado). Se conservan
+    los atributos de estado, los objetos recogidos o dejados (por id) y los
+    eventos ya disparados (por tipo y mensaje). Con sesion devuelve una
+    HabitacionSesion sobre nueva; si no, una habitación independiente.
+    """
+    habitacion = HabitacionSesion(nueva) if sesion else Habitacion.from_dict(nueva.to_dict())
+    if actual is None:
         return habitacion
+    cambios = vars(actual)
+    for campo in CAMPOS_ESTADO_HABITACION:
+        if campo in cambios:
+            setattr(habitacion, campo, cambios[campo])
+    if "items" in cambios:
+        ids_anteriores = {item.id for item in anterior.items} if anterior else set()
+        quitados = ids_anteriores - {item.id for item in actual.items}
+        habitacion.items = ([item.copiar() for item in nueva.items if item.id not in quitados] +
+                            [item for item in actual.items if item.id not in ids_anteriores])
+    if "eventos" in cambios:
+        disparados = {(evento.tipo, evento.mensaje) for evento in actual.eventos if evento.activado}
+        habitacion.eventos = [copy.copy(evento) for evento in nueva.eventos]
+        for evento in habitacion.eventos:
+            evento.activado = (evento.tipo, evento.mensaje) in disparados
+    return habitacion
+
+
+LIMITE_RECORRIDO = 100  # Movimientos recientes que se conservan (y se guardan) tal cual
+
+
+class RecorridoVisitas:
+    """Recorrido del jugador por la mansión con tamaño acotado
+    
+    Cada habitación recibe un código entero; por código se llevan las visitas y
+    los instantes de la primera y la última. Del recorrido solo se conservan los
+    últimos LIMITE_RECORRIDO movimientos, que se guardan codificados por rachas
+    ([código, repeticiones, ...]). Así una partida larga no agranda el guardado.
+    """
+    
+    def __init__(self, limite=LIMITE_RECORRIDO):
+        self.habitaciones = []  # Id de la habitación de cada código
+        self._codigos = {}
+        self.visitas = array('I')
+        self.primera = array('d')
+        self.ultima = array('d')
+        self.recientes = deque(maxlen=limite)  # Códigos de los últimos movimientos
+        self.movimientos = 0
+        self.retrocesos = 0  # Vueltas a la habitación de la que se acababa de salir
+        self._anterior = None
+        self._actual = None
+    
+    def registrar(self, habitacion_id, ahora=0.0):
+        """Anota la entrada en una habitación"""
+        codigo = self._codigos.get(habitacion_id)
+        if codigo is None:
+            codigo = self._codigos[habitacion_id] = len(self.habitaciones)
+            self.habitaciones.append(habitacion_id)
+            self.visitas.append(0)
+            self.primera.append(ahora)
+            self.ultima.append(ahora)
+        if codigo == self._anterior and codigo != self._actual:
+            self.retrocesos += 1
+        self._anterior = self._actual
+        self._actual = codigo
+        self.visitas[codigo] += 1
+        self.ultima[codigo] = ahora
+        self.recientes.append(codigo)
+        self.movimientos += 1
+    
+    def habitaciones_visitadas(self):
+        """Número de habitaciones distintas visitadas"""
+        return len(self.habitaciones)
+    
+    def visitas_de(self, habitacion_id):
+        """Veces que se ha entrado en la habitación"""
+        codigo = self._codigos.get(habitacion_id)
+        return 0 if codigo is None else self.visitas[codigo]
+    
+    def ultimos(self, n=None):
+        """Ids de los últimos n movimientos (todos los conservados si n es None), del más antiguo al más reciente"""
+        if n is None or n >= len(self.recientes):
+            codigos = self.recientes
+        else:
+            codigos = list(itertools.islice(reversed(self.recientes), n))[::-1]
+        return [self.habitaciones[codigo] for codigo in codigos]
+    
+    def copiar(self):
+        """Copia independiente (para las instantáneas); su tamaño está acotado"""
+        copia = RecorridoVisitas.__new__(RecorridoVisitas)
+        copia.__dict__.update(self.__dict__)
+        copia.habitaciones = list(self.habitaciones)
+        copia._codigos = dict(self._codigos)
+        copia.visitas = array('I', self.visitas)
+        copia.primera = array('d', self.primera)
+        copia.ultima = array('d', self.ultima)
+        copia.recientes = deque(self.recientes, maxlen=self.recientes.maxlen)
+        return copia
+    
+    def to_dict(self):
+        """Convierte el recorrido a un diccionario para guardarlo"""
+        rachas = []
+        for codigo, grupo in itertools.groupby(self.recientes):
+            rachas += (codigo, sum(1 for _ in grupo))
+        return {
+            "habitaciones": list(self.habitaciones),
+            "visitas": self.visitas.tolist(),
+            "primera": [round(instante, 3) for instante in self.primera],
+            "ultima": [round(instante, 3) for instante in self.ultima],
+            "recientes": rachas,
+            "anterior": self._anterior,
+            "movimientos": self.movimientos,
+            "retrocesos": self.retrocesos
+        }
+    
+    @classmethod
+    def from_dict(cls, data, limite=LIMITE_RECORRIDO):
+        """Crea un recorrido desde un diccionario"""
+        recorrido = cls(limite)
+        recorrido.habitaciones = list(data.get("habitaciones", []))
+        recorrido._codigos = {hab_id: codigo for codigo, hab_id in enumerate(recorrido.habitaciones)}
+        recorrido.visitas = array('I', data.get("visitas", []))
+        recorrido.primera = array('d', data.get("primera", []))
+        recorrido.ultima = array('d', data.get("ultima", []))
+        rachas = data.get("recientes", [])
+        for codigo, repeticiones in zip(rachas[::2], rachas[1::2]):
+            recorrido.recientes.extend(itertools.repeat(codigo, repeticiones))
+        recorrido._anterior = data.get("anterior")
+        recorrido._actual = recorrido.recientes[-1] if recorrido.recientes else None
+        recorrido.movimientos = data.get("movimientos", 0)
+        recorrido.retrocesos = data.get("retrocesos", 0)
+        return recorrido
+    
+    @classmethod
+    def desde_lista(cls, historia_visitada, limite=LIMITE_RECORRIDO):
+        """Convierte la lista completa de los guardados antiguos (sin instantes de visita)"""
+        recorrido = cls(limite)
+        for habitacion_id in historia_visitada:
+            recorrido.registrar(habitacion_id)
+        return recorrido
+
+
+class EfectosTemporales:
+    """Efectos con duración del jugador: linterna, vela, amuleto...
+    
+    Cada efecto guarda el tick en que empezó, su valor inicial y su ritmo por
+    tick; el valor actual se calcula al pedirlo. Solo se programa su
+    vencimiento, así que mientras no vence ninguno un tick no cuesta nada.
+    Los ticks son los del propio jugador (avanzar()), de modo que se guardan
+    y cargan sin depender del tick del motor.
+    """
+    
+    def __init__(self):
+        self.tick = 0
+        self.activos = {}  # {nombre: (inicio, valor, ritmo, fin)}
+        self._vencimientos = []  # Montículo de (fin, nombre); las entradas obsoletas se descartan al salir
+    
+    def iniciar(self, nombre, valor=0, ritmo=0, duracion=None):
+        """Empieza (o reinicia) un efecto
+        
+        Sin duración, un efecto que decrece vence al llegar a 0 y uno que no
+        decrece dura hasta detenerlo.
+        """
+        if duracion is None and ritmo < 0:
+            duracion = math.ceil(valor / -ritmo)
+        fin = None if duracion is None else self.tick + max(0, duracion)
+        self.activos[nombre] = (self.tick, valor, ritmo, fin)
+        if fin is not None:
+            heapq.heappush(self._vencimientos, (fin, nombre))
+    
+    def detener(self, nombre):
+        """Termina un efecto y devuelve su valor actual (None si no estaba activo)"""
+        valor = self.valor(nombre)
+        self.activos.pop(nombre, None)
+        return valor
+    
+    def activo(self, nombre):
+        return nombre in self.activos
+    
+    def valor(self, nombre, predeterminado=None):
+        """Valor actual del efecto (nunca por debajo de 0 si decrece)"""
+        efecto = self.activos.get(nombre)
+        if efecto is None:
+            return predeterminado
+        inicio, valor, ritmo, _ = efecto
+        actual = valor + ritmo * (self.tick - inicio)
+        return max(actual, 0) if ritmo < 0 else actual
+    
+    def restante(self, nombre):
+        """Ticks que le quedan al efecto (None si no vence o no está activo)"""
+        efecto = self.activos.get(nombre)
+        if efecto is None or efecto[3] is None:
+            return None
+        return efecto[3] - self.tick
+    
+    def _limpiar_obsoletos(self):
+        while self._vencimientos:
+            fin, nombre = self._vencimientos[0]
+            efecto = self.activos.get(nombre)
+            if efecto is not None and efecto[3] == fin:
+                return
+            heapq.heappop(self._vencimientos)
+    
+    def proximo_tick(self):
+        """Tick (del jugador) del próximo vencimiento o None"""
+        self._limpiar_obsoletos()
+        return self._vencimientos[0][0] if self._vencimientos else None
+    
+    def avanzar(self, ticks=1):
+        """Avanza los ticks indicados y devuelve, en orden, los efectos que han vencido"""
+        self.tick += ticks
+        vencidos = []
+        while self.proximo_tick() is not None and self._vencimientos[0][0] <= self.tick:
+            _, nombre = heapq.heappop(self._vencimientos)
+            del self.activos[nombre]
+            vencidos.append(nombre)
+        return vencidos
+    
+    def copiar(self):
+        """Copia independiente (para las instantáneas)"""
+        copia = EfectosTemporales()
+        copia.tick = self.tick
+        copia.activos = dict(self.activos)
+        copia._vencimientos = list(self._vencimientos)
+        return copia
+    
+    def to_dict(self):
+        """Convierte los efectos a un diccionario para guardarlos"""
+        return {"tick": self.tick, "activos": {nombre: list(efecto) for nombre, efecto in self.activos.items()}}
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Crea los efectos desde un diccionario"""
+        efectos = cls()
+        efectos.tick = data.get("tick", 0)
+        for nombre, efecto in data.get("activos", {}).items():
+            efectos.activos[nombre] = tuple(efecto)
+            if efecto[3] is not None:
+                efectos._vencimientos.append((efecto[3], nombre))
+        heapq.heapify(efectos._vencimientos)
+        return efectos
 
 
 class Jugador:
@@ -451,11 +1908,13 @@ class Jugador:
         self.inventario = []
         self.ubicacion_actual = None
         self.tiempo_jugado = 0
-        self.linterna_activa = False
-        self.bateria_linterna = 0
+        self.efectos = EfectosTemporales()
+        self._linterna_activa = False
+        self._bateria_linterna = 0  # Carga con la linterna apagada; encendida la lleva el efecto "linterna"
         self.puntuacion = 0
         self.nivel = 1
-        self.historia_visitada = []
+        self.recorrido = RecorridoVisitas()
+        self.version_inventario = 0  # Aumenta con cada cambio del inventario
         self.ultima_accion = None
         self.ultimo_susto = 0
         self.items_encontrados = 0
@@ -468,9 +1927,11 @@ class Jugador:
         for inv_item in self.inventario:
             if inv_item.id == item.id and inv_item.tipo == item.tipo:
                 inv_item.cantidad += 1
+                self.version_inventario += 1
                 return True
         
         self.inventario.append(item)
+        self.version_inventario += 1
         self.items_encontrados += 1
         return True
     
@@ -481,6 +1942,7 @@ class Jugador:
                 result = item.usar(self)
                 if item.usado:
                     self.inventario.pop(i)
+                    self.version_inventario += 1
                 return result
         return False
     
@@ -489,6 +1951,7 @@ class Jugador:
         for i, item in enumerate(self.inventario):
             if item.id == item_id:
                 self.inventario.pop(i)
+                self.version_inventario += 1
                 return True
         return False
     
@@ -499,18 +1962,57 @@ class Jugador:
                 return True
         return False
     
-    def mover_a(self, habitacion_id):
+    @property
+    def linterna_activa(self):
+        """Encendida, la batería se descarga 1 punto por tick (efecto temporal "linterna")"""
+        return self._linterna_activa
+    
+    @linterna_activa.setter
+    def linterna_activa(self, activa):
+        activa = bool(activa)
+        if activa == self._linterna_activa:
+            return
+        self._linterna_activa = activa
+        if activa:
+            self.efectos.iniciar("linterna", self._bateria_linterna, -1)
+        else:
+            restante = self.efectos.detener("linterna")
+            self._bateria_linterna = 0 if restante is None else restante
+    
+    @property
+    def bateria_linterna(self):
+        if self._linterna_activa:
+            return self.efectos.valor("linterna", 0)
+        return self._bateria_linterna
+    
+    @bateria_linterna.setter
+    def bateria_linterna(self, bateria):
+        if self._linterna_activa:
+            self.efectos.iniciar("linterna", bateria, -1)
+        else:
+            self._bateria_linterna = bateria
+    
+    def mover_a(self, habitacion_id, ahora=None):
         """Mueve al jugador a una nueva habitación"""
         self.ubicacion_actual = habitacion_id
-        self.historia_visitada.append(habitacion_id)
+        self.recorrido.registrar(habitacion_id, ahora if ahora is not None else time.time())
     
-    def recibir_susto(self, intensidad=10):
+    @property
+    def historia_visitada(self):
+        """Últimas habitaciones visitadas (hasta LIMITE_RECORRIDO)"""
+        return self.recorrido.ultimos()
+    
+    def recibir_susto(self, intensidad=10, ahora=None, rng=random):
         """El jugador recibe un susto que afecta su vida y cordura"""
-        daño = random.randint(intensidad//2, intensidad)
+        daño = rng.randint(intensidad//2, intensidad)
+        # El amuleto activo absorbe parte del daño (su valor es el porcentaje de protección)
+        proteccion = self.efectos.valor("amuleto", 0)
+        if proteccion:
+            daño -= daño * proteccion // 100
         self.vida -= daño // 2
         self.cordura -= daño
         self.sustos_recibidos += 1
-        self.ultimo_susto = time.time()
+        self.ultimo_susto = ahora if ahora is not None else time.time()
         
         if self.vida < 0:
             self.vida = 0
@@ -519,16 +2021,6 @@ class Jugador:
         
         return daño
     
-    def actualizar_linterna(self):
-        """Actualiza el estado de la linterna"""
-        if self.linterna_activa and self.bateria_linterna > 0:
-            self.bateria_linterna -= 1
-            if self.bateria_linterna <= 0:
-                self.linterna_activa = False
-                self.bateria_linterna = 0
-                return "Tu linterna se ha quedado sin batería"
-        return None
-    
     def to_dict(self):
         """Convierte el jugador a un diccionario para guardarlo"""
         return {
@@ -539,9 +2031,10 @@ class Jugador:
             "tiempo_jugado": self.tiempo_jugado,
             "linterna_activa": self.linterna_activa,
             "bateria_linterna": self.bateria_linterna,
+            "efectos": self.efectos.to_dict(),
             "puntuacion": self.puntuacion,
             "nivel": self.nivel,
-            "historia_visitada": self.historia_visitada,
+            "recorrido": self.recorrido.to_dict(),
             "items_encontrados": self.items_encontrados,
             "secretos_descubiertos": self.secretos_descubiertos,
             "sustos_recibidos": self.sustos_recibidos
@@ -556,57 +2049,387 @@ class Jugador:
         jugador.inventario = [Item.from_dict(item_data) for item_data in data.get("inventario", [])]
         jugador.ubicacion_actual = data.get("ubicacion_actual")
         jugador.tiempo_jugado = data.get("tiempo_jugado", 0)
-        jugador.linterna_activa = data.get("linterna_activa", False)
         jugador.bateria_linterna = data.get("bateria_linterna", 0)
+        # El efecto guardado ya lleva la descarga de la linterna si estaba encendida
+        jugador.efectos = EfectosTemporales.from_dict(data.get("efectos", {}))
+        jugador._linterna_activa = data.get("linterna_activa", False)
         jugador.puntuacion = data.get("puntuacion", 0)
         jugador.nivel = data.get("nivel", 1)
-        jugador.historia_visitada = data.get("historia_visitada", [])
+        jugador.recorrido = RecorridoVisitas.from_dict(data.get("recorrido", {}))
         jugador.items_encontrados = data.get("items_encontrados", 0)
         jugador.secretos_descubiertos = data.get("secretos_descubiertos", 0)
         jugador.sustos_recibidos = data.get("sustos_recibidos", 0)
         return jugador
+    
+    def detalles_puntuacion(self):
+        """Datos de la partida que, junto a la tabla, permiten recalcular la puntuación"""
+        return {
+            "vida": self.vida,
+            "cordura": self.cordura,
+            "secretos_descubiertos": self.secretos_descubiertos,
+            "sustos_recibidos": self.sustos_recibidos
+        }
+    
+    def estado_instantanea(self):
+        """Captura el estado del jugador (ver MotorJuego.instantanea)"""
+        atributos = dict(self.__dict__)
+        atributos["inventario"] = tuple(item.estado_instantanea() for item in self.inventario)
+        atributos["recorrido"] = self.recorrido.copiar()
+        atributos["efectos"] = self.efectos.copiar()
+        return atributos
+    
+    @classmethod
+    def desde_instantanea(cls, atributos):
+        """Recrea un jugador capturado con estado_instantanea"""
+        jugador = cls.__new__(cls)
+        jugador.__dict__.update(atributos)
+        jugador.inventario = [Item.desde_instantanea(item) for item in atributos["inventario"]]
+        # La instantánea puede restaurarse más veces
+        jugador.recorrido = atributos["recorrido"].copiar()
+        jugador.efectos = atributos["efectos"].copiar()
+        return jugador
+
+
+# Hechos del juego de los que pueden depender las condiciones de los eventos.
+# Una condición solo se vuelve a evaluar cuando cambia alguno de sus hechos.
+HECHOS_EVENTO = {
+    "habitacion": lambda motor: motor.jugador.ubicacion_actual,
+    "inventario": lambda motor: motor.jugador.version_inventario,
+    "cordura": lambda motor: motor.jugador.cordura,
+    "vida": lambda motor: motor.jugador.vida,
+    "tiempo": lambda motor: int(motor.obtener_tiempo_jugado())
+}
+
+
+def _compilar_umbral(hecho, comparacion):
+    """Crea los compiladores de condiciones del tipo 'hecho menor/mayor que valor'"""
+    leer = HECHOS_EVENTO[hecho]
+    def compilar(valor):
+        if comparacion == "menor":
+            return (lambda motor: leer(motor) < valor), {hecho}
+        return (lambda motor: leer(motor) > valor), {hecho}
+    return compilar
+
+
+def _compilar_en_habitacion(valor):
+    habitaciones = frozenset([valor] if isinstance(valor, str) else valor)
+    return (lambda motor: motor.jugador.ubicacion_actual in habitaciones), {"habitacion"}
+
+
+def _compilar_tiene_items(valor):
+    items = tuple([valor] if isinstance(valor, str) else valor)
+    return (lambda motor: all(motor.jugador.tiene_item(item_id) for item_id in items)), {"inventario"}
+
+
+def _compilar_combinacion(funcion_agregada):
+    def compilar(valor):
+        compiladas = [compilar_condicion(expresion) for expresion in valor]
+        funciones = tuple(funcion for funcion, _ in compiladas)
+        hechos = set().union(*(h for _, h in compiladas)) if compiladas else set()
+        return (lambda motor: funcion_agregada(f(motor) for f in funciones)), hechos
+    return compilar
+
+
+def _compilar_negacion(valor):
+    funcion, hechos = compilar_condicion(valor)
+    return (lambda motor: not funcion(motor)), hechos
+
+
+OPERADORES_CONDICION = {
+    "en_habitacion": _compilar_en_habitacion,
+    "tiene_item": _compilar_tiene_items,
+    "tiene_items": _compilar_tiene_items,
+    "cordura_menor": _compilar_umbral("cordura", "menor"),
+    "cordura_mayor": _compilar_umbral("cordura", "mayor"),
+    "vida_menor": _compilar_umbral("vida", "menor"),
+    "vida_mayor": _compilar_umbral("vida", "mayor"),
+    "tiempo_menor": _compilar_umbral("tiempo", "menor"),
+    "tiempo_mayor": _compilar_umbral("tiempo", "mayor"),
+    "todos": _compilar_combinacion(all),
+    "alguno": _compilar_combinacion(any),
+    "no": _compilar_negacion
+}
+
+
+def compilar_condicion(expresion):
+    """Compila una condición declarativa en una función y sus hechos de entrada
+    
+    Ejemplo: {"en_habitacion": "atico", "tiene_item": "linterna", "cordura_menor": 50}
+    Las claves de un mismo diccionario se combinan con "y".
+    Devuelve (funcion(motor) -> bool, conjunto de hechos).
+    """
+    if not isinstance(expresion, dict) or not expresion:
+        raise ValueError(f"Condición de evento no válida: {expresion!r}")
+    partes = []
+    for operador, valor in expresion.items():
+        if operador not in OPERADORES_CONDICION:
+            raise ValueError(f"Operador de condición desconocido: {operador}")
+        partes.append(OPERADORES_CONDICION[operador](valor))
+    if len(partes) == 1:
+        return partes[0][0], set(partes[0][1])
+    funciones = tuple(funcion for funcion, _ in partes)
+    hechos = set().union(*(h for _, h in partes))
+    return (lambda motor: all(f(motor) for f in funciones)), hechos
+
+
+def _accion_mensaje(valor):
+    return lambda motor: motor.agregar_mensaje(valor)
+
+
+def _accion_susto(valor):
+    def accion(motor):
+        motor.sistema_sonido.reproducir_susto()
+        motor.registrar_susto(valor)
+    return accion
+
+
+def _accion_atributo(atributo):
+    def compilar(valor):
+        def accion(motor):
+            nuevo = getattr(motor.jugador, atributo) + valor
+            setattr(motor.jugador, atributo, max(0, min(100, nuevo)))
+        return accion
+    return compilar
+
+
+def _accion_dar_item(valor):
+    return lambda motor: motor.jugador.agregar_item(Item.from_dict(valor))
+
+
+def _accion_quitar_item(valor):
+    return lambda motor: motor.jugador.eliminar_item(valor)
+
+
+def _accion_iluminar(valor):
+    def accion(motor):
+        habitacion = motor.habitaciones.get(valor) if isinstance(valor, str) else motor.obtener_habitacion_actual()
+        if habitacion:
+            habitacion.iluminada = True
+    return accion
+
+
+def _accion_desbloquear(valor):
+    def accion(motor):
+        habitacion = motor.habitaciones.get(valor)
+        if habitacion:
+            habitacion.requiere_llave = False
+    return accion
+
+
+def _accion_efecto(valor):
+    return lambda motor: motor.sistema_sonido.reproducir_efecto(valor)
+
+
+OPERADORES_ACCION = {
+    "mensaje": _accion_mensaje,
+    "susto": _accion_susto,
+    "cordura": _accion_atributo("cordura"),
+    "vida": _accion_atributo("vida"),
+    "dar_item": _accion_dar_item,
+    "quitar_item": _accion_quitar_item,
+    "iluminar": _accion_iluminar,
+    "desbloquear": _accion_desbloquear,
+    "efecto": _accion_efecto
+}
+
+
+def compilar_accion(expresion):
+    """Compila una acción declarativa (o una lista de ellas) en una sola función
+    
+    Ejemplo: [{"mensaje": "Algo cae del techo."}, {"cordura": -10}, {"efecto": "golpe"}]
+    """
+    pasos = expresion if isinstance(expresion, list) else [expresion]
+    funciones = []
+    for paso in pasos:
+        if not isinstance(paso, dict) or not paso:
+            raise ValueError(f"Acción de evento no válida: {paso!r}")
+        for operador, valor in paso.items():
+            if operador not in OPERADORES_ACCION:
+                raise ValueError(f"Operador de acción desconocido: {operador}")
+            funciones.append(OPERADORES_ACCION[operador](valor))
+    funciones = tuple(funciones)
+    
+    def accion(motor):
+        for funcion in funciones:
+            funcion(motor)
+    return accion
 
 
 class Evento:
-    """Representa un evento en el juego, como un susto, hallazgo o animación"""
+    """Representa un evento en el juego, como un susto, hallazgo o animación
+    
+    La condición y la acción pueden ser reglas declarativas (diccionarios que se
+    compilan una vez y se guardan con la partida) o funciones de Python, que
+    siguen funcionando pero no se pueden guardar.
+    """
     
     def __init__(self, tipo, mensaje, condicion=None, accion=None, probabilidad=100):
         self.tipo = tipo  # susto, descubrimiento, animacion, mensaje
         self.mensaje = mensaje
-        self.condicion = condicion  # Función que devuelve True/False si se cumple la condición
-        self.accion = accion  # Función que se ejecuta cuando se activa el evento
         self.probabilidad = probabilidad  # % de probabilidad de que ocurra
         self.activado = False
+        
+        # Reglas originales (para guardarlas) y su versión compilada
+        self.regla_condicion = None
+        self.regla_accion = None
+        self.hechos = None  # Hechos de los que depende la condición (None = desconocidos)
+        
+        if isinstance(condicion, dict):
+            self.regla_condicion = condicion
+            condicion, hechos = compilar_condicion(condicion)
+            self.hechos = tuple(sorted(hechos))
+        if isinstance(accion, (dict, list)):
+            self.regla_accion = accion
+            accion = compilar_accion(accion)
+        self.condicion = condicion  # Función que devuelve True/False si se cumple la condición
+        self.accion = accion  # Función que se ejecuta cuando se activa el evento
+    
+    @property
+    def serializable(self):
+        """Indica si el evento se puede guardar (no usa funciones de Python)"""
+        return ((self.condicion is None or self.regla_condicion is not None) and
+                (self.accion is None or self.regla_accion is not None))
+    
+    def condicion_cumplida(self, motor_juego):
+        """Evalúa la condición, reutilizando el resultado si sus hechos no han cambiado"""
+        if self.condicion is None:
+            return True
+        if self.hechos is None:
+            return self.condicion(motor_juego)
+        clave = tuple(HECHOS_EVENTO[hecho](motor_juego) for hecho in self.hechos)
+        # El resultado se guarda en el motor: los eventos de la plantilla son de todas las partidas
+        cache = motor_juego.cache_condiciones
+        anterior = cache.get(self)
+        if anterior is None or anterior[0] != clave:
+            anterior = cache[self] = (clave, self.condicion(motor_juego))
+        return anterior[1]
+    
+    def activar(self, motor_juego):
+        """Activa el evento"""
+        self.activado = True
+        
+        # Ejecutar acción si existe
+        if self.accion:
+            self.accion(motor_juego)
+            
+        return self.mensaje
+    
+    def to_dict(self):
+        """Convierte el evento a un diccionario para guardarlo"""
+        return {
+            "tipo": self.tipo,
+            "mensaje": self.mensaje,
+            "condicion": self.regla_condicion,
+            "accion": self.regla_accion,
+            "probabilidad": self.probabilidad,
+            "activado": self.activado
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Crea un evento desde un diccionario"""
+        evento = cls(
+            data["tipo"],
+            data["mensaje"],
+            condicion=data.get("condicion"),
+            accion=data.get("accion"),
+            probabilidad=data.get("probabilidad", 100)
+        )
+        evento.activado = data.get("activado", False)
+        return evento
+
+
+def muestrear_espera_geometrica(probabilidad, rng=random):
+    """Devuelve cuántos ticks faltan (>= 1) para el primer éxito de un ensayo por tick
+    
+    Equivale a tirar el dado una vez por tick hasta acertar, pero con una sola
+    muestra. Devuelve None si la probabilidad es 0 (nunca ocurre).
+    """
+    if probabilidad >= 1:
+        return 1
+    if probabilidad <= 0:
+        return None
+    u = 1.0 - rng.random()  # En (0, 1] para evitar log(0)
+    return max(1, math.ceil(math.log(u) / math.log1p(-probabilidad)))
+
+
+class PlanificadorEventos:
+    """Cola de prioridad de eventos ordenados por el tick en que deben ocurrir"""
+    
+    def __init__(self):
+        self._monticulo = []
+        self._contador = itertools.count()  # Desempate estable entre eventos del mismo tick
     
-    def verificar(self, motor_juego):
-        """Verifica si el evento debe activarse"""
-        if self.activado:
-            return False
-            
-        # Verificar probabilidad
-        if random.randint(1, 100) > self.probabilidad:
-            return False
-            
-        # Verificar condición si existe
-        if self.condicion and not self.condicion(motor_juego):
-            return False
-            
-        return True
+    def programar(self, elemento, tick):
+        """Programa un elemento para el tick indicado"""
+        heapq.heappush(self._monticulo, (tick, next(self._contador), elemento))
     
-    def activar(self, motor_juego):
-        """Activa el evento"""
-        self.activado = True
-        
-        # Ejecutar acción si existe
-        if self.accion:
-            self.accion(motor_juego)
-            
-        return self.mensaje
+    def limpiar(self):
+        """Descarta todo lo programado"""
+        self._monticulo = []
+    
+    def estado_instantanea(self):
+        """Devuelve una copia de lo programado"""
+        return tuple(self._monticulo)
+    
+    def restaurar(self, entradas, sustituciones):
+        """Restablece lo programado cambiando cada elemento por su copia en sustituciones"""
+        # Cambiar los elementos uno a uno no altera el orden del montículo
+        self._monticulo = [(tick, orden, sustituciones.get(id(elemento), elemento))
+                           for tick, orden, elemento in entradas]
+    
+    def proximo_tick(self):
+        """Devuelve el tick del siguiente elemento programado o None"""
+        return self._monticulo[0][0] if self._monticulo else None
+    
+    def extraer_vencidos(self, tick):
+        """Saca y devuelve, en orden, los elementos programados hasta el tick indicado"""
+        vencidos = []
+        while self._monticulo and self._monticulo[0][0] <= tick:
+            vencidos.append(heapq.heappop(self._monticulo)[2])
+        return vencidos
+    
+    def __len__(self):
+        return len(self._monticulo)
 
 
 class GeneradorMapa:
     """Generador del mapa y contenido del juego"""
     
+    _plantilla = None  # Mansión original compartida por todas las partidas del proceso
+    _cerrojo_plantilla = threading.Lock()
+    
+    def plantilla_mansion(self):
+        """Devuelve la mansión original, generada una sola vez y de solo lectura"""
+        with GeneradorMapa._cerrojo_plantilla:
+            if GeneradorMapa._plantilla is None:
+                plantilla = self.generar_mansion()
+                for habitacion in plantilla.values():
+                    habitacion.conexiones = MappingProxyType(habitacion.conexiones)
+                GeneradorMapa._plantilla = plantilla
+            return GeneradorMapa._plantilla
+    
+    def nueva_mansion(self):
+        """Devuelve las habitaciones de una partida nueva sobre la plantilla compartida"""
+        return MansionSesion(self.plantilla_mansion())
+    
+    def actualizar_plantilla(self, nuevas, eliminadas=()):
+        """Sustituye habitaciones de la plantilla compartida; devuelve (anterior, nueva)
+        
+        La plantilla anterior no se toca: las partidas que la usan siguen igual
+        hasta que se rebasan (ver MotorJuego.recargar_habitaciones).
+        """
+        anterior = self.plantilla_mansion()
+        plantilla = dict(anterior)
+        for hab_id in eliminadas:
+            plantilla.pop(hab_id, None)
+        for habitacion in nuevas.values():
+            habitacion.conexiones = MappingProxyType(dict(habitacion.conexiones))
+            plantilla[habitacion.id] = habitacion
+        with GeneradorMapa._cerrojo_plantilla:
+            GeneradorMapa._plantilla = plantilla
+        return anterior, plantilla
+    
     def generar_mansion(self):
         """Genera el mapa de la mansión embrujada"""
         habitaciones = {}
@@ -695,6 +2518,7 @@ class GeneradorMapa:
             }
         )
         comedor.nivel_peligro = 4
+        comedor.iluminada = True  # La luz de la luna permite ver la vela sin otra fuente de luz
         
         # Añadir vela al comedor
         vela = Item(
@@ -875,6 +2699,15 @@ class GeneradorMapa:
         )
         habitacion_nino.agregar_item(muneca)
         
+        # La llave de la habitación de invitados la guarda la muñeca
+        llave_invitados = Item(
+            "llave_invitados",
+            "Llave de Invitados",
+            "Una llave pequeña atada con un lazo rojo. Estaba escondida entre los brazos de la muñeca.",
+            "clave"
+        )
+        habitacion_nino.agregar_item(llave_invitados)
+        
         # Habitación de Invitados
         habitacion_invitados = Habitacion(
             "habitacion_invitados",
@@ -1014,17 +2847,785 @@ class GeneradorMapa:
             probabilidad=65
         )
         habitaciones["cocina"].agregar_evento(evento_cocina)
+    
+    # Desplazamientos en la cuadrícula para cada dirección y su opuesta
+    DIRECCIONES_CUADRICULA = {
+        "norte": (0, -1, "sur"),
+        "sur": (0, 1, "norte"),
+        "este": (1, 0, "oeste"),
+        "oeste": (-1, 0, "este")
+    }
+    
+    def generar_mansion_procedural(self, num_habitaciones, semilla=None):
+        """Genera una mansión aleatoria y siempre resoluble del tamaño indicado
+        
+        El recibidor es la habitación inicial y el ático (con el libro de rituales)
+        la más alejada. Cada llave se coloca en una zona accesible sin abrir
+        su propia puerta, de modo que la partida siempre se puede ganar.
+        """
+        num_habitaciones = max(2, num_habitaciones)
+        rng = random.Random(semilla)
+        
+        # Árbol aleatorio sobre una cuadrícula (crecimiento tipo Prim)
+        posiciones = {(0, 0): 0}
+        coordenadas = [(0, 0)]
+        padres = [None]
+        conexiones = [{}]
+        frontera = [((0, 0), direccion) for direccion in self.DIRECCIONES_CUADRICULA]
+        while len(coordenadas) < num_habitaciones:
+            # Extraer un elemento al azar intercambiándolo con el último (O(1))
+            elegido = rng.randrange(len(frontera))
+            frontera[elegido], frontera[-1] = frontera[-1], frontera[elegido]
+            origen, direccion = frontera.pop()
+            dx, dy, opuesta = self.DIRECCIONES_CUADRICULA[direccion]
+            destino = (origen[0] + dx, origen[1] + dy)
+            if destino in posiciones:
+                continue
+            indice = len(coordenadas)
+            indice_origen = posiciones[origen]
+            posiciones[destino] = indice
+            coordenadas.append(destino)
+            padres.append(indice_origen)
+            conexiones.append({opuesta: indice_origen})
+            conexiones[indice_origen][direccion] = indice
+            frontera.extend((destino, d) for d in self.DIRECCIONES_CUADRICULA)
+        
+        # Algunos pasillos extra para formar ciclos
+        for indice, (x, y) in enumerate(coordenadas):
+            for direccion, (dx, dy, opuesta) in self.DIRECCIONES_CUADRICULA.items():
+                vecino = posiciones.get((x + dx, y + dy))
+                if vecino is not None and direccion not in conexiones[indice] and rng.random() < 0.05:
+                    conexiones[indice][direccion] = vecino
+                    conexiones[vecino][opuesta] = indice
+        
+        # Profundidad en el árbol: el ático es la habitación más lejana
+        profundidad = [0] * num_habitaciones
+        for indice in range(1, num_habitaciones):
+            profundidad[indice] = profundidad[padres[indice]] + 1
+        indice_atico = max(range(num_habitaciones), key=lambda i: profundidad[i])
+        
+        ids = [f"sala_{indice:05d}" for indice in range(num_habitaciones)]
+        ids[0] = "recibidor"
+        ids[indice_atico] = "atico"
+        
+        habitaciones = {}
+        for indice, hab_id in enumerate(ids):
+            habitacion = Habitacion(
+                hab_id,
+                "Ático" if hab_id == "atico" else ("Recibidor de la Mansión" if indice == 0 else f"Sala {indice}"),
+                "Una estancia polvorienta de la mansión. Las sombras parecen moverse en las esquinas.",
+                conexiones={direccion: ids[destino] for direccion, destino in conexiones[indice].items()}
+            )
+            habitacion.nivel_peligro = min(10, 1 + profundidad[indice] * 10 // (profundidad[indice_atico] + 1))
+            habitacion.iluminada = indice == 0 or rng.random() < 0.2
+            habitaciones[hab_id] = habitacion
+        
+        # Puertas cerradas: las llaves se reparten de forma que siempre sean alcanzables
+        candidatas = list(range(1, num_habitaciones))
+        cerradas = rng.sample(candidatas, min(len(candidatas), max(1, num_habitaciones // 50)))
+        hijos = [[] for _ in range(num_habitaciones)]
+        for indice in range(1, num_habitaciones):
+            hijos[padres[indice]].append(indice)
+        
+        # Zona accesible desde el recibidor; crece a medida que se abren puertas
+        bloqueadas = set(cerradas)
+        accesibles = []
+        alcanzadas = set()
+        
+        def expandir(inicio):
+            """Añade a la zona accesible el subárbol de inicio sin cruzar puertas bloqueadas"""
+            pendientes = [inicio]
+            while pendientes:
+                actual = pendientes.pop()
+                accesibles.append(actual)
+                alcanzadas.add(actual)
+                pendientes.extend(h for h in hijos[actual] if h not in bloqueadas)
+        
+        expandir(0)
+        iniciales = list(accesibles)
+        for indice in cerradas:
+            habitacion = habitaciones[ids[indice]]
+            habitacion.requiere_llave = True
+            habitacion.llave_requerida = f"llave_{ids[indice]}"
+            lugar = rng.choice(accesibles)
+            habitaciones[ids[lugar]].agregar_item(Item(
+                habitacion.llave_requerida,
+                f"Llave de {habitacion.nombre}",
+                "Una llave antigua y oxidada.",
+                "clave"
+            ))
+            # Con la llave colocada, la puerta ya se puede abrir
+            bloqueadas.discard(indice)
+            if padres[indice] in alcanzadas:
+                expandir(indice)
+        
+        # Objetos necesarios: la vela aparece en una habitación iluminada accesible desde el inicio
+        iluminadas = [i for i in iniciales if habitaciones[ids[i]].iluminada]
+        habitaciones[ids[rng.choice(iluminadas)]].agregar_item(Item(
+            "vela",
+            "Vela",
+            "Una vela blanca parcialmente consumida. Podría ser útil en caso de oscuridad.",
+            "util"
+        ))
+        habitaciones[ids[rng.choice(iniciales)]].agregar_item(Item(
+            "linterna",
+            "Linterna",
+            "Una linterna vieja. Parece funcional pero necesita baterías.",
+            "util"
+        ))
+        habitaciones[ids[rng.randrange(num_habitaciones)]].agregar_item(Item(
+            "bateria",
+            "Batería",
+            "Una batería que parece tener algo de carga. Podría ser útil para la linterna.",
+            "util"
+        ))
+        habitaciones["atico"].agregar_item(Item(
+            "libro_ritual",
+            "Libro de Rituales",
+            "Un libro antiguo con tapas de cuero humano. Contiene rituales para invocar y desterrar entidades del más allá.",
+            "coleccionable",
+            propiedades={"poder": 100}
+        ))
+        
+        # Eventos de susto repartidos por las habitaciones más peligrosas
+        for habitacion in habitaciones.values():
+            if habitacion.nivel_peligro >= 5 and rng.random() < 0.3:
+                habitacion.agregar_evento(Evento(
+                    "susto",
+                    "Algo se mueve entre las sombras y un grito ahogado resuena en la habitación.",
+                    probabilidad=rng.randint(50, 90)
+                ))
+        
+        return habitaciones
+
+
+PERIODO_VIGILANCIA_CONTENIDO_MS = 500  # Cada cuánto mira la interfaz los archivos en modo vigilancia
+
+
+class VigilanteContenido:
+    """Detecta los archivos de habitaciones modificados y recompila solo esos
+    
+    Cada archivo de CONTENIDO_DIRECTORIO es una habitación completa (con sus
+    objetos y eventos) en el formato de Habitacion.to_dict. recompilar() mira
+    la fecha y el tamaño de cada archivo y vuelve a leer únicamente los que
+    han cambiado; si el contenido es el mismo que ya se compiló (un guardado
+    sin cambios) no se devuelve. Los archivos con errores se anotan en errores
+    y la habitación sigue con su última versión válida.
+    """
+    
+    def __init__(self, directorio=CONTENIDO_DIRECTORIO):
+        self.directorio = directorio
+        self.errores = {}  # {ruta: mensaje}
+        self._firmas = {}  # {ruta: (mtime_ns, tamaño)}
+        self._compiladas = {}  # {ruta: (id de la habitación, datos compilados)}
+    
+    def _archivos(self):
+        try:
+            with os.scandir(self.directorio) as entradas:
+                return {entrada.path: entrada.stat() for entrada in entradas
+                        if entrada.name.endswith(".json") and entrada.is_file()}
+        except OSError:
+            return {}
+    
+    def recompilar(self):
+        """Devuelve ({id: Habitacion} recompiladas, [ids de habitaciones eliminadas])"""
+        archivos = self._archivos()
+        nuevas = {}
+        for ruta, estado in archivos.items():
+            firma = (estado.st_mtime_ns, estado.st_size)
+            if self._firmas.get(ruta) == firma:
+                continue
+            self._firmas[ruta] = firma
+            try:
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    datos = json.load(f)
+                anterior = self._compiladas.get(ruta)
+                if anterior is not None and anterior[1] == datos:
+                    self.errores.pop(ruta, None)
+                    continue
+                habitacion = Habitacion.from_dict(datos)
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                self.errores[ruta] = str(e)
+                log_motor.warning("No se pudo recompilar %s: %s", ruta, e)
+                continue
+            self.errores.pop(ruta, None)
+            self._compiladas[ruta] = (habitacion.id, datos)
+            nuevas[habitacion.id] = habitacion
+        
+        eliminadas = []
+        for ruta in [ruta for ruta in self._firmas if ruta not in archivos]:
+            del self._firmas[ruta]
+            self.errores.pop(ruta, None)
+            compilada = self._compiladas.pop(ruta, None)
+            if compilada is not None and compilada[0] not in nuevas:
+                eliminadas.append(compilada[0])
+        return nuevas, eliminadas
+    
+    @staticmethod
+    def exportar(habitaciones, directorio=CONTENIDO_DIRECTORIO):
+        """Escribe un archivo por habitación para empezar a editar; devuelve cuántos"""
+        os.makedirs(directorio, exist_ok=True)
+        for habitacion in habitaciones.values():
+            datos = habitacion.to_dict()
+            datos["conexiones"] = dict(datos["conexiones"])
+            with open(os.path.join(directorio, f"{habitacion.id}.json"), 'w', encoding='utf-8') as f:
+                json.dump(datos, f, indent=4, ensure_ascii=False)
+        return len(habitaciones)
+
+
+class SolucionadorMansion:
+    """Busca la secuencia de acciones más corta para ganar en cualquier mapa
+    
+    La búsqueda (A* con memoización) trabaja sobre un estado abstracto: posición,
+    objetos útiles recogidos, linterna y habitaciones iluminadas por el jugador.
+    Cada paso de la búsqueda es ir a un objeto útil y recogerlo, o ir al ático y
+    hacer el ritual; las distancias entre puntos de interés se calculan con BFS
+    según las llaves que se llevan y se guardan en caché. Las acciones se
+    consideran instantáneas: no pasa tiempo de juego entre ellas.
+    
+    Si la búsqueda exacta supera LIMITE_ESTADOS (mapas enormes con muchas
+    puertas que solo sirven de atajo), se recurre a una planificación por
+    subobjetivos: la solución sigue siendo válida, pero optima pasa a False.
+    """
+    
+    OBJETO_RITUAL = "libro_ritual"
+    LIMITE_ESTADOS = 1000
+    
+    def __init__(self, habitaciones, inicio="recibidor", objetivo="atico"):
+        self.habitaciones = habitaciones
+        self.ids = list(habitaciones)
+        indices = {hab_id: i for i, hab_id in enumerate(self.ids)}
+        self.inicio = indices[inicio]
+        self.objetivo = indices[objetivo]
+        
+        # Copia compacta del mapa: la búsqueda no vuelve a tocar los objetos Habitacion
+        self.salidas = []  # [(direccion, destino)] por habitación
+        self.llave = []  # Llave necesaria para entrar (o None)
+        self.iluminada = []
+        items_por_habitacion = []
+        for hab_id in self.ids:
+            habitacion = habitaciones[hab_id]
+            self.salidas.append([(direccion, indices[destino]) for direccion, destino in habitacion.conexiones.items()
+                                 if destino in indices])
+            self.llave.append(habitacion.llave_requerida if habitacion.requiere_llave else None)
+            self.iluminada.append(habitacion.iluminada)
+            items_por_habitacion.append([item.id for item in habitacion.items])
+        self._items_por_habitacion = items_por_habitacion
+        
+        self._vecinos = [set() for _ in self.ids]  # Vecinos sin tener en cuenta la dirección
+        for indice, salidas in enumerate(self.salidas):
+            for _, destino in salidas:
+                self._vecinos[indice].add(destino)
+                self._vecinos[destino].add(indice)
+        self._analizar_puertas()
+        self.estados_explorados = 0
+        self.optima = True
+        
+        # Cota inferior admisible: distancia al ático con todas las puertas abiertas
+        self._cota = self._bfs(self.objetivo, None, inverso=True)[0]
+        
+        utiles = self._objetos_utiles()
+        # Cada objeto útil colocado en el mapa es un bit del estado
+        self.objetos = [(indice, item_id) for indice, items in enumerate(items_por_habitacion)
+                        for item_id in items if item_id in utiles]
+        self.mascara_id = {}
+        self.mascara_llaves = 0
+        llaves = {llave for llave in self.llave if llave}
+        for bit, (_, item_id) in enumerate(self.objetos):
+            self.mascara_id[item_id] = self.mascara_id.get(item_id, 0) | (1 << bit)
+            if item_id in llaves:
+                self.mascara_llaves |= 1 << bit
+        self.destinos = {indice for indice, _ in self.objetos} | {self.objetivo}
+        self._distancias = {}  # (origen, llaves) -> {punto de interés: distancia}
+        self._activas = self._habitaciones_de_paso(utiles)
+        self._aristas = self._grafo_reducido()
+    
+    def _bfs(self, origen, llaves, inverso=False):
+        """Distancias (y predecesores) desde origen; llaves=None abre todas las puertas"""
+        vecinos = self.salidas
+        if inverso:
+            vecinos = [[] for _ in self.ids]
+            for indice, salidas in enumerate(self.salidas):
+                for direccion, destino in salidas:
+                    vecinos[destino].append((direccion, indice))
+        distancia = {origen: 0}
+        previo = {}
+        cola = deque([origen])
+        while cola:
+            actual = cola.popleft()
+            siguiente = distancia[actual] + 1
+            for direccion, destino in vecinos[actual]:
+                if destino in distancia:
+                    continue
+                # Con inverso la puerta que importa es la de la habitación de la que se sale
+                cerrada = self.llave[actual if inverso else destino]
+                if llaves is not None and cerrada and cerrada not in llaves:
+                    continue
+                distancia[destino] = siguiente
+                previo[destino] = (actual, direccion)
+                cola.append(destino)
+        return distancia, previo
+    
+    def _habitaciones_de_paso(self, utiles):
+        """Habitaciones por las que puede pasar un camino mínimo entre puntos de interés
+        
+        Se descartan las puertas cuya llave no es útil y, una a una, las habitaciones
+        sin nada útil con una sola salida: un camino mínimo nunca entra en ellas.
+        """
+        especiales = self.destinos | {self.inicio}
+        activas = {indice for indice, llave in enumerate(self.llave) if not llave or llave in utiles}
+        grado = {indice: len(self._vecinos[indice] & activas) for indice in activas}
+        pendientes = [indice for indice, g in grado.items() if g <= 1 and indice not in especiales]
+        while pendientes:
+            indice = pendientes.pop()
+            if indice not in activas:
+                continue
+            activas.discard(indice)
+            for vecino in self._vecinos[indice]:
+                if vecino in activas:
+                    grado[vecino] -= 1
+                    if grado[vecino] <= 1 and vecino not in especiales:
+                        pendientes.append(vecino)
+        return activas
+    
+    def _grafo_reducido(self):
+        """Grafo entre puntos de interés y puertas cerradas, con la distancia de cada tramo
+        
+        Cada BFS se detiene en las puertas cerradas, así que solo recorre su zona
+        del mapa; después basta un Dijkstra pequeño para cada juego de llaves.
+        """
+        nodos = self.destinos | {self.inicio} | {indice for indice in self._activas if self.llave[indice]}
+        es_nodo = [indice in nodos for indice in range(len(self.ids))]
+        abierta = [not llave for llave in self.llave]
+        adyacencia = [[destino for _, destino in salidas if destino in self._activas] for salidas in self.salidas]
+        aristas = {}
+        for nodo in nodos:
+            # BFS por niveles con una lista de marcas: es el bucle más caliente del solucionador
+            visto = [False] * len(self.ids)
+            visto[nodo] = True
+            frontera = [nodo]
+            tramos = []
+            paso = 0
+            while frontera:
+                paso += 1
+                siguiente = []
+                for actual in frontera:
+                    for destino in adyacencia[actual]:
+                        if visto[destino]:
+                            continue
+                        visto[destino] = True
+                        if es_nodo[destino]:
+                            tramos.append((destino, paso))
+                        if abierta[destino]:
+                            siguiente.append(destino)
+                frontera = siguiente
+            aristas[nodo] = tramos
+        return aristas
+    
+    def _analizar_puertas(self):
+        """Calcula, para cada puerta cerrada, las zonas a las que solo se llega a través de ella"""
+        vecinos = self._vecinos
+        
+        # DFS iterativo desde el inicio: orden de descubrimiento, tamaño del subárbol y low-link
+        orden = {self.inicio: 0}
+        padre = {self.inicio: None}
+        bajo = {}
+        tamano = {}
+        hijos = {}
+        pila = [(self.inicio, iter(vecinos[self.inicio]))]
+        while pila:
+            actual, pendientes = pila[-1]
+            for vecino in pendientes:
+                if vecino not in orden:
+                    orden[vecino] = len(orden)
+                    padre[vecino] = actual
+                    hijos.setdefault(actual, []).append(vecino)
+                    pila.append((vecino, iter(vecinos[vecino])))
+                    break
+            else:
+                pila.pop()
+                bajo[actual] = min([orden[actual]] + [bajo[h] for h in hijos.get(actual, [])] +
+                                   [orden[v] for v in vecinos[actual] if v in orden and v != padre[actual]])
+                tamano[actual] = 1 + sum(tamano[h] for h in hijos.get(actual, []))
+        
+        # Para cada puerta cerrada: subárboles que solo se alcanzan a través de ella
+        # y si además comunica dos partes del mapa (una puerta que sirve de atajo)
+        self._orden_dfs = orden
+        self._zonas_tras_puerta = {}
+        self._atajos = set()
+        for indice, llave in enumerate(self.llave):
+            if not llave or indice not in orden or indice == self.inicio:
+                continue
+            aislados = [h for h in hijos.get(indice, []) if bajo[h] >= orden[indice]]
+            conectados = [h for h in hijos.get(indice, []) if bajo[h] < orden[indice]]
+            hacia_fuera = sum(1 for v in vecinos[indice] if orden.get(v, len(orden)) < orden[indice])
+            self._zonas_tras_puerta[indice] = [(orden[h], orden[h] + tamano[h]) for h in aislados]
+            if hacia_fuera + len(conectados) > 1:
+                self._atajos.add(indice)
+    
+    def _objetos_utiles(self):
+        """Objetos que pueden formar parte de una solución mínima
+        
+        Una llave es útil si tras su puerta hay algo útil o si la puerta comunica
+        dos partes del mapa y puede acortar el camino. Sobra si su puerta solo
+        da a un callejón sin salida en el que no hay nada útil.
+        """
+        orden = self._orden_dfs
+        items_por_habitacion = self._items_por_habitacion
+        
+        def tras_puerta(puerta, habitacion):
+            if habitacion == puerta:
+                return True
+            posicion = orden.get(habitacion, -1)
+            return any(inicio <= posicion < fin for inicio, fin in self._zonas_tras_puerta[puerta])
+        
+        utiles = {self.OBJETO_RITUAL}
+        while True:
+            lugares = {indice for indice, items in enumerate(items_por_habitacion) if utiles.intersection(items)}
+            nuevos = set(utiles)
+            # Las fuentes de luz solo importan si algo útil está a oscuras
+            if any(not self.iluminada[lugar] for lugar in lugares):
+                nuevos.update(("vela", "linterna", "bateria"))
+            lugares.add(self.objetivo)
+            for indice in self._zonas_tras_puerta:
+                if indice in self._atajos or any(tras_puerta(indice, lugar) for lugar in lugares):
+                    nuevos.add(self.llave[indice])
+            if nuevos == utiles:
+                return utiles
+            utiles = nuevos
+    
+    def _distancias_desde(self, origen, mascara):
+        """Distancias desde origen a los puntos de interés con las llaves de la máscara"""
+        clave = (origen, mascara & self.mascara_llaves)
+        distancias = self._distancias.get(clave)
+        if distancias is None:
+            llaves = self._llaves(mascara)
+            todas = {origen: 0}
+            pendientes = [(0, origen)]
+            while pendientes:
+                distancia, actual = heapq.heappop(pendientes)
+                if distancia > todas[actual]:
+                    continue
+                for destino, tramo in self._aristas[actual]:
+                    cerrada = self.llave[destino]
+                    if cerrada and cerrada not in llaves:
+                        continue
+                    if distancia + tramo < todas.get(destino, distancia + tramo + 1):
+                        todas[destino] = distancia + tramo
+                        heapq.heappush(pendientes, (distancia + tramo, destino))
+            distancias = self._distancias[clave] = {d: todas[d] for d in self.destinos if d in todas}
+        return distancias
+    
+    def _tiene(self, mascara, item_id):
+        return bool(mascara & self.mascara_id.get(item_id, 0))
+    
+    def _formas_de_iluminar(self, mascara, cargada):
+        """Acciones posibles para ver en una habitación oscura: (acciones, cargada, linterna)"""
+        formas = []
+        if self._tiene(mascara, "vela"):
+            formas.append(((("usar", "vela"),), cargada, False))
+        if self._tiene(mascara, "linterna"):
+            if cargada:
+                formas.append(((("usar", "linterna"),), True, True))
+            elif self._tiene(mascara, "bateria"):
+                formas.append(((("usar", "bateria"), ("usar", "linterna")), True, True))
+        return formas
+    
+    def resolver(self):
+        """Devuelve la lista de acciones más corta para ganar, o None si no hay solución
+        
+        Cada acción es ("mover", direccion), ("recoger", item_id) o ("usar", item_id).
+        """
+        self.optima = True
+        acciones = self._buscar(self.LIMITE_ESTADOS)
+        if acciones is self.LIMITE_ESTADOS:
+            # Demasiadas combinaciones de llaves: se sacrifica la optimalidad por tiempo
+            self.optima = False
+            acciones = self._buscar_por_subobjetivos()
+        return acciones
+    
+    def _sucesores(self, estado):
+        """Pasos posibles desde un estado: [(estado siguiente, coste, acciones)]"""
+        posicion, mascara, cargada, linterna, iluminadas = estado
+        distancias = self._distancias_desde(posicion, mascara)
+        
+        sucesores = []
+        if self._tiene(mascara, self.OBJETO_RITUAL) and self.objetivo in distancias:
+            sucesores.append(("fin", distancias[self.objetivo] + 1, (("usar", self.OBJETO_RITUAL),)))
+        for bit, (lugar, item_id) in enumerate(self.objetos):
+            if lugar not in distancias or self._tiene(mascara, item_id):
+                continue
+            nueva_mascara = mascara | (1 << bit)
+            if linterna or self.iluminada[lugar] or lugar in iluminadas:
+                formas = [((), cargada, linterna)]
+            else:
+                formas = self._formas_de_iluminar(mascara, cargada)
+            for luz, nueva_cargada, nueva_linterna in formas:
+                nuevas_iluminadas = iluminadas
+                if luz and not nueva_linterna:
+                    nuevas_iluminadas = iluminadas | {lugar}
+                siguiente = (lugar, nueva_mascara, nueva_cargada, nueva_linterna, nuevas_iluminadas)
+                sucesores.append((siguiente, distancias[lugar] + len(luz) + 1, luz + (("recoger", item_id),)))
+        return sucesores
+    
+    def _estado_inicial(self):
+        # Estado: (posición, objetos recogidos, batería puesta, linterna encendida, habitaciones iluminadas)
+        return (self.inicio, 0, False, False, frozenset())
+    
+    def _buscar(self, limite):
+        """A* sobre el estado abstracto; devuelve LIMITE_ESTADOS si se agota el límite"""
+        inicial = self._estado_inicial()
+        if self.inicio not in self._cota:
+            return None
+        mejor = {inicial: 0}
+        previo = {inicial: None}
+        desempate = itertools.count()
+        abiertos = [(self._cota[self.inicio] + 2, next(desempate), 0, inicial)]
+        self.estados_explorados = 0
+        while abiertos:
+            _, _, coste, estado = heapq.heappop(abiertos)
+            if estado == "fin":
+                return self._reconstruir(previo)
+            if coste > mejor.get(estado, coste):
+                continue
+            self.estados_explorados += 1
+            if self.estados_explorados > limite:
+                return self.LIMITE_ESTADOS
+            
+            for siguiente, paso, acciones in self._sucesores(estado):
+                nuevo_coste = coste + paso
+                if nuevo_coste >= mejor.get(siguiente, nuevo_coste + 1):
+                    continue
+                mejor[siguiente] = nuevo_coste
+                previo[siguiente] = (estado, acciones)
+                if siguiente == "fin":
+                    estimacion = nuevo_coste
+                else:
+                    faltan = 1 if self._tiene(siguiente[1], self.OBJETO_RITUAL) else 2
+                    estimacion = nuevo_coste + self._cota.get(siguiente[0], 0) + faltan
+                heapq.heappush(abiertos, (estimacion, next(desempate), nuevo_coste, siguiente))
+        return None
+    
+    def _buscar_por_subobjetivos(self):
+        """Último recurso para mapas enormes: resuelve dependencias como lo haría un jugador
+        
+        Se dirige al libro y después al ático. Si el camino cruza una puerta sin
+        llave, la llave pasa a ser el objetivo (y así sucesivamente); si el objeto
+        está a oscuras y no hay luz a mano, lo es una fuente de luz. Cada vuelta
+        recoge un objeto, así que termina, aunque sin garantizar el mínimo.
+        """
+        posicion = self.inicio
+        mascara = 0
+        cargada = linterna = False
+        iluminadas = set()
+        acciones = []
+        while True:
+            self.estados_explorados += 1
+            llaves = self._llaves(mascara)
+            meta = None
+            if not self._tiene(mascara, self.OBJETO_RITUAL):
+                meta = self._buscar_objeto(self.OBJETO_RITUAL, mascara)
+                if meta is None:
+                    return None
+            intentadas = set()
+            while True:
+                lugar = self.objetivo if meta is None else self.objetos[meta][0]
+                if meta in intentadas:
+                    return None  # Dependencias circulares: el mapa no tiene solución
+                intentadas.add(meta)
+                puerta = self._primera_puerta_sin_llave(posicion, lugar, llaves)
+                if puerta is False:
+                    return None
+                if puerta is not None:
+                    meta = self._buscar_objeto(self.llave[puerta], mascara)
+                elif meta is not None and not (linterna or self.iluminada[lugar] or lugar in iluminadas) \
+                        and not self._formas_de_iluminar(mascara, cargada):
+                    meta = self._buscar_fuente_de_luz(mascara)
+                else:
+                    break
+                if meta is None:
+                    return None
+            
+            acciones.extend(self._movimientos(posicion, lugar, llaves))
+            posicion = lugar
+            if meta is None:
+                acciones.append(("usar", self.OBJETO_RITUAL))
+                return acciones
+            if not (linterna or self.iluminada[lugar] or lugar in iluminadas):
+                luz, cargada, linterna = self._formas_de_iluminar(mascara, cargada)[0]
+                acciones.extend(luz)
+                if not linterna:
+                    iluminadas.add(lugar)
+            acciones.append(("recoger", self.objetos[meta][1]))
+            mascara |= 1 << meta
+    
+    def _llaves(self, mascara):
+        return {item_id for bit, (_, item_id) in enumerate(self.objetos) if (mascara & self.mascara_llaves) >> bit & 1}
+    
+    def _buscar_objeto(self, item_id, mascara):
+        """Bit de un ejemplar todavía no recogido del objeto (o None)"""
+        for bit, (_, otro_id) in enumerate(self.objetos):
+            if otro_id == item_id and not mascara >> bit & 1:
+                return bit
+        return None
+    
+    def _buscar_fuente_de_luz(self, mascara):
+        """Siguiente objeto a buscar para tener luz: vela, o linterna y batería"""
+        for item_id in ("vela", "linterna", "bateria"):
+            if not self._tiene(mascara, item_id):
+                bit = self._buscar_objeto(item_id, mascara)
+                if bit is not None:
+                    return bit
+        return None
+    
+    def _primera_puerta_sin_llave(self, origen, destino, llaves):
+        """Primera puerta sin llave del camino que menos puertas así cruza (None si no hay, False si no se llega)"""
+        coste = {origen: (0, 0)}
+        previo = {}
+        pendientes = [(0, 0, origen)]
+        while pendientes:
+            faltan, pasos, actual = heapq.heappop(pendientes)
+            if actual == destino:
+                break
+            if (faltan, pasos) > coste[actual]:
+                continue
+            for _, vecino in self.salidas[actual]:
+                if vecino not in self._activas:
+                    continue
+                cerrada = self.llave[vecino]
+                nuevo = (faltan + (1 if cerrada and cerrada not in llaves else 0), pasos + 1)
+                if nuevo < coste.get(vecino, (len(self.ids) + 1, 0)):
+                    coste[vecino] = nuevo
+                    previo[vecino] = actual
+                    heapq.heappush(pendientes, nuevo + (vecino,))
+        if destino not in coste:
+            return False
+        puerta = None
+        habitacion = destino
+        while habitacion != origen:
+            cerrada = self.llave[habitacion]
+            if cerrada and cerrada not in llaves:
+                puerta = habitacion  # Al recorrer hacia atrás, la última encontrada es la primera del camino
+            habitacion = previo[habitacion]
+        return puerta
+    
+    def _movimientos(self, origen, destino, llaves):
+        """Acciones de movimiento del camino más corto entre dos habitaciones"""
+        _, camino = self._bfs(origen, llaves)
+        movimientos = []
+        while destino != origen:
+            destino, direccion = camino[destino]
+            movimientos.append(("mover", direccion))
+        movimientos.reverse()
+        return movimientos
+    
+    def _reconstruir(self, previo):
+        """Convierte la cadena de estados en acciones, con los movimientos entre medias"""
+        pasos = []
+        estado = "fin"
+        while previo[estado] is not None:
+            anterior, acciones = previo[estado]
+            pasos.append((anterior, estado, acciones))
+            estado = anterior
+        
+        resultado = []
+        for anterior, estado, acciones in reversed(pasos):
+            origen, mascara = anterior[0], anterior[1]
+            destino = self.objetivo if estado == "fin" else estado[0]
+            resultado.extend(self._movimientos(origen, destino, self._llaves(mascara)))
+            resultado.extend(acciones)
+        return resultado
+    
+    def validar(self, acciones, configuracion=None):
+        """Ejecuta las acciones con las reglas reales del motor sobre una copia del mapa"""
+        motor = MotorJuego(
+            configuracion or Configuracion(),
+            reloj=RelojJuego(simulado=True, inicio=0.0),
+            gestor_guardado=GestorGuardado(cargar=False),
+            sistema_puntuacion=SistemaPuntuacion(cargar=False)
+        )
+        motor.habitaciones = copy.deepcopy(self.habitaciones)
+        motor.tiempo_inicio = motor.reloj.ahora()
+        motor.jugador.mover_a(self.ids[self.inicio])
+        operaciones = {"mover": motor.mover_jugador, "recoger": motor.recoger_item, "usar": motor.usar_item}
+        for accion, argumento in acciones:
+            if motor.juego_terminado or not operaciones[accion](argumento):
+                return False
+        return motor.juego_terminado and motor.jugador.ubicacion_actual == self.ids[self.objetivo]
+
+
+class CapturaListas:
+    """Capturas sin copia de listas a las que solo se añaden elementos (la historia de mensajes)
+    
+    Una captura es (lista, longitud). Al restaurar se recorta y reutiliza la lista
+    viva si ninguna captura llega más allá de esa longitud; si no, se copia el
+    prefijo. Así tomar una instantánea no cuesta más en una partida larga.
+    """
+    
+    def __init__(self):
+        self._vivas = {}  # {nombre: [lista viva, mayor longitud capturada]}
+    
+    def capturar(self, nombre, lista):
+        registro = self._vivas.get(nombre)
+        if registro is None or registro[0] is not lista:
+            registro = self._vivas[nombre] = [lista, 0]
+        registro[1] = max(registro[1], len(lista))
+        return (lista, len(lista))
+    
+    def recuperar(self, nombre, captura):
+        lista, longitud = captura
+        registro = self._vivas.get(nombre)
+        if registro is not None and registro[0] is lista and registro[1] <= longitud:
+            # Lo añadido después de la captura no pertenece a ninguna otra instantánea
+            del lista[longitud:]
+            return lista
+        return lista[:longitud]
+
+
+class InstantaneaPartida:
+    """Estado completo de una partida en memoria, creado por MotorJuego.instantanea()
+    
+    Comparte con la partida todo lo que no cambia (textos, conexiones, definiciones
+    de items, plantilla de la mansión) y solo copia el estado mutable. Se puede
+    restaurar tantas veces como se quiera.
+    """
+    
+    __slots__ = ("jugador", "plantilla", "habitaciones", "motor", "reloj", "ahora",
+                 "planificacion", "aleatorio", "historia")
+    
+    def __init__(self, jugador, plantilla, habitaciones, motor, reloj, ahora, planificacion, aleatorio, historia):
+        self.jugador = jugador  # Atributos del jugador (Jugador.estado_instantanea)
+        self.plantilla = plantilla  # Plantilla compartida o None si el mapa es un diccionario propio
+        self.habitaciones = habitaciones  # {id: Habitacion.estado_instantanea()}
+        self.motor = motor  # Atributos simples del motor
+        self.reloj = reloj  # Atributos del RelojJuego
+        self.ahora = ahora  # Instante del reloj al capturar
+        self.planificacion = planificacion  # Entradas del planificador de eventos
+        self.aleatorio = aleatorio  # Estado del generador aleatorio del motor
+        self.historia = historia  # Captura de la historia de mensajes (CapturaListas)
 
 
 class MotorJuego:
     """Motor principal del juego que maneja la lógica"""
     
-    def __init__(self, configuracion):
+    def __init__(self, configuracion, carga_diferida=False, reloj=None, gestor_guardado=None, sistema_puntuacion=None,
+                 semilla=None):
         self.configuracion = configuracion
+        self.reloj = reloj or RelojJuego()  # Todos los tiempos de juego salen de este reloj
+        # Generador propio: restaurar una partida no altera el azar de las demás del mismo proceso.
+        # Sin semilla se toma una del generador global, así random.seed() sigue haciendo reproducible la partida.
+        self.aleatorio = random.Random(random.getrandbits(64) if semilla is None else semilla)
         self.jugador = Jugador()
-        self.sistema_sonido = SistemaSonido(configuracion)
-        self.gestor_guardado = GestorGuardado()
-        self.sistema_puntuacion = SistemaPuntuacion()
+        self.sistema_sonido = SistemaSonido(configuracion, self.reloj)
+        # Con carga diferida, partidas y puntuaciones se leen en segundo plano.
+        # Un servidor puede pasar un gestor y un sistema de puntuación compartidos ya cargados.
+        compartidos = gestor_guardado is not None and sistema_puntuacion is not None
+        self.gestor_guardado = gestor_guardado or GestorGuardado(cargar=not carga_diferida)
+        self.sistema_puntuacion = sistema_puntuacion or SistemaPuntuacion(cargar=not carga_diferida)
+        self._persistencia_lista = threading.Event()
+        self._hilo_persistencia = None
+        if compartidos or not carga_diferida:
+            self._persistencia_lista.set()
         self.generador_mapa = GeneradorMapa()
         self.habitaciones = {}
         self.tiempo_inicio = None
@@ -1036,12 +3637,35 @@ class MotorJuego:
         self.modo_oscuridad = True
         self.timer_actualizacion = None
         self.ui = None  # Referencia a la interfaz
+        self.perfilador = Perfilador(configuracion.perfilador_activo)
+        self._capturas = CapturaListas()
+        
+        # Planificación de eventos: cada evento pendiente tiene su tick de disparo muestreado
+        self.tick = 0
+        self.planificador = PlanificadorEventos()
+        self._firma_planificacion = None
+        self._replanificar_cada_tick = False
+        self._proximo_susto_tick = None
+        self.cache_condiciones = {}  # {evento: (hechos, resultado)} de la última evaluación de su condición
+        self._tick_ultimo_susto = None  # En ticks, no en tiempo de reloj: no depende de cuándo se replanifica
+        
+        # Telemetría: identificador de la partida (sin gastar números del generador del juego)
+        self.id_telemetria = None
+        self._entrada_habitacion = None  # Instante del reloj en que se entró a la habitación actual
+        
+        # Qué hacer cuando vence cada efecto temporal del jugador (ver EfectosTemporales)
+        self._al_vencer_efecto = {
+            "linterna": self._linterna_agotada,
+            "vela": self._vela_consumida,
+            "amuleto": self._amuleto_agotado,
+            "regeneracion_cordura": self._regenerar_cordura
+        }
     
     def iniciar_nuevo_juego(self):
         """Inicia un nuevo juego"""
         self.jugador = Jugador()
-        self.habitaciones = self.generador_mapa.generar_mansion()
-        self.tiempo_inicio = time.time()
+        self.habitaciones = self.generador_mapa.nueva_mansion()
+        self.tiempo_inicio = self.reloj.ahora()
         self.tiempo_pausa = 0
         self.juego_pausado = False
         self.juego_terminado = False
@@ -1049,7 +3673,10 @@ class MotorJuego:
         self.historia = [self.mensaje_actual]
         
         # Colocar al jugador en el recibidor
-        self.jugador.mover_a("recibidor")
+        self.jugador.mover_a("recibidor", self.tiempo_inicio)
+        self._tick_ultimo_susto = None
+        self.invalidar_planificacion()
+        self._iniciar_telemetria("inicio", dificultad=self.configuracion.dificultad)
         
         # Comenzar música de fondo
         self.sistema_sonido.reproducir_musica("ambiente_mansion")
@@ -1059,10 +3686,37 @@ class MotorJuego:
         
         return True
     
+    def cargar_persistencia_en_segundo_plano(self):
+        """Carga las partidas y puntuaciones guardadas en un hilo aparte"""
+        if self._persistencia_lista.is_set() or self._hilo_persistencia:
+            return
+            
+        def cargar():
+            try:
+                with self.perfilador.medir("carga_persistencia"):
+                    self.gestor_guardado.cargar_partidas()
+                    self.sistema_puntuacion.cargar_puntuaciones()
+            finally:
+                self._persistencia_lista.set()
+                
+        self._hilo_persistencia = threading.Thread(target=cargar, daemon=True)
+        self._hilo_persistencia.start()
+    
+    def esperar_persistencia(self):
+        """Espera a que las partidas y puntuaciones estén cargadas"""
+        if not self._persistencia_lista.is_set():
+            self.cargar_persistencia_en_segundo_plano()
+            self._persistencia_lista.wait()
+    
+    @perfilado("cargar_partida")
     def cargar_partida(self, slot):
         """Carga una partida guardada"""
+        self.esperar_persistencia()
         for partida in self.gestor_guardado.partidas_guardadas:
             if partida.get("slot") == slot:
+                # La partida en juego no debe compartir listas ni diccionarios con el registro guardado:
+                # los from_dict copian lo que conservan, así que no hace falta copiar el registro entero
+                
                 # Cargar habitaciones
                 self.habitaciones = {}
                 for hab_id, hab_data in partida.get("habitaciones", {}).items():
@@ -1070,16 +3724,19 @@ class MotorJuego:
                 
                 # Cargar jugador
                 self.jugador = Jugador.from_dict(partida.get("jugador", {}))
+                self._tick_ultimo_susto = None
+                self.invalidar_planificacion()
                 
                 # Cargar tiempos y estado
-                self.tiempo_inicio = time.time() - partida.get("tiempo_jugado", 0)
+                self.tiempo_inicio = self.reloj.ahora() - partida.get("tiempo_jugado", 0)
                 self.tiempo_pausa = 0
                 self.juego_pausado = False
                 self.juego_terminado = False
+                self._iniciar_telemetria("carga", slot=slot, dificultad=self.configuracion.dificultad)
                 
                 # Cargar mensajes
                 self.mensaje_actual = "Partida cargada. " + partida.get("ultimo_mensaje", "")
-                self.historia = partida.get("historia", [self.mensaje_actual])
+                self.historia = list(partida.get("historia", [self.mensaje_actual]))
                 
                 # Comenzar música de fondo
                 self.sistema_sonido.reproducir_musica("ambiente_mansion")
@@ -1091,12 +3748,19 @@ class MotorJuego:
                 
         return False
     
+    @perfilado("guardar_partida")
     def guardar_partida(self, slot, nombre=""):
         """Guarda la partida actual"""
+        self.esperar_persistencia()
+        self._telemetria("guardado", slot=slot)
+        return self.gestor_guardado.guardar_partida(self.datos_partida(slot, nombre))
+    
+    def datos_partida(self, slot, nombre=""):
+        """Devuelve el estado de la partida listo para guardarse"""
         if not nombre:
             nombre = f"Partida {slot} - {time.strftime('%d/%m/%Y %H:%M')}"
             
-        datos_partida = {
+        return {
             "slot": slot,
             "nombre": nombre,
             "jugador": self.jugador.to_dict(),
@@ -1106,24 +3770,84 @@ class MotorJuego:
             "historia": self.historia[-20:],  # Guardar solo los últimos 20 mensajes
             "dificultad": self.configuracion.dificultad
         }
+    
+    # Atributos del motor que se copian tal cual en las instantáneas
+    ATRIBUTOS_INSTANTANEA = ("tiempo_inicio", "tiempo_pausa", "juego_pausado", "juego_terminado",
+                             "mensaje_actual", "modo_oscuridad", "tick", "_firma_planificacion",
+                             "_replanificar_cada_tick", "_proximo_susto_tick", "_tick_ultimo_susto")
+    
+    def instantanea(self):
+        """Captura el estado completo de la partida en memoria, sin pasar por JSON
+        
+        Sirve para guardados rápidos, deshacer, puntos de control y bots que
+        exploran jugadas. Incluye el estado del generador aleatorio del motor.
+        """
+        if isinstance(self.habitaciones, MansionSesion):
+            plantilla = self.habitaciones.plantilla
+            habitaciones = self.habitaciones.vistas
+        else:
+            plantilla = None
+            habitaciones = self.habitaciones
+        return InstantaneaPartida(
+            self.jugador.estado_instantanea(),
+            plantilla,
+            {hab_id: habitacion.estado_instantanea() for hab_id, habitacion in habitaciones.items()},
+            tuple(getattr(self, atributo) for atributo in self.ATRIBUTOS_INSTANTANEA),
+            dict(self.reloj.__dict__),
+            self.reloj.ahora(),
+            self.planificador.estado_instantanea(),
+            self.aleatorio.getstate(),
+            self._capturas.capturar("historia", self.historia)
+        )
+    
+    def restaurar(self, instantanea):
+        """Vuelve al estado capturado con instantanea()"""
+        eventos_restaurados = {}
+        habitaciones = {hab_id: Habitacion.desde_instantanea(estado, eventos_restaurados)
+                        for hab_id, estado in instantanea.habitaciones.items()}
+        if instantanea.plantilla is not None:
+            self.habitaciones = MansionSesion(instantanea.plantilla)
+            self.habitaciones.vistas = habitaciones
+        else:
+            self.habitaciones = habitaciones
+        
+        self.jugador = Jugador.desde_instantanea(instantanea.jugador)
+        for atributo, valor in zip(self.ATRIBUTOS_INSTANTANEA, instantanea.motor):
+            setattr(self, atributo, valor)
+        self.historia = self._capturas.recuperar("historia", instantanea.historia)
+        self.planificador.restaurar(instantanea.planificacion, eventos_restaurados)
+        # Los resultados guardados pueden ser de un inventario posterior con la misma versión
+        self.cache_condiciones = {}
+        self.aleatorio.setstate(instantanea.aleatorio)
+        
+        if self.reloj.simulado:
+            self.reloj.__dict__.update(instantanea.reloj)
+        elif self.tiempo_inicio is not None:
+            # Con reloj real se conserva el tiempo jugado: se desplazan las marcas de tiempo
+            desfase = self.reloj.ahora() - instantanea.ahora
+            self.tiempo_inicio += desfase
+            if self.jugador.ultimo_susto:
+                self.jugador.ultimo_susto += desfase
         
-        return self.gestor_guardado.guardar_partida(datos_partida)
+        if self.ui:
+            self.ui.actualizar_interfaz()
     
     def obtener_tiempo_jugado(self):
         """Devuelve el tiempo jugado en segundos"""
-        if not self.tiempo_inicio:
+        if self.tiempo_inicio is None:
             return 0
             
         if self.juego_pausado:
             return self.tiempo_pausa
             
-        return time.time() - self.tiempo_inicio + self.tiempo_pausa
+        # Al reanudar, tiempo_inicio ya descuenta el tiempo en pausa
+        return self.reloj.ahora() - self.tiempo_inicio
     
     def pausar_juego(self):
         """Pausa el juego"""
         if not self.juego_pausado and not self.juego_terminado:
             self.juego_pausado = True
-            self.tiempo_pausa = time.time() - self.tiempo_inicio
+            self.tiempo_pausa = self.reloj.ahora() - self.tiempo_inicio
             
             # Pausar temporizador
             if self.timer_actualizacion:
@@ -1137,7 +3861,7 @@ class MotorJuego:
         """Reanuda el juego pausado"""
         if self.juego_pausado and not self.juego_terminado:
             self.juego_pausado = False
-            self.tiempo_inicio = time.time() - self.tiempo_pausa
+            self.tiempo_inicio = self.reloj.ahora() - self.tiempo_pausa
             
             # Reanudar música
             self.sistema_sonido.reproducir_musica("ambiente_mansion")
@@ -1163,6 +3887,8 @@ class MotorJuego:
         # Calcular puntuación final
         puntuacion = self._calcular_puntuacion(victoria)
         self.jugador.puntuacion = puntuacion
+        self._telemetria("fin", victoria=victoria, puntuacion=puntuacion, tiempo=round(tiempo_total, 1),
+                         sustos=self.jugador.sustos_recibidos)
         
         # Música final
         self.sistema_sonido.detener_todos_sonidos()
@@ -1208,103 +3934,197 @@ class MotorJuego:
     
     def _calcular_puntuacion(self, victoria):
         """Calcula la puntuación final"""
-        puntuacion_base = 1000 if victoria else 500
-        
-        # Bonificación por tiempo (menos tiempo es mejor)
-        tiempo_max = 3600  # 1 hora
-        tiempo_actual = min(self.jugador.tiempo_jugado, tiempo_max)
-        bonus_tiempo = int((1 - tiempo_actual / tiempo_max) * 500)
-        
-        # Bonificación por vida y cordura
-        bonus_vida = int(self.jugador.vida * 2)
-        bonus_cordura = int(self.jugador.cordura * 2)
-        
-        # Bonificación por objetos y secretos
-        bonus_objetos = self.jugador.items_encontrados * 50
-        bonus_secretos = self.jugador.secretos_descubiertos * 100
-        
-        # Penalización por sustos
-        penalizacion_sustos = self.jugador.sustos_recibidos * 25
-        
-        # Modificador de dificultad
-        mod_dificultad = {
-            "Fácil": 0.8,
-            "Normal": 1.0,
-            "Difícil": 1.2,
-            "Pesadilla": 1.5
-        }.get(self.configuracion.dificultad, 1.0)
-        
-        # Puntuación final
-        puntuacion = int((puntuacion_base + bonus_tiempo + bonus_vida + bonus_cordura + 
-                         bonus_objetos + bonus_secretos - penalizacion_sustos) * mod_dificultad)
-        
-        return max(puntuacion, 0)  # Asegurar que no sea negativa
+        jugador = self.jugador
+        return calcular_puntuacion(victoria, jugador.tiempo_jugado, jugador.vida, jugador.cordura,
+                                   jugador.items_encontrados, jugador.secretos_descubiertos,
+                                   jugador.sustos_recibidos, self.configuracion.dificultad)
     
     def _iniciar_temporizador(self):
         """Inicia el temporizador de actualización del juego"""
         if self.timer_actualizacion:
             self.timer_actualizacion.cancel()
             
-        self.timer_actualizacion = threading.Timer(1.0, self._actualizar_juego)
+        if self.reloj.simulado:
+            return  # Con reloj simulado los ticks los da simular()
+        self.timer_actualizacion = threading.Timer(self.reloj.intervalo_real(1.0), self._actualizar_juego)
         self.timer_actualizacion.daemon = True
         self.timer_actualizacion.start()
     
-    def _actualizar_juego(self):
+    def _actualizar_juego(self, programar=True):
         """Actualiza el estado del juego cada segundo"""
         if self.juego_pausado or self.juego_terminado:
             return
+        
+        # Los cambios desde el tick anterior se planifican antes de avanzar el reloj
+        self._actualizar_planificacion()
+        self.tick += 1
+        medir = self.perfilador.medir
+        with medir("tick"):
+            # Efectos temporales: solo cuesta algo el tick en que vence alguno
+            with medir("efectos"):
+                for efecto in self.jugador.efectos.avanzar():
+                    self._al_vencer_efecto[efecto]()
+                
+            # Comprobar eventos aleatorios
+            with medir("comprobar_eventos"):
+                self._comprobar_eventos()
             
-        # Actualizar estado de la linterna
-        mensaje_linterna = self.jugador.actualizar_linterna()
-        if mensaje_linterna:
-            self.agregar_mensaje(mensaje_linterna)
+            # Posibilidad de susto aleatorio
+            with medir("susto_aleatorio"):
+                self._susto_aleatorio()
             
-        # Comprobar eventos aleatorios
-        self._comprobar_eventos()
-        
-        # Posibilidad de susto aleatorio
-        self._susto_aleatorio()
-        
-        # Actualizar interfaz
-        if self.ui:
-            self.ui.actualizar_interfaz()
+            # Actualizar interfaz
+            if self.ui:
+                with medir("interfaz"):
+                    self.ui.actualizar_interfaz()
             
         # Programar siguiente actualización
-        self._iniciar_temporizador()
+        if programar:
+            self._iniciar_temporizador()
     
-    def _comprobar_eventos(self):
-        """Comprueba si debe ocurrir algún evento en la habitación actual"""
+    def invalidar_planificacion(self):
+        """Obliga a volver a muestrear los eventos y evaluar sus condiciones en la próxima comprobación"""
+        self._firma_planificacion = None
+        self.cache_condiciones = {}
+    
+    def _firma_entradas_planificacion(self):
+        """Datos de los que dependen las probabilidades de los eventos"""
+        jugador = self.jugador
+        return (jugador.ubicacion_actual, jugador.cordura, jugador.vida, jugador.version_inventario,
+                jugador.sustos_recibidos, self.configuracion.dificultad)
+    
+    def _actualizar_planificacion(self):
+        """Vuelve a muestrear los eventos solo si han cambiado sus datos de entrada"""
+        firma = self._firma_entradas_planificacion()
+        if firma != self._firma_planificacion or self._replanificar_cada_tick:
+            self._firma_planificacion = firma
+            self._replanificar()
+    
+    def _replanificar(self):
+        """Muestrea el tick de disparo de cada evento pendiente de la habitación actual"""
+        self.planificador.limpiar()
+        self._replanificar_cada_tick = False
+        self._proximo_susto_tick = None
         habitacion = self.obtener_habitacion_actual()
         if not habitacion:
             return
-            
-        # Verificar eventos de la habitación
+        
         for evento in habitacion.eventos:
-            if not evento.activado and evento.verificar(self):
-                mensaje = evento.activar(self)
-                self.agregar_mensaje(mensaje)
-                
-                # Si es un susto, aplicar efectos
-                if evento.tipo == "susto":
-                    self.sistema_sonido.reproducir_susto()
-                    self.jugador.recibir_susto(habitacion.nivel_peligro)
-                    
-                # Si es un descubrimiento, posible secreto
-                elif evento.tipo == "descubrimiento" and not habitacion.secreto_encontrado:
-                    habitacion.secreto_encontrado = True
-                    self.jugador.secretos_descubiertos += 1
-                    self.sistema_sonido.reproducir_efecto("descubrimiento")
+            if evento.activado:
+                continue
+            if not evento.condicion_cumplida(self):
+                # Condiciones que dependen del tiempo (o desconocidas) pueden cumplirse en cualquier tick
+                if evento.hechos is None or "tiempo" in evento.hechos:
+                    self._replanificar_cada_tick = True
+                continue
+            espera = muestrear_espera_geometrica(evento.probabilidad / 100, self.aleatorio)
+            if espera is not None:
+                self.planificador.programar(evento, self.tick + espera)
+        
+        # Susto aleatorio: primer tick tras el tiempo mínimo entre sustos y después una espera geométrica
+        espera = muestrear_espera_geometrica(self._probabilidad_susto_aleatorio(habitacion) / 100, self.aleatorio)
+        if espera is not None:
+            primer_tick = self.tick + 1
+            if self._tick_ultimo_susto is not None:
+                primer_tick = max(primer_tick, self._tick_ultimo_susto + TICKS_ENTRE_SUSTOS)
+            self._proximo_susto_tick = primer_tick + espera - 1
     
-    def _susto_aleatorio(self):
-        """Posibilidad de generar un susto aleatorio"""
-        # Verificar si ha pasado suficiente tiempo desde el último susto
-        if time.time() - self.jugador.ultimo_susto < 60:  # Mínimo 1 minuto entre sustos
-            return
-            
+    def proximo_evento_programado(self):
+        """Devuelve el tick del próximo evento o susto programado (None si no hay ninguno)"""
+        self._actualizar_planificacion()
+        ticks = [t for t in (self.planificador.proximo_tick(), self._proximo_susto_tick) if t is not None]
+        if self._replanificar_cada_tick:
+            ticks.append(self.tick + 1)
+        # El vencimiento de un efecto temporal (linterna agotada, vela consumida...) también cuenta
+        efectos = self.jugador.efectos
+        vencimiento = efectos.proximo_tick()
+        if vencimiento is not None:
+            ticks.append(self.tick + max(1, vencimiento - efectos.tick))
+        return min(ticks) if ticks else None
+    
+    def establecer_velocidad(self, velocidad):
+        """Acelera (o frena) el reloj del juego: 1 tick por cada 1/velocidad segundos reales"""
+        self.reloj.cambiar_velocidad(velocidad)
+        if self.timer_actualizacion and not self.juego_pausado and not self.juego_terminado:
+            self._iniciar_temporizador()
+    
+    def _saltar_ticks(self, ticks):
+        """Avanza varios ticks en los que se sabe que no ocurre ningún evento"""
+        if self.reloj.simulado:
+            self.reloj.avanzar(ticks)
+        self.tick += ticks
+        self.jugador.efectos.avanzar(ticks)  # Nunca vence ninguno: se salta hasta antes del próximo
+    
+    def _paso_simulado(self):
+        """Ejecuta un tick completo sin temporizador"""
+        if self.reloj.simulado:
+            self.reloj.avanzar(1.0)
+        self._actualizar_juego(programar=False)
+    
+    def avanzar_hasta_proximo_evento(self, limite=None):
+        """Salta directamente al próximo evento programado y lo procesa
+        
+        limite: tick máximo al que se puede llegar. Devuelve el tick alcanzado.
+        """
+        if self.juego_pausado or self.juego_terminado:
+            return self.tick
+        objetivo = self.proximo_evento_programado()
+        if limite is not None:
+            objetivo = limite if objetivo is None else min(objetivo, limite)
+        if objetivo is None:
+            return self.tick
+        objetivo = max(objetivo, self.tick + 1)
+        
+        if objetivo - 1 > self.tick:
+            self._saltar_ticks(objetivo - 1 - self.tick)
+        if objetivo > self.tick:
+            self._paso_simulado()
+        return self.tick
+    
+    def simular(self, segundos):
+        """Avanza la partida los segundos de juego indicados saltando los ticks sin eventos
+        
+        Pensado para simulaciones sin interfaz con un RelojJuego(simulado=True):
+        el resultado es el mismo que jugar esos segundos en tiempo real.
+        """
+        destino = self.tick + int(segundos)
+        while self.tick < destino and not self.juego_pausado and not self.juego_terminado:
+            self.avanzar_hasta_proximo_evento(limite=destino)
+        if self.ui:
+            self.ui.actualizar_interfaz()
+        return self.tick
+    
+    def _comprobar_eventos(self):
+        """Dispara los eventos de la habitación actual cuyo tick programado ha llegado"""
         habitacion = self.obtener_habitacion_actual()
         if not habitacion:
             return
+        
+        self._actualizar_planificacion()
+        if self.planificador.proximo_tick() is None or self.planificador.proximo_tick() > self.tick:
+            return
+            
+        for evento in self.planificador.extraer_vencidos(self.tick):
+            # El dado ya se tiró al programarlo; solo se confirma que sigue siendo válido
+            if evento.activado or not evento.condicion_cumplida(self):
+                continue
+            mensaje = habitacion.activar_evento(evento, self)
+            self.agregar_mensaje(mensaje)
+            self._telemetria("evento", evento=evento.tipo)
             
+            # Si es un susto, aplicar efectos
+            if evento.tipo == "susto":
+                self.sistema_sonido.reproducir_susto()
+                self.registrar_susto(habitacion.nivel_peligro)
+                
+            # Si es un descubrimiento, posible secreto
+            elif evento.tipo == "descubrimiento" and not habitacion.secreto_encontrado:
+                habitacion.secreto_encontrado = True
+                self.jugador.secretos_descubiertos += 1
+                self.sistema_sonido.reproducir_efecto("descubrimiento")
+    
+    def _probabilidad_susto_aleatorio(self, habitacion):
+        """Probabilidad (%) por tick de un susto aleatorio en la habitación"""
         # Probabilidad basada en el nivel de peligro de la habitación
         probabilidad = habitacion.nivel_peligro * 0.5  # 0-5%
         
@@ -1313,50 +4133,79 @@ class MotorJuego:
         probabilidad *= (1 + factor_cordura)
         
         # Ajustar según dificultad
-        mod_dificultad = {
-            "Fácil": 0.5,
-            "Normal": 1.0,
-            "Difícil": 1.5,
-            "Pesadilla": 2.0
-        }.get(self.configuracion.dificultad, 1.0)
-        probabilidad *= mod_dificultad
-        
-        # Intentar generar susto
-        if random.random() * 100 < probabilidad:
-            # Lista de posibles sustos
-            sustos = [
-                "Escuchas un susurro en tu oído, pero no hay nadie cerca.",
-                "Las luces parpadean brevemente y crees ver una figura en las sombras.",
-                "Sientes un frío repentino y ves tu aliento condensarse por un instante.",
-                "Algo araña el suelo detrás de ti, pero al voltear no hay nada.",
-                "Un objeto cercano cae al suelo sin razón aparente.",
-                "Escuchas pasos acercándose, pero se detienen de repente.",
-                "Te parece ver un rostro pálido asomarse por una puerta lejana.",
-                "El aire se vuelve denso y te cuesta respirar por un momento.",
-                "Un llanto infantil resuena a la distancia y luego se silencia.",
-                "Una puerta se cierra de golpe en algún lugar de la mansión."
-            ]
+        mod_dificultad = MODIFICADOR_SUSTOS.get(self.configuracion.dificultad, 1.0)
+        return probabilidad * mod_dificultad
+    
+    def _susto_aleatorio(self):
+        """Genera el susto aleatorio si ha llegado su tick programado"""
+        self._actualizar_planificacion()
+        if self._proximo_susto_tick is None or self.tick < self._proximo_susto_tick:
+            return
+        self._proximo_susto_tick = None
             
-            mensaje = random.choice(sustos)
-            self.agregar_mensaje(mensaje)
-            self.sistema_sonido.reproducir_susto()
-            self.jugador.recibir_susto(habitacion.nivel_peligro // 2)
+        habitacion = self.obtener_habitacion_actual()
+        if not habitacion:
+            return
+            
+        # Lista de posibles sustos
+        sustos = [
+            "Escuchas un susurro en tu oído, pero no hay nadie cerca.",
+            "Las luces parpadean brevemente y crees ver una figura en las sombras.",
+            "Sientes un frío repentino y ves tu aliento condensarse por un instante.",
+            "Algo araña el suelo detrás de ti, pero al voltear no hay nada.",
+            "Un objeto cercano cae al suelo sin razón aparente.",
+            "Escuchas pasos acercándose, pero se detienen de repente.",
+            "Te parece ver un rostro pálido asomarse por una puerta lejana.",
+            "El aire se vuelve denso y te cuesta respirar por un momento.",
+            "Un llanto infantil resuena a la distancia y luego se silencia.",
+            "Una puerta se cierra de golpe en algún lugar de la mansión."
+        ]
+        
+        mensaje = self.aleatorio.choice(sustos)
+        self.agregar_mensaje(mensaje)
+        self.sistema_sonido.reproducir_susto()
+        self.registrar_susto(habitacion.nivel_peligro // 2)
     
+    def registrar_susto(self, intensidad):
+        """Asusta al jugador y anota el tick para respetar el tiempo mínimo entre sustos"""
+        self._tick_ultimo_susto = self.tick
+        vivo = self.jugador.vida > 0
+        daño = self.jugador.recibir_susto(intensidad, self.reloj.ahora(), self.aleatorio)
+        self._telemetria("susto", intensidad=intensidad, dano=daño, vida=self.jugador.vida,
+                         cordura=self.jugador.cordura)
+        if vivo and self.jugador.vida == 0:
+            self._telemetria("muerte", sustos=self.jugador.sustos_recibidos)
+        if self.ui and hasattr(self.ui, "al_susto"):
+            self.ui.al_susto(intensidad)
+        return daño
+    
+    def _iniciar_telemetria(self, tipo, **datos):
+        """Empieza la telemetría de una partida nueva o cargada"""
+        self.id_telemetria = os.urandom(6).hex()
+        self._entrada_habitacion = self.reloj.ahora()
+        self._telemetria(tipo, **datos)
+    
+    def _telemetria(self, tipo, **datos):
+        """Emite un evento de telemetría con la partida, la habitación y el tick actuales"""
+        if log_telemetria.isEnabledFor(logging.INFO):
+            emitir_telemetria(tipo, sesion=self.id_telemetria, habitacion=self.jugador.ubicacion_actual,
+                              tick=self.tick, **datos)
+    
+    @perfilado("mover_jugador")
     def mover_jugador(self, direccion):
         """Mueve al jugador en la dirección indicada"""
         habitacion_actual = self.obtener_habitacion_actual()
         if not habitacion_actual:
             return False
             
-        # Verificar si la dirección es válida
-        if direccion not in habitacion_actual.conexiones:
+        # Verificar si la dirección es válida (y si la habitación de destino existe)
+        destino_id = habitacion_actual.conexiones.get(direccion)
+        destino = self.habitaciones.get(destino_id) if destino_id is not None else None
+        if destino is None:
             self.agregar_mensaje(f"No puedes ir en esa dirección.")
             return False
             
         # Verificar si la habitación requiere llave
-        destino_id = habitacion_actual.conexiones[direccion]
-        destino = self.habitaciones.get(destino_id)
-        
         if destino.requiere_llave:
             if not self.jugador.tiene_item(destino.llave_requerida):
                 self.agregar_mensaje(f"La puerta está cerrada. Necesitas una llave específica.")
@@ -1365,7 +4214,15 @@ class MotorJuego:
                 self.agregar_mensaje(f"Usas la llave para abrir la puerta.")
         
         # Mover al jugador
-        self.jugador.mover_a(destino_id)
+        ahora = self.reloj.ahora()
+        telemetria = log_telemetria.isEnabledFor(logging.INFO)
+        if telemetria:
+            entrada = ahora if self._entrada_habitacion is None else self._entrada_habitacion
+            self._telemetria("salir_habitacion", direccion=direccion, permanencia=round(ahora - entrada, 3))
+        self._entrada_habitacion = ahora
+        self.jugador.mover_a(destino_id, ahora)
+        if telemetria:
+            self._telemetria("entrar_habitacion", primera_visita=not destino.visitada)
         
         # Marcar como visitada
         if not destino.visitada:
@@ -1396,9 +4253,10 @@ class MotorJuego:
         # Buscar el item
         for item in habitacion.items:
             if item.id == item_id:
-                # Recoger el item
+                # Recoger el item (la habitación entrega su propia copia, no la de la plantilla)
+                item = habitacion.quitar_item(item_id)
                 self.jugador.agregar_item(item)
-                habitacion.quitar_item(item_id)
+                self._telemetria("recoger", item=item_id)
                 
                 self.agregar_mensaje(f"Has recogido: {item.nombre} - {item.descripcion}")
                 self.sistema_sonido.reproducir_efecto("recoger_item")
@@ -1407,6 +4265,26 @@ class MotorJuego:
         self.agregar_mensaje("No encuentras ese objeto en la habitación.")
         return False
     
+    def _linterna_agotada(self):
+        self.jugador.linterna_activa = False
+        self.agregar_mensaje("Tu linterna se ha quedado sin batería")
+    
+    def _vela_consumida(self):
+        self.jugador.eliminar_item("vela")
+        self.agregar_mensaje("La vela se ha consumido por completo.")
+    
+    def _amuleto_agotado(self):
+        self.jugador.efectos.detener("regeneracion_cordura")
+        self.jugador.eliminar_item("amuleto")
+        self.agregar_mensaje("El amuleto se deshace en polvo entre tus dedos.")
+    
+    def _regenerar_cordura(self):
+        """Con el amuleto activo la cordura se recupera poco a poco"""
+        jugador = self.jugador
+        jugador.cordura = min(100, jugador.cordura + 1)
+        if jugador.efectos.activo("amuleto"):
+            jugador.efectos.iniciar("regeneracion_cordura", duracion=PERIODO_REGENERACION_CORDURA)
+    
     def usar_item(self, item_id):
         """El jugador usa un item de su inventario"""
         # Verificar si el jugador tiene el item
@@ -1453,9 +4331,24 @@ class MotorJuego:
             habitacion = self.obtener_habitacion_actual()
             if habitacion:
                 habitacion.iluminada = True
+                if not self.jugador.efectos.activo("vela"):
+                    # Una vez encendida, la vela arde hasta consumirse
+                    self.jugador.efectos.iniciar("vela", duracion=DURACION_VELA)
                 self.agregar_mensaje("Has encendido la vela. La habitación se ilumina ligeramente.")
                 self.sistema_sonido.reproducir_efecto("encender_vela")
                 return True
+        
+        elif item_id == "amuleto":
+            efectos = self.jugador.efectos
+            if efectos.activo("amuleto"):
+                self.agregar_mensaje("El amuleto ya te está protegiendo.")
+                return False
+            item = next(item for item in self.jugador.inventario if item.id == "amuleto")
+            efectos.iniciar("amuleto", item.propiedades.get("proteccion", 25), duracion=DURACION_AMULETO)
+            efectos.iniciar("regeneracion_cordura", duracion=PERIODO_REGENERACION_CORDURA)
+            self.agregar_mensaje("Aprietas el amuleto. Un calor tenue te rodea y tu mente se serena.")
+            self.sistema_sonido.reproducir_efecto("usar_item")
+            return True
                 
         # Uso genérico del item
         result = self.jugador.usar_item(item_id)
@@ -1519,57 +4412,555 @@ class MotorJuego:
         self.agregar_mensaje("No ves eso aquí.")
         return False
     
-    def inventario(self):
-        """Muestra el contenido del inventario"""
-        if not self.jugador.inventario:
-            self.agregar_mensaje("Tu inventario está vacío.")
+    def inventario(self):
+        """Muestra el contenido del inventario"""
+        if not self.jugador.inventario:
+            self.agregar_mensaje("Tu inventario está vacío.")
+            return False
+            
+        self.agregar_mensaje("Inventario:")
+        for item in self.jugador.inventario:
+            cantidad = f" (x{item.cantidad})" if item.cantidad > 1 else ""
+            self.agregar_mensaje(f"- {item.nombre}{cantidad}")
+            
+        return True
+    
+    def agregar_mensaje(self, mensaje):
+        """Agrega un mensaje a la historia del juego"""
+        self.mensaje_actual = mensaje
+        self.historia.append(mensaje)
+        
+        # Actualizar la interfaz si existe
+        if self.ui and hasattr(self.ui, "actualizar_mensajes"):
+            self.ui.actualizar_mensajes()
+    
+    def obtener_habitacion_actual(self):
+        """Obtiene la habitación actual del jugador"""
+        return self.habitaciones.get(self.jugador.ubicacion_actual)
+    
+    def recargar_habitaciones(self, nuevas, eliminadas=()):
+        """Cambia habitaciones por versiones recompiladas sin reiniciar la partida
+        
+        Actualiza la plantilla compartida (las partidas nuevas ya la usan) y
+        rebasa sobre ella las habitaciones de la partida en curso: la posición,
+        el inventario y los eventos disparados se conservan. La habitación
+        donde está el jugador no se elimina, y las salidas hacia habitaciones
+        que ya no existen se quitan (esas habitaciones cuentan como recargadas).
+        Devuelve los ids recargados.
+        """
+        actual_id = self.jugador.ubicacion_actual
+        eliminadas = [hab_id for hab_id in eliminadas if hab_id != actual_id]
+        nuevas = self._quitar_salidas_perdidas(nuevas, eliminadas)
+        anterior, plantilla = self.generador_mapa.actualizar_plantilla(nuevas, eliminadas)
+        habitaciones = self.habitaciones
+        if isinstance(habitaciones, MansionSesion):
+            habitaciones.plantilla = plantilla
+            for hab_id in eliminadas:
+                habitaciones.vistas.pop(hab_id, None)
+            for hab_id, nueva in nuevas.items():
+                vista = habitaciones.vistas.get(hab_id)
+                if vista is not None:
+                    habitaciones.vistas[hab_id] = rebasar_habitacion(anterior.get(hab_id), nueva, vista)
+        elif habitaciones:
+            # Partida cargada de un archivo: habitaciones independientes de la plantilla
+            for hab_id in eliminadas:
+                habitaciones.pop(hab_id, None)
+            for hab_id, nueva in nuevas.items():
+                habitaciones[hab_id] = rebasar_habitacion(anterior.get(hab_id), nueva, habitaciones.get(hab_id),
+                                                          sesion=False)
+        if actual_id in nuevas:
+            # El planificador tiene los eventos de la versión anterior
+            self.invalidar_planificacion()
+        log_motor.info("Contenido recargado: %d habitaciones, %d eliminadas", len(nuevas), len(eliminadas))
+        return list(nuevas)
+    
+    def _quitar_salidas_perdidas(self, nuevas, eliminadas):
+        """Añade a nuevas una copia sin esas salidas de cada habitación que lleva a una que no existirá"""
+        plantilla = self.generador_mapa.plantilla_mansion()
+        existentes = (plantilla.keys() | nuevas.keys()) - set(eliminadas)
+        resultado = dict(nuevas)
+        for hab_id in existentes:
+            habitacion = resultado[hab_id] if hab_id in resultado else plantilla[hab_id]
+            conexiones = {direccion: destino for direccion, destino in habitacion.conexiones.items()
+                          if destino in existentes}
+            if len(conexiones) < len(habitacion.conexiones):
+                # La plantilla no se modifica: se sustituye por una copia con las salidas que quedan
+                habitacion = copy.copy(habitacion)
+                habitacion.conexiones = conexiones
+                resultado[hab_id] = habitacion
+        return resultado
+        
+    def set_ui(self, ui):
+        """Establece la referencia a la interfaz de usuario"""
+        self.ui = ui
+        self.sistema_sonido.set_root(ui.root)
+
+
+EXTENSIONES_IMAGEN = (".png", ".gif", ".ppm", ".pgm")
+CAPACIDAD_CACHE_IMAGENES = 32
+
+
+def decodificar_imagen(ruta, tamano=None):
+    """Lee una imagen y devuelve los datos para tk.PhotoImage(data=...)
+    
+    Con Pillow se decodifica aquí (en el hilo que llama) y se devuelve un PPM
+    sin comprimir, que Tk carga casi sin trabajo; sin Pillow se devuelve el
+    archivo tal cual y Tk lo decodifica al crear la imagen.
+    """
+    if ImagenPIL is not None:
+        with ImagenPIL.open(ruta) as imagen:
+            imagen = imagen.convert("RGB")
+            if tamano:
+                imagen.thumbnail(tamano)
+            return b"P6 %d %d 255\n" % imagen.size + imagen.tobytes()
+    with open(ruta, 'rb') as f:
+        datos = f.read()
+    # PPM/PGM se pasan en binario; PNG y GIF en base64, que es lo que Tk acepta en todas sus versiones
+    return datos if datos[:1] == b"P" else base64.b64encode(datos)
+
+
+class CacheImagenes:
+    """Caché LRU de ilustraciones con decodificación en segundo plano y precarga
+    
+    obtener() nunca bloquea: si la imagen no está, se pide al hilo decodificador
+    y se avisa con al_cargar cuando procesar_listas() (llamado desde el hilo de
+    la interfaz, el único que puede crear imágenes de Tk) la añade a la caché.
+    Las imágenes pedidas tienen prioridad sobre las precargas.
+    """
+    
+    def __init__(self, directorio=IMAGENES_DIRECTORIO, capacidad=CAPACIDAD_CACHE_IMAGENES, tamano=None, crear=None):
+        self.directorio = directorio
+        self.capacidad = capacidad
+        self.tamano = tamano  # (ancho, alto) máximo al decodificar con Pillow
+        self._crear = crear or (lambda datos: tk.PhotoImage(data=datos))
+        self._indice = None
+        self._imagenes = OrderedDict()  # {ruta: imagen}, de la menos a la más usada
+        self._pendientes = {}  # {ruta: [al_cargar, ...]} pedidas y aún no creadas
+        self._fallidas = set()
+        self._solicitudes = queue.PriorityQueue()
+        self._listas = queue.Queue()  # (ruta, datos, ms) ya decodificadas
+        self._orden = itertools.count()
+        self._hilo = None
+        self.aciertos = 0
+        self.fallos = 0
+        self.decodificacion = HistogramaTiempos()
+    
+    def ruta(self, nombre):
+        """Ruta de la ilustración de una habitación o item (por su imagen o su id), o None"""
+        if self._indice is None:
+            self._indice = {}
+            try:
+                for entrada in os.scandir(self.directorio):
+                    base, extension = os.path.splitext(entrada.name)
+                    if extension.lower() in EXTENSIONES_IMAGEN:
+                        self._indice[base] = entrada.path
+            except OSError:
+                pass  # Sin directorio de imágenes el juego sigue siendo solo texto
+        if not nombre:
+            return None
+        return self._indice.get(os.path.splitext(os.path.basename(nombre))[0])
+    
+    def obtener(self, ruta, al_cargar=None):
+        """Devuelve la imagen si está en caché; si no, la pide y devuelve None"""
+        imagen = self._imagenes.get(ruta)
+        if imagen is not None:
+            self._imagenes.move_to_end(ruta)
+            self.aciertos += 1
+            return imagen
+        self.fallos += 1
+        if ruta not in self._fallidas:
+            self._solicitar(ruta, 0, al_cargar)
+        return None
+    
+    def precargar(self, rutas):
+        """Pide decodificar las rutas que aún no están en caché, detrás de las pedidas con obtener()"""
+        for ruta in rutas:
+            if ruta and ruta not in self._imagenes and ruta not in self._fallidas:
+                self._solicitar(ruta, 1, None)
+    
+    def _solicitar(self, ruta, prioridad, al_cargar):
+        esperando = self._pendientes.get(ruta)
+        if esperando is None or prioridad == 0:
+            # Una precarga aún en cola se adelanta volviéndola a pedir con prioridad
+            self._solicitudes.put((prioridad, next(self._orden), ruta))
+        if esperando is None:
+            esperando = self._pendientes[ruta] = []
+        if al_cargar:
+            esperando.append(al_cargar)
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._decodificar_en_segundo_plano, daemon=True)
+            self._hilo.start()
+    
+    def _decodificar_en_segundo_plano(self):
+        while True:
+            _, _, ruta = self._solicitudes.get()
+            if ruta not in self._pendientes:
+                continue  # Repetida: ya se decodificó
+            inicio = time.perf_counter()
+            try:
+                datos = decodificar_imagen(ruta, self.tamano)
+            except (OSError, ValueError) as e:
+                log_ui.warning("No se pudo cargar la imagen %s: %s", ruta, e)
+                datos = None
+            self._listas.put((ruta, datos, (time.perf_counter() - inicio) * 1000))
+    
+    def procesar_listas(self):
+        """Crea las imágenes decodificadas y avisa a quien las pidió; devuelve cuántas había"""
+        procesadas = 0
+        while True:
+            try:
+                ruta, datos, duracion_ms = self._listas.get_nowait()
+            except queue.Empty:
+                return procesadas
+            esperando = self._pendientes.pop(ruta, None)
+            if esperando is None:
+                continue
+            imagen = None
+            if datos is not None:
+                inicio = time.perf_counter()
+                try:
+                    imagen = self._crear(datos)
+                except Exception as e:  # tk.TclError si Tk no reconoce el formato
+                    log_ui.warning("Formato de imagen no válido en %s: %s", ruta, e)
+                duracion_ms += (time.perf_counter() - inicio) * 1000
+            if imagen is None:
+                self._fallidas.add(ruta)
+            else:
+                self.decodificacion.registrar(duracion_ms)
+                self._imagenes[ruta] = imagen
+                while len(self._imagenes) > self.capacidad:
+                    self._imagenes.popitem(last=False)
+            for al_cargar in esperando:
+                al_cargar(imagen)
+            procesadas += 1
+    
+    def pendientes(self):
+        return len(self._pendientes)
+    
+    def tasa_aciertos(self):
+        consultas = self.aciertos + self.fallos
+        return self.aciertos / consultas if consultas else 0.0
+    
+    def estadisticas(self):
+        """Aciertos, fallos y tiempos de decodificación para el panel y la exportación de rendimiento"""
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.tasa_aciertos(),
+            "en_cache": len(self._imagenes),
+            "pendientes": len(self._pendientes),
+            "decodificacion": self.decodificacion.to_dict()
+        }
+
+
+# Entrada de teclado en la partida
+LIMITE_COLA_ENTRADA = 8  # Acciones pendientes como máximo; al llenarse se descartan las más antiguas
+
+
+class ColaEntrada:
+    """Cola de acciones de teclado que se procesan en orden en el bucle de la interfaz
+    
+    Las repeticiones de la misma acción (la autorrepetición del sistema al
+    mantener una tecla) se agrupan mientras siguen pendientes, y los
+    movimientos salen como mucho al ritmo configurado, más rápido con la
+    tecla de correr. Cada acción lleva el instante en que se pulsó para
+    medir la latencia hasta que se ve en pantalla.
+    """
+    
+    def __init__(self, ritmo=5, ritmo_corriendo=10, reloj=time.perf_counter):
+        self.ritmo = ritmo  # Movimientos por segundo
+        self.ritmo_corriendo = ritmo_corriendo
+        self.reloj = reloj
+        self.corriendo = False
+        self.agrupadas = 0  # Pulsaciones descartadas por repetir la acción pendiente
+        self._pendientes = deque(maxlen=LIMITE_COLA_ENTRADA)  # (acción, argumento, instante)
+        self._proximo_movimiento = 0.0
+    
+    def pulsar(self, accion, argumento=None, ahora=None):
+        """Encola una acción; devuelve False si se agrupa con la última pendiente"""
+        if self._pendientes and self._pendientes[-1][:2] == (accion, argumento):
+            self.agrupadas += 1
             return False
-            
-        self.agregar_mensaje("Inventario:")
-        for item in self.jugador.inventario:
-            cantidad = f" (x{item.cantidad})" if item.cantidad > 1 else ""
-            self.agregar_mensaje(f"- {item.nombre}{cantidad}")
-            
+        self._pendientes.append((accion, argumento, self.reloj() if ahora is None else ahora))
         return True
     
-    def agregar_mensaje(self, mensaje):
-        """Agrega un mensaje a la historia del juego"""
-        self.mensaje_actual = mensaje
-        self.historia.append(mensaje)
-        
-        # Actualizar la interfaz si existe
-        if self.ui and hasattr(self.ui, "actualizar_mensajes"):
-            self.ui.actualizar_mensajes()
+    def pendientes(self):
+        return len(self._pendientes)
     
-    def obtener_habitacion_actual(self):
-        """Obtiene la habitación actual del jugador"""
-        return self.habitaciones.get(self.jugador.ubicacion_actual)
-        
-    def set_ui(self, ui):
-        """Establece la referencia a la interfaz de usuario"""
-        self.ui = ui
-        self.sistema_sonido.set_root(ui.root)
+    def vaciar(self):
+        self._pendientes.clear()
+    
+    def espera(self, ahora=None):
+        """Segundos hasta que la primera acción pendiente pueda salir (None si no hay ninguna)"""
+        if not self._pendientes:
+            return None
+        if self._pendientes[0][0] != "mover":
+            return 0.0
+        return max(0.0, self._proximo_movimiento - (self.reloj() if ahora is None else ahora))
+    
+    def listas(self, ahora=None):
+        """Saca en orden las acciones que ya pueden ejecutarse
+        
+        Un movimiento que aún no toca detiene la salida para no adelantar las
+        acciones pulsadas después.
+        """
+        ahora = self.reloj() if ahora is None else ahora
+        listas = []
+        while self._pendientes:
+            if self._pendientes[0][0] == "mover":
+                if ahora < self._proximo_movimiento:
+                    break
+                self._proximo_movimiento = ahora + 1.0 / (self.ritmo_corriendo if self.corriendo else self.ritmo)
+            listas.append(self._pendientes.popleft())
+        return listas
+
+
+# Efectos visuales de los sustos sobre la escena (ver EfectosPantalla)
+FOTOGRAMAS_POR_SEGUNDO_EFECTOS = 30
+DURACION_DESTELLO = 0.3  # Segundos
+DURACION_TEMBLOR = 0.5
+TEMBLOR_MAXIMO_PX = 12
+ANCHO_VINETA_PX = 60  # Oscurecimiento de los bordes con la cordura a 0
+UMBRAL_PARPADEO_LINTERNA = 20  # Con menos batería la linterna parpadea
+FOTOGRAMAS_RECUPERAR_EFECTO = 90  # Fotogramas holgados antes de devolver un efecto quitado
+TRAMAS_EFECTOS = ("gray75", "gray50", "gray25", "gray12")  # De más a menos opaca
+ALTO_ESCENA_SIN_IMAGEN = 90  # Alto de la escena cuando la habitación no tiene ilustración
+# Efectos de cada calidad, en el orden en que se quitan si no hay tiempo, y presupuesto por fotograma
+CALIDADES_EFECTOS = {
+    "Baja": {"efectos": ("vineta", "destello"), "anillos_vineta": 1, "presupuesto_ms": 2.0},
+    "Media": {"efectos": ("parpadeo", "temblor", "vineta", "destello"), "anillos_vineta": 2, "presupuesto_ms": 4.0},
+    "Alta": {"efectos": ("parpadeo", "temblor", "vineta", "destello"), "anillos_vineta": 4, "presupuesto_ms": 8.0}
+}
+
+
+class EfectosPantalla:
+    """Animación de los efectos visuales de los sustos, independiente de Tk
+    
+    La interfaz llama a fotograma() a ritmo fijo mientras animando() sea
+    cierto y dibuja el estado que devuelve reutilizando siempre los mismos
+    elementos del canvas. La calidad fija qué efectos hay y el presupuesto
+    de tiempo por fotograma: si los fotogramas lo superan se quitan efectos,
+    los menos importantes primero, para no retrasar la entrada; cuando
+    vuelve a sobrar tiempo se recuperan.
+    """
+    
+    def __init__(self, calidad="Media", rng=None):
+        self.aleatorio = rng or random.Random()
+        self.recortes = 0  # Veces que se ha quitado un efecto por falta de tiempo
+        self._destello = 0.0  # Segundos que le quedan
+        self._temblor = 0.0
+        self._fuerza_temblor = 0
+        self._tiempo_ms = 0.0  # Media móvil del coste de los fotogramas
+        self._fotogramas_holgados = 0
+        self.cambiar_calidad(calidad)
+    
+    def cambiar_calidad(self, calidad):
+        ajustes = CALIDADES_EFECTOS.get(calidad, CALIDADES_EFECTOS["Media"])
+        self._permitidos = ajustes["efectos"]
+        self.activos = list(self._permitidos)
+        self.anillos_vineta = ajustes["anillos_vineta"]
+        self.presupuesto_ms = ajustes["presupuesto_ms"]
+    
+    def susto(self, intensidad):
+        """Destello y temblor proporcional a la intensidad"""
+        self._destello = DURACION_DESTELLO
+        self._temblor = DURACION_TEMBLOR
+        self._fuerza_temblor = min(TEMBLOR_MAXIMO_PX, max(2, intensidad // 2))
+    
+    def _parpadea(self, linterna_activa, bateria):
+        return "parpadeo" in self.activos and linterna_activa and bateria < UMBRAL_PARPADEO_LINTERNA
+    
+    def animando(self, linterna_activa=False, bateria=100):
+        """True mientras haga falta dibujar fotogramas (la viñeta sola es estática)"""
+        return self._destello > 0 or self._temblor > 0 or self._parpadea(linterna_activa, bateria)
+    
+    def fotograma(self, dt, cordura, linterna_activa=False, bateria=100):
+        """Avanza dt segundos y devuelve lo que hay que dibujar"""
+        estado = {"destello": None, "vineta": 0, "parpadeo": False, "temblor": (0, 0)}
+        if self._destello > 0:
+            if "destello" in self.activos:
+                fase = 1 - self._destello / DURACION_DESTELLO
+                estado["destello"] = TRAMAS_EFECTOS[min(len(TRAMAS_EFECTOS) - 1, int(fase * len(TRAMAS_EFECTOS)))]
+            self._destello = max(0.0, self._destello - dt)
+        if self._temblor > 0:
+            if "temblor" in self.activos:
+                fuerza = round(self._fuerza_temblor * self._temblor / DURACION_TEMBLOR)
+                estado["temblor"] = (self.aleatorio.randint(-fuerza, fuerza), self.aleatorio.randint(-fuerza, fuerza))
+            self._temblor = max(0.0, self._temblor - dt)
+        if "vineta" in self.activos:
+            estado["vineta"] = round(ANCHO_VINETA_PX * (100 - max(0, min(100, cordura))) / 100)
+        if self._parpadea(linterna_activa, bateria):
+            # Cuanto menos batería, más a menudo se apaga un instante
+            estado["parpadeo"] = self.aleatorio.random() < 0.6 * (1 - bateria / UMBRAL_PARPADEO_LINTERNA)
+        return estado
+    
+    def registrar_tiempo(self, ms):
+        """Anota lo que ha costado un fotograma y ajusta los efectos al presupuesto"""
+        self._tiempo_ms = 0.8 * self._tiempo_ms + 0.2 * ms if self._tiempo_ms else ms
+        if self._tiempo_ms > self.presupuesto_ms and self.activos:
+            self.activos.pop(0)
+            self.recortes += 1
+            self._tiempo_ms = 0.0
+            self._fotogramas_holgados = 0
+        elif self._tiempo_ms < self.presupuesto_ms / 2 and len(self.activos) < len(self._permitidos):
+            self._fotogramas_holgados += 1
+            if self._fotogramas_holgados >= FOTOGRAMAS_RECUPERAR_EFECTO:
+                # Vuelve el último que se quitó
+                self.activos.insert(0, self._permitidos[len(self._permitidos) - len(self.activos) - 1])
+                self._fotogramas_holgados = 0
+        else:
+            self._fotogramas_holgados = 0
+
+
+# Pantalla de carga: lista virtual de partidas guardadas
+ALTO_FILA_PARTIDAS = 28  # Píxeles por fila
+CAPACIDAD_VISTAS_PREVIAS = 64
+RETARDO_VISTA_PREVIA_MS = 120  # La vista previa se calcula cuando la selección se detiene
+ORDENES_PARTIDAS = (("fecha", "Fecha"), ("tiempo", "Tiempo jugado"), ("dificultad", "Dificultad"))
+
+
+class CabeceraPartida:
+    """Datos de una partida guardada que se ven en la lista, sin tocar su estado"""
+    
+    __slots__ = ("slot", "nombre", "fecha", "timestamp", "tiempo_jugado", "dificultad", "posicion", "clave_busqueda")
+    
+    def __init__(self, partida, posicion):
+        self.slot = partida.get("slot")
+        self.nombre = partida.get("nombre", "")
+        self.fecha = partida.get("fecha", "")
+        self.timestamp = partida.get("timestamp", 0)
+        self.tiempo_jugado = partida.get("tiempo_jugado", 0)
+        self.dificultad = partida.get("dificultad", "")
+        self.posicion = posicion  # Índice en la lista de partidas del gestor
+        self.clave_busqueda = f"{self.slot} {self.nombre} {self.fecha} {self.dificultad}".casefold()
+
+
+class IndicePartidas:
+    """Índice de las partidas guardadas para la pantalla de carga
+    
+    Solo lee las cabeceras (CabeceraPartida); ordenar y buscar trabajan sobre
+    ellas y la interfaz pide únicamente las filas que se ven. Si el texto de
+    búsqueda amplía el anterior se filtran solo los resultados que ya había.
+    Las vistas previas (habitación, objetos) se calculan al pedirlas y se
+    guardan en una caché LRU.
+    """
+    
+    def __init__(self, partidas, orden="fecha", descendente=True):
+        self._partidas = partidas
+        self._cabeceras = [CabeceraPartida(partida, posicion) for posicion, partida in enumerate(partidas)]
+        self.orden = orden
+        self.descendente = descendente
+        self.busqueda = ""
+        self.visibles = self._cabeceras
+        self._previas = OrderedDict()
+        self.ordenar(orden, descendente)
+    
+    def __len__(self):
+        return len(self.visibles)
+    
+    def fila(self, posicion):
+        return self.visibles[posicion]
+    
+    def filas(self, inicio, fin):
+        return self.visibles[inicio:fin]
+    
+    def posicion(self, slot):
+        """Posición del slot entre las filas visibles, o None"""
+        for posicion, cabecera in enumerate(self.visibles):
+            if cabecera.slot == slot:
+                return posicion
+        return None
+    
+    @staticmethod
+    def _clave(orden):
+        if orden == "tiempo":
+            return lambda cabecera: cabecera.tiempo_jugado
+        if orden == "dificultad":
+            niveles = {nombre: nivel for nivel, nombre in enumerate(MODIFICADOR_SUSTOS)}
+            return lambda cabecera: (niveles.get(cabecera.dificultad, len(niveles)), cabecera.timestamp)
+        return lambda cabecera: cabecera.timestamp
+    
+    def ordenar(self, orden, descendente=True):
+        """Ordena por "fecha", "tiempo" o "dificultad" conservando la búsqueda"""
+        self.orden = orden
+        self.descendente = descendente
+        self._cabeceras.sort(key=self._clave(orden), reverse=descendente)
+        busqueda, self.busqueda = self.busqueda, ""
+        self.buscar(busqueda)
+    
+    def buscar(self, texto):
+        """Deja visibles las partidas cuyo slot, nombre, fecha o dificultad contienen el texto"""
+        texto = texto.strip().casefold()
+        candidatas = self.visibles if self.busqueda and texto.startswith(self.busqueda) else self._cabeceras
+        self.visibles = [c for c in candidatas if texto in c.clave_busqueda] if texto else self._cabeceras
+        self.busqueda = texto
+    
+    def vista_previa(self, cabecera):
+        """Habitación, estado y objetos de la partida (solo se leen al pedirlos)"""
+        previa = self._previas.get(cabecera.posicion)
+        if previa is not None:
+            self._previas.move_to_end(cabecera.posicion)
+            return previa
+        partida = self._partidas[cabecera.posicion]
+        jugador = partida.get("jugador", {})
+        ubicacion = jugador.get("ubicacion_actual")
+        previa = {
+            "habitacion": partida.get("habitaciones", {}).get(ubicacion, {}).get("nombre", ubicacion or "?"),
+            "vida": jugador.get("vida", 100),
+            "cordura": jugador.get("cordura", 100),
+            "objetos": [item.get("nombre", item.get("id", "?")) for item in jugador.get("inventario", [])]
+        }
+        self._previas[cabecera.posicion] = previa
+        if len(self._previas) > CAPACIDAD_VISTAS_PREVIAS:
+            self._previas.popitem(last=False)
+        return previa
 
 
 class InterfazMansion:
     """Interfaz gráfica del juego"""
     
     def __init__(self, master):
+        self._inicio_arranque = time.perf_counter()
+        self.tiempo_primer_fotograma_ms = None
         self.root = master
         self.root.title(f"{NOMBRE_JUEGO} v{VERSION_JUEGO}")
         self.root.geometry(f"{ANCHO_VENTANA}x{ALTO_VENTANA}")
         self.root.configure(bg=COLOR_NEGRO)
         self.root.minsize(800, 600)
         
-        # Cargar configuración
+        # Cargar configuración (el registro se ajusta después a los niveles guardados)
+        configurar_registro()
         self.configuracion = Configuracion()
+        configurar_registro(self.configuracion.niveles_registro)
+        configurar_telemetria()
         
-        # Inicializar motor del juego
-        self.motor = MotorJuego(self.configuracion)
+        # Inicializar motor del juego (partidas y puntuaciones se cargan tras el primer fotograma)
+        self.motor = MotorJuego(self.configuracion, carga_diferida=True)
         self.motor.set_ui(self)
         
+        # Teclas de la partida: se encolan y se procesan a ritmo limitado (ver ColaEntrada)
+        self.entrada = ColaEntrada(self.configuracion.movimientos_por_segundo,
+                                   self.configuracion.movimientos_por_segundo_corriendo)
+        self._entrada_after = None
+        self._agrupando_mensajes = False
+        
+        # Ilustraciones de habitaciones e items, decodificadas en segundo plano
+        self.imagenes = CacheImagenes(tamano=(620, 240))
+        self._imagenes_after = None
+        self._habitacion_ilustrada = None
+        
+        # Efectos visuales de los sustos sobre la escena (ver EfectosPantalla)
+        self.efectos_pantalla = EfectosPantalla(self.configuracion.calidad_graficos)
+        self._efectos_after = None
+        
+        # Modo vigilancia: los cambios en los archivos de contenido se aplican sin reiniciar
+        self.vigilante_contenido = VigilanteContenido() if self.configuracion.vigilar_contenido else None
+        self._contenido_after = None
+        
         # Variables
         self.pantalla_actual = "menu"  # menu, juego, opciones, carga, etc.
+        self.overlay_rendimiento = None  # Panel de rendimiento (F3)
+        self._overlay_after = None
         
         # Crear interfaz
         self._crear_interfaz()
@@ -1577,18 +4968,60 @@ class InterfazMansion:
         # Teclas
         self._configurar_teclas()
         
+        # Medir cuándo el menú queda dibujado e interactivo
+        self.root.after_idle(self._al_primer_fotograma)
+        
+    def _al_primer_fotograma(self):
+        """Registra el tiempo hasta el primer fotograma y carga la persistencia"""
+        self.tiempo_primer_fotograma_ms = (time.perf_counter() - self._inicio_arranque) * 1000
+        self.motor.perfilador.registrar("primer_fotograma", self.tiempo_primer_fotograma_ms)
+        log_ui.info("Primer fotograma interactivo en %.1f ms", self.tiempo_primer_fotograma_ms)
+        self.motor.cargar_persistencia_en_segundo_plano()
+        
+        # Música y efectos reales si hay tarjeta de sonido (sounddevice tarda en importarse)
+        salida = salida_musica_predeterminada()
+        if salida is not None:
+            self.motor.sistema_sonido.activar_musica(salida)
+            self.motor.sistema_sonido.cargar_banco_efectos()
+        
+        if self.vigilante_contenido:
+            self._vigilar_contenido()
+    
+    def _vigilar_contenido(self):
+        """Recompila los archivos de contenido cambiados y los aplica a la partida en curso"""
+        errores = dict(self.vigilante_contenido.errores)
+        inicio = time.perf_counter()
+        nuevas, eliminadas = self.vigilante_contenido.recompilar()
+        recargadas = []
+        if nuevas or eliminadas:
+            recargadas = self.motor.recargar_habitaciones(nuevas, eliminadas)
+            self.motor.perfilador.registrar("recarga_contenido", (time.perf_counter() - inicio) * 1000)
+        if self.pantalla_actual == "juego":
+            for ruta, error in self.vigilante_contenido.errores.items():
+                if errores.get(ruta) != error:
+                    self.motor.agregar_mensaje(f"[Contenido] Error en {os.path.basename(ruta)}: {error}")
+            eliminadas = [hab_id for hab_id in eliminadas if hab_id not in self.motor.habitaciones]
+            if recargadas or eliminadas:
+                self.motor.agregar_mensaje(f"[Contenido] Recargado: {', '.join(recargadas + eliminadas)}")
+                self._habitacion_ilustrada = None  # Puede haber cambiado el nombre o la imagen
+                self.actualizar_interfaz()
+        self._contenido_after = self.root.after(PERIODO_VIGILANCIA_CONTENIDO_MS, self._vigilar_contenido)
+        
     def _crear_interfaz(self):
         """Crea los elementos de la interfaz"""
         # Marco principal
         self.marco_principal = tk.Frame(self.root, bg=COLOR_NEGRO)
         self.marco_principal.pack(fill=tk.BOTH, expand=True)
         
-        # Crear las diferentes pantallas
-        self._crear_menu_principal()
-        self._crear_pantalla_juego()
-        self._crear_pantalla_opciones()
-        self._crear_pantalla_carga()
-        self._crear_pantalla_creditos()
+        # Las pantallas se construyen la primera vez que se muestran
+        self.pantallas = {}
+        self._constructores_pantalla = {
+            "menu": (self._crear_menu_principal, "menu_frame"),
+            "juego": (self._crear_pantalla_juego, "juego_frame"),
+            "opciones": (self._crear_pantalla_opciones, "opciones_frame"),
+            "carga": (self._crear_pantalla_carga, "carga_frame"),
+            "creditos": (self._crear_pantalla_creditos, "creditos_frame")
+        }
         
         # Mostrar la pantalla inicial
         self.mostrar_pantalla("menu")
@@ -1613,39 +5046,98 @@ class InterfazMansion:
         
         # Vincular teclas
         self.root.bind("<KeyPress>", self._manejar_tecla)
+        self.root.bind("<KeyRelease>", self._soltar_tecla)
+        self.root.bind("<FocusOut>", self._soltar_tecla)
         
         # Para pantalla completa
         self.root.bind("<F11>", self._alternar_pantalla_completa)
         self.root.bind("<Escape>", self._manejar_escape)
+        
+        # Panel de rendimiento y exportación de mediciones
+        self.root.bind("<F3>", self._alternar_overlay_rendimiento)
+        self.root.bind("<Control-F3>", self._exportar_rendimiento)
     
     def _manejar_tecla(self, event):
-        """Maneja las pulsaciones de teclas"""
+        """Encola la acción de la tecla pulsada; se ejecuta en _procesar_entrada"""
+        key = event.keysym.lower()
+        if key == self.configuracion.controles["correr"].lower():
+            self.entrada.corriendo = True
+            return
+        
         if self.pantalla_actual != "juego" or self.motor.juego_pausado:
             return
-            
-        key = event.keysym.lower()
         
         # Mover jugador
         if key in self.mapa_direcciones:
-            direccion = self.mapa_direcciones[key]
-            self.motor.mover_jugador(direccion)
+            self.entrada.pulsar("mover", self.mapa_direcciones[key])
             
         # Otras teclas
         elif key == self.configuracion.controles["inventario"] or key == "i":
-            self.motor.inventario()
+            self.entrada.pulsar("inventario")
             
         elif key == self.configuracion.controles["linterna"] or key == "f":
-            if self.motor.jugador.tiene_item("linterna"):
-                self.motor.usar_item("linterna")
+            self.entrada.pulsar("linterna")
                 
         elif key == self.configuracion.controles["mapa"] or key == "m":
             # Implementar vista del mapa
-            pass
+            return
             
         elif key == self.configuracion.controles["interactuar"] or key == "e":
             # Para interactuar con objetos cercanos
+            self.entrada.pulsar("interactuar")
+        
+        else:
+            return
+        self._programar_entrada()
+    
+    def _soltar_tecla(self, event):
+        """Deja de correr al soltar la tecla de correr o al perder el foco"""
+        if event.type == tk.EventType.FocusOut or event.keysym.lower() == self.configuracion.controles["correr"].lower():
+            self.entrada.corriendo = False
+    
+    def _ejecutar_accion(self, accion, argumento):
+        """Ejecuta una acción de la cola de entrada"""
+        if accion == "mover":
+            self.motor.mover_jugador(argumento)
+        elif accion == "inventario":
+            self.motor.inventario()
+        elif accion == "linterna":
+            if self.motor.jugador.tiene_item("linterna"):
+                self.motor.usar_item("linterna")
+        elif accion == "interactuar":
             self.interactuar()
     
+    def _programar_entrada(self):
+        """Programa el siguiente paso del bucle de entrada si queda algo pendiente"""
+        espera = self.entrada.espera()
+        if self._entrada_after is None and espera is not None:
+            self._entrada_after = self.root.after(math.ceil(espera * 1000), self._procesar_entrada)
+    
+    def _procesar_entrada(self):
+        """Ejecuta en orden las acciones que tocan y refresca la interfaz una sola vez"""
+        self._entrada_after = None
+        if self.pantalla_actual != "juego" or self.motor.juego_pausado or self.motor.juego_terminado:
+            self.entrada.vaciar()
+            return
+        acciones = self.entrada.listas()
+        if acciones:
+            self._agrupando_mensajes = True
+            try:
+                for accion, argumento, _ in acciones:
+                    self._ejecutar_accion(accion, argumento)
+            finally:
+                self._agrupando_mensajes = False
+            self.actualizar_mensajes()
+            self.actualizar_interfaz()
+            # Tk redibuja en las tareas en espera ya pendientes: esta se ejecuta con el resultado en pantalla
+            self.root.after_idle(self._registrar_latencia_entrada, [instante for _, _, instante in acciones])
+        self._programar_entrada()
+    
+    def _registrar_latencia_entrada(self, instantes):
+        ahora = time.perf_counter()
+        for instante in instantes:
+            self.motor.perfilador.registrar("latencia_entrada", (ahora - instante) * 1000)
+    
     def _manejar_escape(self, event):
         """Maneja la tecla Escape"""
         if self.pantalla_actual == "juego":
@@ -1653,6 +5145,72 @@ class InterfazMansion:
         elif self.pantalla_actual != "menu":
             self.mostrar_pantalla("menu")
     
+    def _profundidad_cola(self):
+        """Devuelve cuántos callbacks tiene pendientes el bucle de Tk"""
+        try:
+            return len(self.root.tk.splitlist(self.root.tk.call("after", "info")))
+        except tk.TclError:
+            return 0
+    
+    def _alternar_overlay_rendimiento(self, event=None):
+        """Muestra u oculta el panel de rendimiento"""
+        if self.overlay_rendimiento is None:
+            self.overlay_rendimiento = tk.Label(
+                self.root,
+                font=("Courier", 10),
+                fg=COLOR_DORADO,
+                bg=COLOR_NEGRO,
+                justify=tk.LEFT,
+                bd=1,
+                relief=tk.SOLID
+            )
+        
+        if self.overlay_rendimiento.winfo_ismapped():
+            self.overlay_rendimiento.place_forget()
+            if self._overlay_after:
+                self.root.after_cancel(self._overlay_after)
+                self._overlay_after = None
+            # Sin panel se mide solo si la configuración lo pide
+            self.motor.perfilador.habilitado = self.configuracion.perfilador_activo
+        else:
+            self.motor.perfilador.habilitado = True
+            self.overlay_rendimiento.place(relx=1.0, rely=0.0, x=-10, y=70, anchor=tk.NE)
+            self.overlay_rendimiento.lift()
+            self._refrescar_overlay_rendimiento()
+    
+    def _refrescar_overlay_rendimiento(self):
+        """Actualiza el texto del panel de rendimiento"""
+        perfilador = self.motor.perfilador
+        tick = perfilador.fases.get("tick")
+        latencia = perfilador.fases.get("latencia_entrada")
+        efectos = perfilador.fases.get("efectos_pantalla")
+        memoria = perfilador.memoria_mb()
+        
+        lineas = [
+            f"Tick: {perfilador.ultimo_tick_ms():.2f} ms",
+            f"Tick p50/p99: {tick.percentil(50):.2f}/{tick.percentil(99):.2f} ms" if tick else "Tick p50/p99: -",
+            f"Memoria: {memoria:.1f} MB" if memoria is not None else "Memoria: -",
+            f"Hilos: {threading.active_count()}",
+            f"Cola: {self._profundidad_cola()}",
+            f"Imágenes: {self.imagenes.tasa_aciertos():.0%} aciertos, "
+            f"{self.imagenes.decodificacion.percentil(50):.1f} ms p50",
+            f"Entrada p50/p99: {latencia.percentil(50):.1f}/{latencia.percentil(99):.1f} ms, "
+            f"{self.entrada.agrupadas} agrupadas" if latencia else "Entrada p50/p99: -",
+            f"Efectos p99: {efectos.percentil(99):.2f} ms, {len(self.efectos_pantalla.activos)} activos, "
+            f"{self.efectos_pantalla.recortes} recortes" if efectos else "Efectos p99: -"
+        ]
+        self.overlay_rendimiento.config(text="\n".join(lineas))
+        self._overlay_after = self.root.after(500, self._refrescar_overlay_rendimiento)
+    
+    def _exportar_rendimiento(self, event=None):
+        """Exporta las mediciones del motor a un archivo JSON"""
+        extra = {"cola": self._profundidad_cola(), "imagenes": self.imagenes.estadisticas(),
+                 "entrada_agrupadas": self.entrada.agrupadas, "efectos_recortes": self.efectos_pantalla.recortes}
+        if not self.motor.perfilador.fases:
+            self.motor.agregar_mensaje("No hay mediciones: abre el panel de rendimiento (F3) para empezar a medir")
+        elif self.motor.perfilador.exportar_json(RENDIMIENTO_ARCHIVO, extra):
+            self.motor.agregar_mensaje(f"Rendimiento exportado a {RENDIMIENTO_ARCHIVO}")
+    
     def _alternar_pantalla_completa(self, event=None):
         """Alterna entre pantalla completa y ventana"""
         estado = self.root.attributes('-fullscreen')
@@ -1763,6 +5321,27 @@ class InterfazMansion:
             bg=COLOR_GRIS_OSCURO
         ).pack(anchor=tk.W, padx=10, pady=5)
         
+        # Escena: ilustración de la habitación (o su nombre si no tiene) con los efectos encima.
+        # Todos los elementos se crean una vez; los fotogramas solo los mueven y cambian su trama
+        self.escena_canvas = tk.Canvas(self.panel_izq, width=620, height=ALTO_ESCENA_SIN_IMAGEN,
+                                       bg=COLOR_NEGRO, highlightthickness=0)
+        self.escena_canvas.pack(padx=5)
+        self._escena_imagen = self.escena_canvas.create_image(0, 0, anchor=tk.CENTER)
+        self._escena_titulo = self.escena_canvas.create_text(0, 0, font=("Georgia", 20, "italic"),
+                                                             fill=COLOR_BLANCO_ANTIGUO)
+        self._escena_parpadeo = self.escena_canvas.create_rectangle(0, 0, 0, 0, fill=COLOR_NEGRO, width=0,
+                                                                    stipple="gray50", state=tk.HIDDEN)
+        # Cuatro bandas por anillo de viñeta (arriba, abajo, izquierda, derecha), de fuera adentro
+        anillos = max(ajustes["anillos_vineta"] for ajustes in CALIDADES_EFECTOS.values())
+        self._escena_vineta = [[self.escena_canvas.create_rectangle(0, 0, 0, 0, fill=COLOR_NEGRO, width=0,
+                                                                    stipple=TRAMAS_EFECTOS[anillo % len(TRAMAS_EFECTOS)],
+                                                                    state=tk.HIDDEN)
+                                for _ in range(4)] for anillo in range(anillos)]
+        self._escena_destello = self.escena_canvas.create_rectangle(0, 0, 0, 0, fill="white", width=0,
+                                                                    state=tk.HIDDEN)
+        self._ultimo_estado_efectos = None
+        self.escena_canvas.bind("<Configure>", self._colocar_escena)
+        
         # Área de mensajes con scrollbar
         mensaje_frame = tk.Frame(self.panel_izq, bg=COLOR_GRIS_OSCURO)
         mensaje_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -1880,6 +5459,12 @@ class InterfazMansion:
         self.objetos_list.pack(fill=tk.BOTH, expand=True)
         scrollbar_obj.config(command=self.objetos_list.yview)
         
+        # Ilustración del objeto seleccionado
+        self.imagen_item_label = tk.Label(self.panel_der, bg=COLOR_GRIS_OSCURO)
+        self.imagen_item_label.pack(padx=5)
+        self.inventario_list.bind("<<ListboxSelect>>", self._mostrar_imagen_item)
+        self.objetos_list.bind("<<ListboxSelect>>", self._mostrar_imagen_item)
+        
         # Botón de menú/pausa
         tk.Button(
             self.panel_der,
@@ -1978,6 +5563,25 @@ class InterfazMansion:
         )
         self.dificultad_combo.grid(row=2, column=1, padx=10, sticky=tk.W)
         
+        # Calidad gráfica: qué efectos de susto se dibujan y cuánto tiempo pueden gastar
+        tk.Label(
+            opciones_contenido,
+            text="Calidad gráfica:",
+            font=("Arial", 14),
+            fg=COLOR_BLANCO_ANTIGUO,
+            bg=COLOR_NEGRO
+        ).grid(row=3, column=0, sticky=tk.W, pady=10)
+        
+        self.calidad_var = tk.StringVar(value=self.configuracion.calidad_graficos)
+        ttk.Combobox(
+            opciones_contenido,
+            textvariable=self.calidad_var,
+            values=list(CALIDADES_EFECTOS),
+            state="readonly",
+            width=15,
+            font=("Arial", 12)
+        ).grid(row=3, column=1, padx=10, sticky=tk.W)
+        
         # Pantalla completa
         self.pantalla_completa_var = tk.BooleanVar(value=self.configuracion.pantalla_completa)
         tk.Checkbutton(
@@ -1990,7 +5594,7 @@ class InterfazMansion:
             selectcolor=COLOR_GRIS_OSCURO,
             activebackground=COLOR_NEGRO,
             activeforeground=COLOR_BLANCO_ANTIGUO
-        ).grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=10)
+        ).grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=10)
         
         # Subtítulos
         self.subtitulos_var = tk.BooleanVar(value=self.configuracion.subtitulos)
@@ -2004,7 +5608,7 @@ class InterfazMansion:
             selectcolor=COLOR_GRIS_OSCURO,
             activebackground=COLOR_NEGRO,
             activeforeground=COLOR_BLANCO_ANTIGUO
-        ).grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=10)
+        ).grid(row=5, column=0, columnspan=2, sticky=tk.W, pady=10)
         
         # Botones
         botones_frame = tk.Frame(self.opciones_frame, bg=COLOR_NEGRO)
@@ -2049,28 +5653,95 @@ class InterfazMansion:
             bg=COLOR_NEGRO
         ).pack(pady=(30, 20))
         
-        # Marco para la lista de partidas
+        # Búsqueda y orden
+        controles_frame = tk.Frame(self.carga_frame, bg=COLOR_NEGRO)
+        controles_frame.pack(fill=tk.X, padx=50)
+        
+        tk.Label(
+            controles_frame,
+            text="Buscar:",
+            font=("Arial", 12),
+            fg=COLOR_PLATA,
+            bg=COLOR_NEGRO
+        ).pack(side=tk.LEFT)
+        
+        self.busqueda_partidas_var = tk.StringVar()
+        self.busqueda_partidas_var.trace_add("write", self._buscar_partidas)
+        busqueda_entry = tk.Entry(
+            controles_frame,
+            textvariable=self.busqueda_partidas_var,
+            font=("Arial", 12),
+            fg=COLOR_BLANCO_ANTIGUO,
+            bg=COLOR_GRIS_OSCURO,
+            insertbackground=COLOR_DORADO,
+            width=25
+        )
+        busqueda_entry.pack(side=tk.LEFT, padx=(5, 20))
+        
+        self.botones_orden_partidas = {}
+        for orden, texto in ORDENES_PARTIDAS:
+            boton = tk.Button(
+                controles_frame,
+                text=texto,
+                font=("Arial", 11),
+                command=lambda orden=orden: self._ordenar_partidas(orden),
+                bg=COLOR_MARRON_OSCURO,
+                fg=COLOR_DORADO,
+                bd=1,
+                relief=tk.RIDGE,
+                padx=8
+            )
+            boton.pack(side=tk.LEFT, padx=3)
+            self.botones_orden_partidas[orden] = boton
+        
+        # Marco para la lista de partidas y la vista previa
         partidas_frame = tk.Frame(self.carga_frame, bg=COLOR_NEGRO)
         partidas_frame.pack(fill=tk.BOTH, expand=True, padx=50, pady=10)
         
-        # Lista de partidas con scrollbar
-        scrollbar = tk.Scrollbar(partidas_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.vista_previa_label = tk.Label(
+            partidas_frame,
+            text="",
+            font=("Arial", 11),
+            fg=COLOR_PLATA,
+            bg=COLOR_NEGRO,
+            justify=tk.LEFT,
+            anchor="nw",
+            width=30,
+            wraplength=260
+        )
+        self.vista_previa_label.pack(side=tk.RIGHT, fill=tk.Y, padx=(15, 0))
+        
+        # Lista virtual: solo existen los elementos de las filas que se ven
+        self.partidas_scrollbar = tk.Scrollbar(partidas_frame, command=self._desplazar_partidas)
+        self.partidas_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        self.partidas_list = tk.Listbox(
+        self.partidas_canvas = tk.Canvas(
             partidas_frame,
-            font=("Arial", 12),
-            fg=COLOR_BLANCO_ANTIGUO,
             bg=COLOR_GRIS_OSCURO,
             bd=2,
-            selectbackground=COLOR_MARRON_OSCURO,
-            selectforeground=COLOR_DORADO,
-            height=10,
-            width=50,
-            yscrollcommand=scrollbar.set
+            relief=tk.SUNKEN,
+            highlightthickness=0,
+            height=10 * ALTO_FILA_PARTIDAS,
+            width=500
         )
-        self.partidas_list.pack(fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.partidas_list.yview)
+        self.partidas_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.indice_partidas = None
+        self._filas_partidas = []  # (fondo, nombre, detalles) de cada fila del canvas, reutilizados
+        self._primera_fila_partidas = 0
+        self._seleccion_partidas = None  # Posición seleccionada en indice_partidas
+        self._vista_previa_pendiente = None
+        
+        self.partidas_canvas.bind("<Configure>", self._redimensionar_lista_partidas)
+        self.partidas_canvas.bind("<Button-1>", self._pulsar_lista_partidas)
+        self.partidas_canvas.bind("<Double-Button-1>", lambda e: self._cargar_partida_seleccionada())
+        for evento in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.partidas_canvas.bind(evento, self._rueda_lista_partidas)
+        for widget in (self.partidas_canvas, busqueda_entry):
+            widget.bind("<Up>", lambda e: self._mover_seleccion_partidas(-1))
+            widget.bind("<Down>", lambda e: self._mover_seleccion_partidas(1))
+            widget.bind("<Prior>", lambda e: self._mover_seleccion_partidas(-self._filas_visibles_partidas()))
+            widget.bind("<Next>", lambda e: self._mover_seleccion_partidas(self._filas_visibles_partidas()))
+            widget.bind("<Return>", lambda e: self._cargar_partida_seleccionada())
         
         # Botones
         botones_frame = tk.Frame(self.carga_frame, bg=COLOR_NEGRO)
@@ -2132,21 +5803,539 @@ class InterfazMansion:
         creditos_texto = tk.Frame(self.creditos_frame, bg=COLOR_NEGRO)
         creditos_texto.pack(fill=tk.BOTH, expand=True, padx=50, pady=10)
         # Texto de créditos
-texto_creditos = (
-    f"{NOMBRE_JUEGO} v{VERSION_JUEGO}\n\n"
-    "Creado por: Diego. Puebla Cuesta"
-    "Programación: Diego. Puebla Cuesta"
-    "Diseño: Diego. Puebla Cuesta"
-    "Historia: Diego. Puebla Cuesta"
-    "© 2025 - Todos los derechos reservados\n\n"
-    "¡Gracias por jugar!"
-)
-
-# Crear el Label para mostrar el texto
-tk.Label(
-    text=texto_creditos,  
-    font=("Arial", 14),
-    fg=COLOR_DORADO,
-    bg=COLOR_NEGRO,
-    justify=tk.LEFT
-).pack(fill=tk.BOTH, expand=True)
+        texto_creditos = (
+            f"{NOMBRE_JUEGO} v{VERSION_JUEGO}\n\n"
+            "Creado por: Diego. Puebla Cuesta\n"
+            "Programación: Diego. Puebla Cuesta\n"
+            "Diseño: Diego. Puebla Cuesta\n"
+            "Historia: Diego. Puebla Cuesta\n"
+            "© 2025 - Todos los derechos reservados\n\n"
+            "¡Gracias por jugar!"
+        )
+        
+        # Crear el Label para mostrar el texto
+        tk.Label(
+            creditos_texto,
+            text=texto_creditos,
+            font=("Arial", 14),
+            fg=COLOR_DORADO,
+            bg=COLOR_NEGRO,
+            justify=tk.LEFT
+        ).pack(fill=tk.BOTH, expand=True)
+        
+        tk.Button(
+            self.creditos_frame,
+            text="Volver",
+            font=("Arial", 14),
+            command=lambda: self.mostrar_pantalla("menu"),
+            bg=COLOR_MARRON_OSCURO,
+            fg=COLOR_DORADO,
+            bd=2,
+            relief=tk.RIDGE,
+            padx=20,
+            pady=5
+        ).pack(side=tk.BOTTOM, pady=20)
+    
+    def mostrar_pantalla(self, nombre):
+        """Muestra la pantalla indicada (construyéndola si hace falta) y oculta las demás"""
+        if nombre not in self.pantallas:
+            constructor, atributo = self._constructores_pantalla[nombre]
+            with self.motor.perfilador.medir(f"crear_pantalla_{nombre}"):
+                constructor()
+            self.pantallas[nombre] = getattr(self, atributo)
+        
+        for frame in self.pantallas.values():
+            frame.pack_forget()
+            
+        if nombre == "carga":
+            self._actualizar_lista_partidas()
+            
+        self.pantallas[nombre].pack(fill=tk.BOTH, expand=True)
+        self.pantalla_actual = nombre
+    
+    def _iniciar_nuevo_juego(self):
+        """Comienza una partida nueva desde el menú"""
+        self.mostrar_pantalla("juego")
+        self.motor.iniciar_nuevo_juego()
+        self._mensajes_mostrados = 0
+        self.mensaje_text.delete("1.0", tk.END)
+        self.actualizar_mensajes()
+        self.actualizar_interfaz()
+    
+    def actualizar_interfaz(self):
+        """Refresca el estado del jugador, el inventario y los objetos cercanos"""
+        if "juego" not in self.pantallas:
+            return
+        jugador = self.motor.jugador
+        self.vida_var.set(f"Vida: {jugador.vida}%")
+        self.cordura_var.set(f"Cordura: {jugador.cordura}%")
+        self.tiempo_var.set(f"Tiempo: {self.motor._formatear_tiempo(self.motor.obtener_tiempo_jugado())}")
+        
+        habitacion = self.motor.obtener_habitacion_actual()
+        self.ubicacion_var.set(habitacion.nombre if habitacion else "Ubicación desconocida")
+        if (habitacion.id if habitacion else None) != self._habitacion_ilustrada:
+            self._mostrar_imagen_habitacion(habitacion)
+        if self.efectos_pantalla.animando(jugador.linterna_activa, jugador.bateria_linterna):
+            self._programar_efectos()
+        elif self._efectos_after is None:
+            # Sin animación solo cambia la viñeta, y solo cuando cambia la cordura
+            self._dibujar_efectos(self.efectos_pantalla.fotograma(0, jugador.cordura))
+        
+        self.inventario_list.delete(0, tk.END)
+        for item in jugador.inventario:
+            cantidad = f" (x{item.cantidad})" if item.cantidad > 1 else ""
+            self.inventario_list.insert(tk.END, f"{item.nombre}{cantidad}")
+            
+        self.objetos_list.delete(0, tk.END)
+        if habitacion:
+            for item in habitacion.items:
+                self.objetos_list.insert(tk.END, item.nombre)
+    
+    def _ruta_imagen(self, elemento):
+        """Ruta de la ilustración de una habitación o item, o None si no tiene"""
+        return self.imagenes.ruta(elemento.imagen or elemento.id) if elemento else None
+    
+    def _mostrar_imagen_habitacion(self, habitacion):
+        """Muestra la ilustración de la habitación y precarga las de sus vecinas y sus objetos"""
+        hab_id = self._habitacion_ilustrada = habitacion.id if habitacion else None
+        ruta = self._ruta_imagen(habitacion)
+        imagen = None
+        if ruta:
+            def al_cargar(imagen):
+                if self._habitacion_ilustrada == hab_id:
+                    self._mostrar_escena(imagen, habitacion.nombre)
+            imagen = self.imagenes.obtener(ruta, al_cargar)
+        self._mostrar_escena(imagen, habitacion.nombre if habitacion else "")
+        
+        if habitacion:
+            vecinas = (self.motor.habitaciones.get(destino) for destino in habitacion.conexiones.values())
+            self.imagenes.precargar([self._ruta_imagen(vecina) for vecina in vecinas] +
+                                    [self._ruta_imagen(item) for item in habitacion.items])
+        self._programar_imagenes()
+    
+    def _mostrar_escena(self, imagen, titulo):
+        """Pone la ilustración en la escena, o el nombre de la habitación si no hay"""
+        self.escena_canvas.itemconfigure(self._escena_imagen, image=imagen or "")
+        self.escena_canvas.itemconfigure(self._escena_titulo, text="" if imagen else titulo)
+        alto = imagen.height() if imagen else ALTO_ESCENA_SIN_IMAGEN
+        if int(self.escena_canvas.cget("height")) != alto:
+            self.escena_canvas.configure(height=alto)  # <Configure> recoloca los elementos
+    
+    def _colocar_escena(self, event=None):
+        """Ajusta los elementos de la escena a su tamaño actual"""
+        ancho, alto = self.escena_canvas.winfo_width(), self.escena_canvas.winfo_height()
+        self.escena_canvas.coords(self._escena_imagen, ancho / 2, alto / 2)
+        self.escena_canvas.coords(self._escena_titulo, ancho / 2, alto / 2)
+        for elemento in (self._escena_parpadeo, self._escena_destello):
+            self.escena_canvas.coords(elemento, 0, 0, ancho, alto)
+        self._ultimo_estado_efectos = None
+        self._dibujar_efectos(self.efectos_pantalla.fotograma(0, self.motor.jugador.cordura))
+    
+    def al_susto(self, intensidad):
+        """Llamado por el motor en cada susto: destello y temblor de la escena"""
+        self.efectos_pantalla.susto(intensidad)
+        # Puede llegar desde el hilo del temporizador; el bucle de efectos corre en el de Tk
+        self.root.after(0, self._programar_efectos)
+    
+    def _programar_efectos(self):
+        """Arranca el bucle de efectos a ritmo fijo si no está en marcha"""
+        if self._efectos_after is None and "juego" in self.pantallas:
+            self._efectos_after = self.root.after(1000 // FOTOGRAMAS_POR_SEGUNDO_EFECTOS, self._fotograma_efectos)
+    
+    def _fotograma_efectos(self):
+        """Dibuja un fotograma de efectos y mide lo que cuesta frente al presupuesto de la calidad"""
+        self._efectos_after = None
+        jugador = self.motor.jugador
+        inicio = time.perf_counter()
+        efectos = self.efectos_pantalla
+        estado = efectos.fotograma(1 / FOTOGRAMAS_POR_SEGUNDO_EFECTOS, jugador.cordura,
+                                   jugador.linterna_activa, jugador.bateria_linterna)
+        self._dibujar_efectos(estado)
+        self.escena_canvas.update_idletasks()
+        ms = (time.perf_counter() - inicio) * 1000
+        self.motor.perfilador.registrar("efectos_pantalla", ms)
+        efectos.registrar_tiempo(ms)
+        if efectos.animando(jugador.linterna_activa, jugador.bateria_linterna) and self.pantalla_actual == "juego":
+            self._programar_efectos()
+        else:
+            self._dibujar_efectos(efectos.fotograma(0, jugador.cordura))
+    
+    def _dibujar_efectos(self, estado):
+        """Aplica un estado de EfectosPantalla a los elementos ya creados de la escena"""
+        if estado == self._ultimo_estado_efectos:
+            return
+        self._ultimo_estado_efectos = estado
+        canvas = self.escena_canvas
+        ancho, alto = canvas.winfo_width(), canvas.winfo_height()
+        
+        dx, dy = estado["temblor"]
+        canvas.coords(self._escena_imagen, ancho / 2 + dx, alto / 2 + dy)
+        canvas.coords(self._escena_titulo, ancho / 2 + dx, alto / 2 + dy)
+        
+        anillos = self.efectos_pantalla.anillos_vineta if estado["vineta"] else 0
+        grosor = estado["vineta"] / max(1, anillos)
+        for anillo, bandas in enumerate(self._escena_vineta):
+            if anillo >= anillos:
+                for banda in bandas:
+                    canvas.itemconfigure(banda, state=tk.HIDDEN)
+                continue
+            fuera, dentro = anillo * grosor, (anillo + 1) * grosor
+            # Los anillos interiores usan tramas más claras: el borde queda más oscuro que el centro
+            posiciones = ((fuera, fuera, ancho - fuera, dentro), (fuera, alto - dentro, ancho - fuera, alto - fuera),
+                          (fuera, dentro, dentro, alto - dentro), (ancho - dentro, dentro, ancho - fuera, alto - dentro))
+            for banda, posicion in zip(bandas, posiciones):
+                canvas.coords(banda, *posicion)
+                canvas.itemconfigure(banda, state=tk.DISABLED)
+        
+        canvas.itemconfigure(self._escena_parpadeo, state=tk.DISABLED if estado["parpadeo"] else tk.HIDDEN)
+        if estado["destello"]:
+            canvas.itemconfigure(self._escena_destello, state=tk.DISABLED, stipple=estado["destello"])
+        else:
+            canvas.itemconfigure(self._escena_destello, state=tk.HIDDEN)
+    
+    def _mostrar_imagen_item(self, event):
+        """Muestra la ilustración del objeto seleccionado en el inventario o en la habitación"""
+        if event.widget is self.inventario_list:
+            items = self.motor.jugador.inventario
+        else:
+            habitacion = self.motor.obtener_habitacion_actual()
+            items = habitacion.items if habitacion else []
+        item = self._item_seleccionado(event.widget, items)
+        ruta = self._ruta_imagen(item)
+        imagen = None
+        if ruta:
+            def al_cargar(imagen):
+                self.imagen_item_label.configure(image=imagen or "")
+            imagen = self.imagenes.obtener(ruta, al_cargar)
+        self.imagen_item_label.configure(image=imagen or "")
+        self._programar_imagenes()
+    
+    def _programar_imagenes(self):
+        """Recoge las imágenes decodificadas mientras quede alguna pendiente"""
+        if self._imagenes_after is None and self.imagenes.pendientes():
+            self._imagenes_after = self.root.after(15, self._procesar_imagenes)
+    
+    def _procesar_imagenes(self):
+        self._imagenes_after = None
+        self.imagenes.procesar_listas()
+        self._programar_imagenes()
+    
+    def actualizar_mensajes(self):
+        """Añade al área de texto los mensajes nuevos del motor"""
+        if "juego" not in self.pantallas or self._agrupando_mensajes:
+            return
+        historia = self.motor.historia
+        mostrados = getattr(self, "_mensajes_mostrados", 0)
+        if mostrados > len(historia):
+            # La historia se ha reiniciado (partida nueva o cargada)
+            self.mensaje_text.delete("1.0", tk.END)
+            mostrados = 0
+            
+        for mensaje in historia[mostrados:]:
+            self.mensaje_text.insert(tk.END, mensaje + "\n\n")
+        self._mensajes_mostrados = len(historia)
+        self.mensaje_text.see(tk.END)
+    
+    def _item_seleccionado(self, lista, items):
+        """Devuelve el item seleccionado en una lista o None"""
+        seleccion = lista.curselection()
+        if not seleccion or seleccion[0] >= len(items):
+            return None
+        return items[seleccion[0]]
+    
+    def interactuar(self):
+        """Recoge el objeto seleccionado o examina la habitación"""
+        habitacion = self.motor.obtener_habitacion_actual()
+        if habitacion and self._item_seleccionado(self.objetos_list, habitacion.items):
+            self._accion_recoger()
+        else:
+            self.motor.examinar()
+    
+    def _accion_examinar(self):
+        """Examina el objeto seleccionado o la habitación"""
+        habitacion = self.motor.obtener_habitacion_actual()
+        item = self._item_seleccionado(self.objetos_list, habitacion.items) if habitacion else None
+        if not item:
+            item = self._item_seleccionado(self.inventario_list, self.motor.jugador.inventario)
+        self.motor.examinar(item.id if item else None)
+        self.actualizar_interfaz()
+    
+    def _accion_recoger(self):
+        """Recoge el objeto seleccionado de la habitación"""
+        habitacion = self.motor.obtener_habitacion_actual()
+        item = self._item_seleccionado(self.objetos_list, habitacion.items) if habitacion else None
+        if not item:
+            self.motor.agregar_mensaje("Selecciona un objeto cercano para recogerlo.")
+            return
+        self.motor.recoger_item(item.id)
+        self.actualizar_interfaz()
+    
+    def _accion_usar(self):
+        """Usa el objeto seleccionado del inventario"""
+        item = self._item_seleccionado(self.inventario_list, self.motor.jugador.inventario)
+        if not item:
+            self.motor.agregar_mensaje("Selecciona un objeto del inventario para usarlo.")
+            return
+        self.motor.usar_item(item.id)
+        self.actualizar_interfaz()
+    
+    def _accion_moverse(self):
+        """Pregunta la dirección y mueve al jugador"""
+        habitacion = self.motor.obtener_habitacion_actual()
+        if not habitacion:
+            return
+        salidas = ", ".join(habitacion.conexiones.keys())
+        direccion = simpledialog.askstring("Moverse", f"¿Hacia dónde? ({salidas})", parent=self.root)
+        if direccion:
+            self.motor.mover_jugador(direccion.strip().lower())
+            self.actualizar_interfaz()
+    
+    def _mostrar_menu_pausa(self):
+        """Pausa el juego y muestra el menú de pausa"""
+        if self.motor.juego_terminado:
+            self.mostrar_pantalla("menu")
+            return
+        self.motor.pausar_juego()
+        
+        ventana = tk.Toplevel(self.root, bg=COLOR_NEGRO)
+        ventana.title("Pausa")
+        ventana.transient(self.root)
+        ventana.grab_set()
+        
+        def reanudar():
+            ventana.destroy()
+            self.motor.reanudar_juego()
+            
+        def guardar():
+            slot = simpledialog.askinteger("Guardar partida", "Número de ranura:", parent=ventana, minvalue=1)
+            if slot is not None:
+                self.motor.guardar_partida(slot)
+                messagebox.showinfo("Guardar partida", "Partida guardada correctamente.", parent=ventana)
+                
+        def salir():
+            ventana.destroy()
+            self.motor.sistema_sonido.detener_todos_sonidos()
+            self.mostrar_pantalla("menu")
+        
+        for texto, comando in [("Reanudar", reanudar), ("Guardar", guardar), ("Menú principal", salir)]:
+            tk.Button(
+                ventana,
+                text=texto,
+                font=("Arial", 14),
+                command=comando,
+                bg=COLOR_MARRON_OSCURO,
+                fg=COLOR_DORADO,
+                bd=2,
+                relief=tk.RIDGE,
+                width=15
+            ).pack(padx=30, pady=8)
+        ventana.protocol("WM_DELETE_WINDOW", reanudar)
+    
+    def _guardar_opciones(self):
+        """Aplica y guarda las opciones elegidas"""
+        self.configuracion.volumen_musica = self.musica_scale.get()
+        self.configuracion.volumen_efectos = self.efectos_scale.get()
+        self.configuracion.dificultad = self.dificultad_var.get()
+        self.configuracion.subtitulos = self.subtitulos_var.get()
+        self.configuracion.calidad_graficos = self.calidad_var.get()
+        self.efectos_pantalla.cambiar_calidad(self.configuracion.calidad_graficos)
+        
+        pantalla_completa = self.pantalla_completa_var.get()
+        if pantalla_completa != self.configuracion.pantalla_completa:
+            self.root.attributes('-fullscreen', pantalla_completa)
+        self.configuracion.pantalla_completa = pantalla_completa
+        
+        self.configuracion.guardar_configuracion()
+        self.mostrar_pantalla("menu")
+    
+    def _actualizar_lista_partidas(self):
+        """Rehace el índice de partidas guardadas conservando el orden y la búsqueda"""
+        self.motor.esperar_persistencia()
+        anterior = self.indice_partidas
+        self.indice_partidas = IndicePartidas(self.motor.gestor_guardado.partidas_guardadas,
+                                              *((anterior.orden, anterior.descendente) if anterior is not None else ()))
+        self.indice_partidas.buscar(self.busqueda_partidas_var.get())
+        self._primera_fila_partidas = 0
+        self._seleccionar_partida(0 if self.indice_partidas else None)
+    
+    def _filas_visibles_partidas(self):
+        return max(1, self.partidas_canvas.winfo_height() // ALTO_FILA_PARTIDAS)
+    
+    def _redimensionar_lista_partidas(self, event=None):
+        """Crea los elementos de las filas que caben en el canvas y los ajusta a su ancho"""
+        canvas = self.partidas_canvas
+        while len(self._filas_partidas) < self._filas_visibles_partidas() + 1:
+            centro = len(self._filas_partidas) * ALTO_FILA_PARTIDAS + ALTO_FILA_PARTIDAS // 2
+            self._filas_partidas.append((
+                canvas.create_rectangle(0, 0, 0, 0, fill="", outline=""),
+                canvas.create_text(8, centro, anchor="w", font=("Arial", 12), fill=COLOR_BLANCO_ANTIGUO),
+                canvas.create_text(0, centro, anchor="e", font=("Arial", 11), fill=COLOR_PLATA)
+            ))
+        ancho = canvas.winfo_width()
+        for fila, (fondo, _, detalles) in enumerate(self._filas_partidas):
+            y = fila * ALTO_FILA_PARTIDAS
+            canvas.coords(fondo, 0, y, ancho, y + ALTO_FILA_PARTIDAS)
+            canvas.coords(detalles, ancho - 8, y + ALTO_FILA_PARTIDAS // 2)
+        self._dibujar_lista_partidas()
+    
+    def _dibujar_lista_partidas(self):
+        """Pinta las filas visibles reutilizando los elementos del canvas"""
+        canvas = self.partidas_canvas
+        total = len(self.indice_partidas) if self.indice_partidas else 0
+        visibles = self._filas_visibles_partidas()
+        primera = self._primera_fila_partidas = max(0, min(self._primera_fila_partidas, total - visibles))
+        cabeceras = self.indice_partidas.filas(primera, primera + len(self._filas_partidas)) if total else []
+        for fila, (fondo, nombre, detalles) in enumerate(self._filas_partidas):
+            if fila < len(cabeceras):
+                cabecera = cabeceras[fila]
+                seleccionada = primera + fila == self._seleccion_partidas
+                canvas.itemconfigure(fondo, fill=COLOR_MARRON_OSCURO if seleccionada else "")
+                canvas.itemconfigure(nombre, text=f"[{cabecera.slot}] {cabecera.nombre}",
+                                     fill=COLOR_DORADO if seleccionada else COLOR_BLANCO_ANTIGUO)
+                canvas.itemconfigure(detalles, text=f"{cabecera.fecha}   {self.motor._formatear_tiempo(cabecera.tiempo_jugado)}"
+                                                    f"   {cabecera.dificultad}")
+            else:
+                canvas.itemconfigure(fondo, fill="")
+                canvas.itemconfigure(nombre, text="")
+                canvas.itemconfigure(detalles, text="")
+        if total:
+            self.partidas_scrollbar.set(primera / total, min(1.0, (primera + visibles) / total))
+        else:
+            self.partidas_scrollbar.set(0.0, 1.0)
+        
+        # El botón del orden activo indica el sentido
+        for orden, texto in ORDENES_PARTIDAS:
+            if self.indice_partidas is not None and orden == self.indice_partidas.orden:
+                texto += " ▼" if self.indice_partidas.descendente else " ▲"
+            self.botones_orden_partidas[orden].config(text=texto)
+    
+    def _desplazar_partidas(self, accion, cantidad, unidad=None):
+        """Órdenes de la barra de desplazamiento ("moveto" o "scroll" por filas o páginas)"""
+        total = len(self.indice_partidas) if self.indice_partidas else 0
+        if accion == "moveto":
+            self._primera_fila_partidas = int(float(cantidad) * total)
+        else:
+            paso = self._filas_visibles_partidas() if unidad == "pages" else 1
+            self._primera_fila_partidas += int(cantidad) * paso
+        self._dibujar_lista_partidas()
+    
+    def _rueda_lista_partidas(self, event):
+        arriba = event.num == 4 or event.delta > 0
+        self._desplazar_partidas("scroll", -3 if arriba else 3, "units")
+    
+    def _pulsar_lista_partidas(self, event):
+        self.partidas_canvas.focus_set()
+        posicion = self._primera_fila_partidas + event.y // ALTO_FILA_PARTIDAS
+        if self.indice_partidas and posicion < len(self.indice_partidas):
+            self._seleccionar_partida(posicion)
+    
+    def _mover_seleccion_partidas(self, paso):
+        total = len(self.indice_partidas) if self.indice_partidas else 0
+        if total:
+            actual = self._seleccion_partidas if self._seleccion_partidas is not None else -1
+            self._seleccionar_partida(max(0, min(total - 1, actual + paso)))
+        return "break"
+    
+    def _seleccionar_partida(self, posicion):
+        """Selecciona una fila, la hace visible y programa su vista previa"""
+        self._seleccion_partidas = posicion
+        if posicion is not None:
+            visibles = self._filas_visibles_partidas()
+            if posicion < self._primera_fila_partidas:
+                self._primera_fila_partidas = posicion
+            elif posicion >= self._primera_fila_partidas + visibles:
+                self._primera_fila_partidas = posicion - visibles + 1
+        self._dibujar_lista_partidas()
+        # Al mantener pulsada una flecha no se calcula la vista previa de cada fila que pasa
+        if self._vista_previa_pendiente is not None:
+            self.root.after_cancel(self._vista_previa_pendiente)
+        self._vista_previa_pendiente = self.root.after(RETARDO_VISTA_PREVIA_MS, self._mostrar_vista_previa)
+    
+    def _mostrar_vista_previa(self):
+        """Muestra la habitación, el estado y los objetos de la partida seleccionada"""
+        self._vista_previa_pendiente = None
+        slot = self._slot_seleccionado()
+        if slot is None:
+            self.vista_previa_label.config(text="")
+            return
+        previa = self.indice_partidas.vista_previa(self.indice_partidas.fila(self._seleccion_partidas))
+        objetos = previa["objetos"]
+        lineas = [
+            f"Habitación: {previa['habitacion']}",
+            f"Vida: {previa['vida']}   Cordura: {previa['cordura']}",
+            f"Objetos ({len(objetos)}):"
+        ]
+        lineas += [f"  • {objeto}" for objeto in objetos[:8]]
+        if len(objetos) > 8:
+            lineas.append(f"  y {len(objetos) - 8} más")
+        self.vista_previa_label.config(text="\n".join(lineas))
+    
+    def _buscar_partidas(self, *args):
+        """Filtra la lista mientras se escribe"""
+        if self.indice_partidas is None:
+            return
+        self.indice_partidas.buscar(self.busqueda_partidas_var.get())
+        self._primera_fila_partidas = 0
+        self._seleccionar_partida(0 if self.indice_partidas else None)
+    
+    def _ordenar_partidas(self, orden):
+        """Ordena por la columna indicada; pulsar otra vez invierte el sentido"""
+        indice = self.indice_partidas
+        if indice is None:
+            return
+        slot = self._slot_seleccionado()
+        indice.ordenar(orden, not indice.descendente if orden == indice.orden else True)
+        self._seleccionar_partida(indice.posicion(slot))
+    
+    def _slot_seleccionado(self):
+        """Devuelve el slot de la partida seleccionada o None"""
+        posicion = self._seleccion_partidas
+        if self.indice_partidas is None or posicion is None or posicion >= len(self.indice_partidas):
+            return None
+        return self.indice_partidas.fila(posicion).slot
+    
+    def _cargar_partida_seleccionada(self):
+        """Carga la partida seleccionada en la lista"""
+        slot = self._slot_seleccionado()
+        if slot is None:
+            messagebox.showwarning("Cargar partida", "Selecciona una partida.")
+            return
+        if self.motor.cargar_partida(slot):
+            self.mostrar_pantalla("juego")
+            self._mensajes_mostrados = 0
+            self.mensaje_text.delete("1.0", tk.END)
+            self.actualizar_mensajes()
+            self.actualizar_interfaz()
+    
+    def _eliminar_partida_seleccionada(self):
+        """Elimina la partida seleccionada en la lista"""
+        slot = self._slot_seleccionado()
+        if slot is None:
+            return
+        if messagebox.askyesno("Eliminar partida", "¿Seguro que quieres eliminar esta partida?"):
+            self.motor.gestor_guardado.eliminar_partida(slot)
+            self._actualizar_lista_partidas()
+    
+    def mostrar_resultado(self, titulo, mensaje, puntuacion):
+        """Muestra el resultado final y registra la puntuación"""
+        messagebox.showinfo(titulo, mensaje)
+        nombre = simpledialog.askstring("Puntuación", "Introduce tu nombre:", parent=self.root)
+        if nombre:
+            self.motor.esperar_persistencia()
+            jugador = self.motor.jugador
+            self.motor.sistema_puntuacion.agregar_puntuacion(
+                nombre,
+                puntuacion,
+                jugador.tiempo_jugado,
+                jugador.items_encontrados,
+                titulo == "¡VICTORIA!",
+                self.configuracion.dificultad,
+                jugador.detalles_puntuacion()
+            )
+        self.mostrar_pantalla("menu")
+
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    app = InterfazMansion(root)
+    root.mainloop()
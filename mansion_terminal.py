@@ -0,0 +1,325 @@
+"""Interfaz de terminal (curses) para La Mansión Embrujada
+
+Usa el mismo MotorJuego que la interfaz Tk, pero no necesita servidor gráfico:
+pensada para consolas de mantenimiento y equipos con muchas sesiones.
+
+Uso:
+    python mansion_terminal.py
+"""
+
+import curses
+import sys
+import textwrap
+import threading
+
+from main import (Configuracion, MotorJuego, NOMBRE_JUEGO, VERSION_JUEGO, REGISTRO_ARCHIVO,
+                  configurar_registro, configurar_telemetria, salida_musica_predeterminada)
+
+# Teclas de movimiento (además de las configuradas en Configuracion.controles)
+TECLAS_DIRECCION = {
+    curses.KEY_UP: "norte",
+    curses.KEY_DOWN: "sur",
+    curses.KEY_LEFT: "oeste",
+    curses.KEY_RIGHT: "este",
+    ord("<"): "arriba",
+    ord(">"): "abajo"
+}
+
+AYUDA = ("wasd/flechas: mover  </>: subir/bajar  e: examinar  r: recoger  u: usar  "
+         "i: inventario  f: linterna  g: guardar  c: cargar  p: pausa  q: salir")
+
+
+class InterfazTerminal:
+    """Interfaz de texto basada en curses que controla un MotorJuego"""
+
+    def __init__(self, pantalla):
+        self.pantalla = pantalla
+        self.root = None  # El sistema de sonido no tiene campana de Tk en terminal
+        self.configuracion = Configuracion()
+        configurar_registro(self.configuracion.niveles_registro)
+        self.motor = MotorJuego(self.configuracion)
+        self.motor.set_ui(self)
+        salida = salida_musica_predeterminada()
+        if salida is not None:
+            self.motor.sistema_sonido.activar_musica(salida)
+            self.motor.sistema_sonido.cargar_banco_efectos()
+        self.teclas_direccion = dict(TECLAS_DIRECCION)
+        for control, direccion in (("arriba", "norte"), ("abajo", "sur"), ("izquierda", "oeste"), ("derecha", "este")):
+            tecla = self.configuracion.controles.get(control, "")
+            if len(tecla) == 1:
+                self.teclas_direccion[ord(tecla)] = direccion
+        self._redibujar = threading.Event()
+        self._resultado = None  # (titulo, mensaje, puntuacion) al terminar la partida
+        self.en_partida = False
+
+        curses.curs_set(0)
+        self.pantalla.keypad(True)
+        self.pantalla.timeout(200)  # getch no bloquea más de 200 ms
+        if curses.has_colors():
+            curses.start_color()
+            curses.use_default_colors()
+            curses.init_pair(1, curses.COLOR_YELLOW, -1)
+            curses.init_pair(2, curses.COLOR_RED, -1)
+        self.color_titulo = curses.color_pair(1) | curses.A_BOLD if curses.has_colors() else curses.A_BOLD
+        self.color_alerta = curses.color_pair(2) if curses.has_colors() else curses.A_NORMAL
+
+    # --- Métodos llamados por el motor (pueden venir del hilo del temporizador) ---
+
+    def actualizar_interfaz(self):
+        """Pide redibujar la pantalla en el bucle principal"""
+        self._redibujar.set()
+
+    def actualizar_mensajes(self):
+        """Pide redibujar el registro de mensajes"""
+        self._redibujar.set()
+
+    def mostrar_resultado(self, titulo, mensaje, puntuacion):
+        """Guarda el resultado final para mostrarlo en el bucle principal"""
+        self._resultado = (titulo, mensaje, puntuacion)
+        self._redibujar.set()
+
+    # --- Utilidades de dibujo ---
+
+    def _escribir(self, y, x, texto, atributos=curses.A_NORMAL):
+        """Escribe texto recortado al tamaño de la ventana"""
+        alto, ancho = self.pantalla.getmaxyx()
+        if 0 <= y < alto and 0 <= x < ancho:
+            try:
+                self.pantalla.addnstr(y, x, texto, ancho - x - 1, atributos)
+            except curses.error:
+                pass
+
+    def _pedir_texto(self, pregunta):
+        """Pide una línea de texto en la parte inferior de la pantalla"""
+        alto, _ = self.pantalla.getmaxyx()
+        self.pantalla.move(alto - 1, 0)
+        self.pantalla.clrtoeol()
+        self._escribir(alto - 1, 0, pregunta, self.color_titulo)
+        curses.echo()
+        curses.curs_set(1)
+        self.pantalla.timeout(-1)
+        try:
+            respuesta = self.pantalla.getstr(alto - 1, len(pregunta) + 1, 40)
+        finally:
+            curses.noecho()
+            curses.curs_set(0)
+            self.pantalla.timeout(200)
+        return respuesta.decode("utf-8", "ignore").strip()
+
+    def _elegir(self, titulo, opciones):
+        """Muestra una lista numerada y devuelve el índice elegido o None"""
+        if not opciones:
+            return None
+        self.pantalla.erase()
+        self._escribir(0, 0, titulo, self.color_titulo)
+        for i, texto in enumerate(opciones[:9]):
+            self._escribir(2 + i, 2, f"{i + 1}. {texto}")
+        self._escribir(3 + min(len(opciones), 9), 2, "Número para elegir, cualquier otra tecla para cancelar")
+        self.pantalla.timeout(-1)
+        try:
+            tecla = self.pantalla.getch()
+        finally:
+            self.pantalla.timeout(200)
+        self._redibujar.set()
+        if ord("1") <= tecla < ord("1") + min(len(opciones), 9):
+            return tecla - ord("1")
+        return None
+
+    def dibujar(self):
+        """Dibuja el estado de la partida"""
+        self.pantalla.erase()
+        alto, ancho = self.pantalla.getmaxyx()
+        motor = self.motor
+        jugador = motor.jugador
+        habitacion = motor.obtener_habitacion_actual()
+
+        # Barra de estado
+        nombre = habitacion.nombre if habitacion else "Ubicación desconocida"
+        self._escribir(0, 0, nombre, self.color_titulo)
+        estado = (f"Vida: {jugador.vida}%  Cordura: {jugador.cordura}%  "
+                  f"Tiempo: {motor._formatear_tiempo(motor.obtener_tiempo_jugado())}")
+        if jugador.linterna_activa:
+            estado += f"  Linterna: {jugador.bateria_linterna}%"
+        if motor.juego_pausado:
+            estado += "  [PAUSA]"
+        self._escribir(1, 0, estado, self.color_alerta if jugador.vida < 30 else curses.A_NORMAL)
+
+        # Panel derecho: inventario, objetos y salidas
+        ancho_panel = min(30, ancho // 3)
+        x_panel = ancho - ancho_panel
+        fila = 3
+        self._escribir(fila, x_panel, "Inventario", self.color_titulo)
+        for item in jugador.inventario:
+            fila += 1
+            cantidad = f" (x{item.cantidad})" if item.cantidad > 1 else ""
+            self._escribir(fila, x_panel, f"- {item.nombre}{cantidad}")
+        fila += 2
+        self._escribir(fila, x_panel, "Objetos cercanos", self.color_titulo)
+        for item in (habitacion.items if habitacion else []):
+            fila += 1
+            self._escribir(fila, x_panel, f"- {item.nombre}")
+        fila += 2
+        self._escribir(fila, x_panel, "Salidas", self.color_titulo)
+        for direccion in (habitacion.conexiones if habitacion else {}):
+            fila += 1
+            self._escribir(fila, x_panel, f"- {direccion.capitalize()}")
+
+        # Registro de mensajes: solo se envuelven los últimos que caben
+        ancho_texto = max(10, x_panel - 2)
+        filas_texto = max(1, alto - 6)
+        lineas = []
+        for mensaje in reversed(motor.historia):
+            lineas[:0] = textwrap.wrap(mensaje, ancho_texto) + [""]
+            if len(lineas) >= filas_texto:
+                break
+        for i, linea in enumerate(lineas[-filas_texto:]):
+            self._escribir(3 + i, 0, linea)
+
+        self._escribir(alto - 1, 0, AYUDA)
+        self.pantalla.refresh()
+
+    # --- Acciones ---
+
+    def _recoger(self):
+        habitacion = self.motor.obtener_habitacion_actual()
+        items = habitacion.items if habitacion else []
+        indice = self._elegir("¿Qué quieres recoger?", [item.nombre for item in items])
+        if indice is not None:
+            self.motor.recoger_item(items[indice].id)
+
+    def _usar(self):
+        items = self.motor.jugador.inventario
+        indice = self._elegir("¿Qué quieres usar?", [item.nombre for item in items])
+        if indice is not None:
+            self.motor.usar_item(items[indice].id)
+
+    def _examinar(self):
+        objetivo = self._pedir_texto("Examinar (vacío = habitación):")
+        self.motor.examinar(objetivo or None)
+
+    def _guardar(self):
+        slot = self._pedir_texto("Ranura donde guardar:")
+        if slot.isdigit():
+            self.motor.guardar_partida(int(slot))
+            self.motor.agregar_mensaje(f"Partida guardada en la ranura {slot}.")
+
+    def _cargar(self):
+        partidas = self.motor.gestor_guardado.partidas_guardadas
+        indice = self._elegir("Cargar partida", [
+            f"[{p.get('slot')}] {p.get('nombre', '')} - {p.get('fecha', '')}" for p in partidas
+        ])
+        if indice is None:
+            return False
+        return self.motor.cargar_partida(partidas[indice].get("slot"))
+
+    def _procesar_tecla(self, tecla):
+        """Ejecuta la acción asociada a una tecla durante la partida"""
+        motor = self.motor
+        if tecla == ord("p"):
+            if motor.juego_pausado:
+                motor.reanudar_juego()
+            else:
+                motor.pausar_juego()
+            return
+        if motor.juego_pausado:
+            return
+
+        if tecla in self.teclas_direccion:
+            motor.mover_jugador(self.teclas_direccion[tecla])
+        elif tecla == ord("e"):
+            self._examinar()
+        elif tecla == ord("r"):
+            self._recoger()
+        elif tecla == ord("u"):
+            self._usar()
+        elif tecla == ord("i"):
+            motor.inventario()
+        elif tecla == ord("f"):
+            if motor.jugador.tiene_item("linterna"):
+                motor.usar_item("linterna")
+        elif tecla == ord("g"):
+            self._guardar()
+        elif tecla == ord("c"):
+            self._cargar()
+
+    def _mostrar_resultado_final(self):
+        """Muestra el resultado y registra la puntuación"""
+        titulo, mensaje, puntuacion = self._resultado
+        self._resultado = None
+        self.pantalla.erase()
+        self._escribir(0, 0, titulo, self.color_titulo)
+        for i, linea in enumerate(mensaje.splitlines()):
+            self._escribir(2 + i, 0, linea)
+        nombre = self._pedir_texto("Tu nombre para la tabla de puntuaciones:")
+        if nombre:
+            jugador = self.motor.jugador
+            self.motor.sistema_puntuacion.agregar_puntuacion(
+                nombre,
+                puntuacion,
+                jugador.tiempo_jugado,
+                jugador.items_encontrados,
+                titulo == "¡VICTORIA!",
+                self.configuracion.dificultad,
+                jugador.detalles_puntuacion()
+            )
+        self.en_partida = False
+
+    def _menu_principal(self):
+        """Muestra el menú principal; devuelve False si el jugador quiere salir"""
+        opcion = self._elegir(f"{NOMBRE_JUEGO} v{VERSION_JUEGO}", ["Nuevo juego", "Cargar partida", "Salir"])
+        self._redibujar.set()
+        if opcion == 0:
+            self.motor.iniciar_nuevo_juego()
+            self.en_partida = True
+        elif opcion == 1:
+            self.en_partida = self._cargar()
+        elif opcion == 2:
+            return False
+        return True
+
+    def ejecutar(self):
+        """Bucle principal de la interfaz"""
+        try:
+            while True:
+                if not self.en_partida:
+                    if not self._menu_principal():
+                        break
+                    continue
+
+                if self._resultado:
+                    self._mostrar_resultado_final()
+                    continue
+
+                # Solo se redibuja cuando el motor o el jugador cambian algo
+                if self._redibujar.is_set():
+                    self._redibujar.clear()
+                    self.dibujar()
+                tecla = self.pantalla.getch()
+                if tecla == -1:
+                    continue
+                if tecla == ord("q"):
+                    self.motor.pausar_juego()
+                    self.en_partida = False
+                    continue
+                self._procesar_tecla(tecla)
+                self._redibujar.set()
+        finally:
+            self.motor.sistema_sonido.detener_todos_sonidos()
+            if self.motor.timer_actualizacion:
+                self.motor.timer_actualizacion.cancel()
+
+
+def _ejecutar(pantalla):
+    InterfazTerminal(pantalla).ejecutar()
+
+
+def main_terminal():
+    # El registro va a un archivo para no romper la pantalla de curses
+    configurar_registro(destino=REGISTRO_ARCHIVO)
+    configurar_telemetria()
+    curses.wrapper(_ejecutar)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_terminal())
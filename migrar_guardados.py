@@ -0,0 +1,105 @@
+"""Migra en bloque archivos de partidas guardadas a la versión actual del juego
+
+Recorre los archivos (o directorios, buscando en ellos mansion_guardado*.json)
+y los reparte entre varios procesos. Cada archivo se comprueba primero leyendo
+solo su cabecera: los que ya están en VERSION_JUEGO no se analizan ni se
+reescriben. Los demás pasan por migrar_guardado y se reescriben de forma
+atómica, así que un corte a medias deja el archivo original intacto.
+
+Uso:
+    python migrar_guardados.py partidas/                 Todos los guardados del directorio
+    python migrar_guardados.py a.json b.json --procesos 8
+    python migrar_guardados.py partidas/ --comprobar     Solo cuenta los que hay que migrar
+
+Termina con código 1 si algún archivo no se ha podido migrar o, con
+--comprobar, si queda alguno pendiente.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import main
+
+PATRON_GUARDADO = "mansion_guardado*.json"
+TAMANO_CABECERA = 256  # Bytes que se leen para conocer la versión de un archivo
+ARCHIVOS_POR_TAREA = 64  # Archivos que recibe cada proceso de una vez
+_CABECERA = re.compile(rb'\s*\{\s*"version"\s*:\s*"([^"]*)"')
+
+
+def version_cabecera(ruta):
+    """Versión del archivo según su cabecera; los guardados sin cabecera son VERSION_GUARDADO_INICIAL"""
+    with open(ruta, 'rb') as f:
+        coincidencia = _CABECERA.match(f.read(TAMANO_CABECERA))
+    return coincidencia.group(1).decode('utf-8') if coincidencia else main.VERSION_GUARDADO_INICIAL
+
+
+def buscar_guardados(rutas, patron=PATRON_GUARDADO):
+    """Archivos indicados y, en los directorios, los que cumplen el patrón (recursivamente)"""
+    for ruta in rutas:
+        if not os.path.isdir(ruta):
+            yield ruta
+            continue
+        for directorio, _, archivos in os.walk(ruta):
+            for archivo in sorted(fnmatch.filter(archivos, patron)):
+                yield os.path.join(directorio, archivo)
+
+
+def migrar_archivo(ruta, comprobar=False):
+    """Migra un archivo; devuelve (ruta, estado, partidas migradas, error)
+
+    El estado es "al_dia", "pendiente" (con comprobar), "migrado" o "error".
+    """
+    try:
+        if version_cabecera(ruta) == main.VERSION_JUEGO:
+            return ruta, "al_dia", 0, None
+        if comprobar:
+            return ruta, "pendiente", 0, None
+        with open(ruta, 'r', encoding='utf-8') as f:
+            partidas, migradas = main.migrar_guardado(json.load(f))
+        main.escribir_guardado(ruta, partidas)
+        return ruta, "migrado", migradas, None
+    except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+        return ruta, "error", 0, str(e)
+
+
+def migrar_archivos(rutas, procesos=None, comprobar=False):
+    """Migra los archivos en paralelo y devuelve los resultados de migrar_archivo en orden"""
+    rutas = list(rutas)
+    if procesos == 1 or len(rutas) <= 1:
+        return [migrar_archivo(ruta, comprobar) for ruta in rutas]
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        return list(ejecutor.map(migrar_archivo, rutas, [comprobar] * len(rutas), chunksize=ARCHIVOS_POR_TAREA))
+
+
+def main_migrar(argumentos=None):
+    parser = argparse.ArgumentParser(description="Migra partidas guardadas a la versión actual")
+    parser.add_argument("rutas", nargs="+", help="archivos de guardado o directorios donde buscarlos")
+    parser.add_argument("--patron", default=PATRON_GUARDADO, help="nombre de los guardados en los directorios")
+    parser.add_argument("--procesos", type=int, help="procesos en paralelo (por defecto, uno por CPU)")
+    parser.add_argument("--comprobar", action="store_true", help="no reescribe nada, solo informa")
+    args = parser.parse_args(argumentos)
+
+    inicio = time.perf_counter()
+    resultados = migrar_archivos(buscar_guardados(args.rutas, args.patron), args.procesos, args.comprobar)
+    duracion = time.perf_counter() - inicio
+
+    estados = Counter(estado for _, estado, _, _ in resultados)
+    for ruta, estado, _, error in resultados:
+        if estado == "error":
+            print(f"ERROR en {ruta}: {error}")
+    print(f"{len(resultados)} archivos en {duracion:.2f} s: {estados['migrado']} migrados "
+          f"({sum(migradas for _, _, migradas, _ in resultados)} partidas), {estados['al_dia']} al día"
+          + (f", {estados['pendiente']} pendientes" if args.comprobar else "")
+          + (f", {estados['error']} con errores" if estados['error'] else ""))
+    return 1 if estados["error"] or estados["pendiente"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_migrar())
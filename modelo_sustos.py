@@ -0,0 +1,262 @@
+"""Modelo vectorizado de sustos aleatorios para equilibrar la dificultad
+
+Simula a la vez miles de jugadores con las mismas reglas que
+MotorJuego._susto_aleatorio y Jugador.recibir_susto: probabilidad por tick
+según el peligro de la habitación, la cordura y la dificultad, un mínimo de
+TICKS_ENTRE_SUSTOS entre sustos y daño aleatorio. Igual que el motor (ver
+muestrear_espera_geometrica), en lugar de tirar un dado por tick se muestrea
+el tick del siguiente susto de cada jugador, así que cada paso de NumPy
+avanza a todos los jugadores hasta su próximo susto.
+
+Cada jugador se queda en una habitación; "sobrevive" mientras su vida es
+mayor que 0.
+
+Uso:
+    python modelo_sustos.py --jugadores 100000 --segundos 10800 --peligro 10
+    python modelo_sustos.py --multiplicadores 0.5 1 2 3   Curvas para otros multiplicadores
+    python modelo_sustos.py --comparar 2000               Contrasta con el motor escalar
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+try:
+    import numpy as np
+except ImportError:  # Solo hace falta para el modelo vectorizado
+    np = None
+
+import main
+
+PASO_CURVA = 600  # Segundos entre puntos de las curvas de supervivencia
+
+
+def _comprobar_numpy():
+    if np is None:
+        raise RuntimeError("El modelo vectorizado necesita NumPy (pip install numpy)")
+
+
+def probabilidad_susto(nivel_peligro, cordura, multiplicador):
+    """Probabilidad por tick (0-1) de un susto aleatorio; vectorizada como _probabilidad_susto_aleatorio"""
+    probabilidad = nivel_peligro * 0.5 * (1 + (100 - cordura) / 100) * multiplicador / 100
+    return np.clip(probabilidad, 0.0, 1.0)
+
+
+def recibir_sustos(vida, cordura, intensidad, rng):
+    """Aplica un susto a cada jugador de los arrays, como Jugador.recibir_susto"""
+    dano = rng.integers(intensidad // 2, intensidad + 1)
+    np.maximum(vida - dano // 2, 0, out=vida)
+    np.maximum(cordura - dano, 0, out=cordura)
+    return dano
+
+
+def simular_lote(num_jugadores, segundos, nivel_peligro, multiplicador=1.0, vida=100, cordura=100,
+                 ultimo_susto=None, semilla=None):
+    """Simula num_jugadores durante los segundos indicados
+
+    nivel_peligro, vida, cordura y ultimo_susto (tick del último susto, negativo
+    si no hubo) pueden ser un valor o un array por jugador. Devuelve un
+    diccionario con el estado final y el tick de muerte de cada jugador (-1 si
+    sobrevive).
+    """
+    _comprobar_numpy()
+    rng = np.random.default_rng(semilla)
+    forma = (num_jugadores,)
+    vida = np.array(np.broadcast_to(vida, forma), dtype=np.int64)
+    cordura = np.array(np.broadcast_to(cordura, forma), dtype=np.int64)
+    sustos = np.zeros(forma, dtype=np.int64)
+    muerte = np.full(forma, -1, dtype=np.int64)
+
+    # Arrays compactos con solo los jugadores que aún pueden recibir un susto:
+    # cada vuelta se filtran y los que salen dejan su estado en los resultados
+    indices = np.arange(num_jugadores)
+    peligro = np.array(np.broadcast_to(nivel_peligro, forma), dtype=np.int64)
+    intensidad = peligro // 2
+    vida_activos, cordura_activos = vida.copy(), cordura.copy()
+    sustos_activos, muerte_activos = sustos.copy(), muerte.copy()
+    if ultimo_susto is None:
+        primer_tick = np.ones(forma, dtype=np.int64)
+    else:
+        primer_tick = np.maximum(np.broadcast_to(ultimo_susto, forma) + main.TICKS_ENTRE_SUSTOS, 1)
+
+    while indices.size:
+        # Tick del próximo susto: fin de la espera mínima y después una espera geométrica
+        probabilidad = probabilidad_susto(peligro, cordura_activos, multiplicador)
+        susto = primer_tick + rng.geometric(np.where(probabilidad > 0, probabilidad, 1.0)) - 1
+        dentro = (susto <= segundos) & (probabilidad > 0)
+        if not dentro.all():
+            fuera = ~dentro
+            salen = indices[fuera]
+            vida[salen] = vida_activos[fuera]
+            cordura[salen] = cordura_activos[fuera]
+            sustos[salen] = sustos_activos[fuera]
+            muerte[salen] = muerte_activos[fuera]
+            indices, peligro, intensidad, susto = indices[dentro], peligro[dentro], intensidad[dentro], susto[dentro]
+            vida_activos, cordura_activos = vida_activos[dentro], cordura_activos[dentro]
+            sustos_activos, muerte_activos = sustos_activos[dentro], muerte_activos[dentro]
+        if not indices.size:
+            break
+
+        recibir_sustos(vida_activos, cordura_activos, intensidad, rng)
+        sustos_activos += 1
+        muertos = (vida_activos == 0) & (muerte_activos < 0)
+        muerte_activos[muertos] = susto[muertos]
+        primer_tick = susto + main.TICKS_ENTRE_SUSTOS
+
+    return {
+        "jugadores": num_jugadores,
+        "segundos": segundos,
+        "multiplicador": multiplicador,
+        "vida": vida,
+        "cordura": cordura,
+        "sustos": sustos,
+        "muerte": muerte
+    }
+
+
+def curva_supervivencia(muerte, segundos, paso=PASO_CURVA):
+    """Fracción de jugadores con vida en cada múltiplo de paso (incluidos 0 y segundos)"""
+    instantes = list(range(0, segundos, paso)) + [segundos]
+    muertes = np.sort(np.asarray(muerte)[np.asarray(muerte) >= 0])
+    caidos = np.searchsorted(muertes, instantes, side="right")
+    return instantes, 1 - caidos / len(muerte)
+
+
+def curvas_por_dificultad(num_jugadores, segundos, nivel_peligro, multiplicadores=None, semilla=None, paso=PASO_CURVA):
+    """Curva de supervivencia para cada dificultad (o cada multiplicador indicado)"""
+    multiplicadores = multiplicadores or main.MODIFICADOR_SUSTOS
+    if not isinstance(multiplicadores, dict):
+        multiplicadores = {f"x{valor:g}": valor for valor in multiplicadores}
+    curvas = {}
+    for nombre, multiplicador in multiplicadores.items():
+        resultado = simular_lote(num_jugadores, segundos, nivel_peligro, multiplicador, semilla=semilla)
+        curvas[nombre] = curva_supervivencia(resultado["muerte"], segundos, paso)
+    return curvas
+
+
+def simular_escalar(num_jugadores, segundos, nivel_peligro, dificultad="Normal", semilla=0, paso=PASO_CURVA):
+    """Lo mismo con un MotorJuego por jugador: referencia lenta para validar el modelo"""
+    directorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as directorio:
+        os.chdir(directorio)  # Configuracion() usa archivos del directorio actual
+        try:
+            configuracion = main.Configuracion()
+        finally:
+            os.chdir(directorio_original)
+    configuracion.dificultad = dificultad
+
+    instantes = list(range(0, segundos, paso)) + [segundos]
+    vivos = [0] * len(instantes)
+    vida, cordura, sustos = [], [], []
+    for indice in range(num_jugadores):
+        motor = main.MotorJuego(configuracion, reloj=main.RelojJuego(simulado=True, inicio=0.0),
+                                gestor_guardado=main.GestorGuardado(cargar=False),
+                                sistema_puntuacion=main.SistemaPuntuacion(cargar=False),
+                                semilla=semilla * 1000003 + indice)
+        motor.perfilador.habilitado = False
+        sala = main.Habitacion("sala", "Sala", "")
+        sala.nivel_peligro = nivel_peligro
+        motor.habitaciones = {"sala": sala}
+        motor.jugador.mover_a("sala")
+        motor.tiempo_inicio = motor.reloj.ahora()
+        for posicion, instante in enumerate(instantes):
+            motor.simular(instante - motor.tick)
+            vivos[posicion] += motor.jugador.vida > 0
+        vida.append(motor.jugador.vida)
+        cordura.append(motor.jugador.cordura)
+        sustos.append(motor.jugador.sustos_recibidos)
+    return {
+        "instantes": instantes,
+        "supervivencia": [v / num_jugadores for v in vivos],
+        "vida": vida,
+        "cordura": cordura,
+        "sustos": sustos
+    }
+
+
+def comparar(num_escalar, num_vectorizado, segundos, nivel_peligro, dificultad="Normal", semilla=0, paso=PASO_CURVA):
+    """Contrasta el modelo con el motor escalar y mide la aceleración
+
+    Las curvas concuerdan si ningún punto se separa más de 4 errores típicos
+    (de la diferencia de dos proporciones) y las medias finales tampoco.
+    """
+    inicio = time.perf_counter()
+    escalar = simular_escalar(num_escalar, segundos, nivel_peligro, dificultad, semilla, paso)
+    tiempo_escalar = (time.perf_counter() - inicio) / num_escalar
+
+    inicio = time.perf_counter()
+    lote = simular_lote(num_vectorizado, segundos, nivel_peligro, main.MODIFICADOR_SUSTOS[dificultad], semilla=semilla)
+    tiempo_vectorizado = (time.perf_counter() - inicio) / num_vectorizado
+    _, curva = curva_supervivencia(lote["muerte"], segundos, paso)
+
+    def error_tipico(proporcion):
+        return math.sqrt(proporcion * (1 - proporcion) * (1 / num_escalar + 1 / num_vectorizado))
+
+    concuerda = True
+    desviacion_curva = 0.0
+    for esperado, obtenido in zip(escalar["supervivencia"], curva):
+        diferencia = abs(esperado - obtenido)
+        desviacion_curva = max(desviacion_curva, diferencia)
+        concuerda &= diferencia <= 4 * error_tipico(obtenido) + 1e-9
+    medias = {}
+    for campo in ("vida", "cordura", "sustos"):
+        valores = np.asarray(escalar[campo], dtype=float)
+        media_escalar, media_lote = valores.mean(), float(lote[campo].mean())
+        error = math.sqrt(valores.var() / num_escalar + float(lote[campo].var()) / num_vectorizado)
+        medias[campo] = (media_escalar, media_lote)
+        concuerda &= abs(media_escalar - media_lote) <= 4 * error + 1e-9
+    return {
+        "concuerda": bool(concuerda),
+        "desviacion_curva": desviacion_curva,
+        "medias": medias,
+        "aceleracion": tiempo_escalar / tiempo_vectorizado,
+        "us_por_jugador_escalar": tiempo_escalar * 1e6,
+        "us_por_jugador_vectorizado": tiempo_vectorizado * 1e6
+    }
+
+
+def main_modelo(argumentos=None):
+    parser = argparse.ArgumentParser(description="Curvas de supervivencia a los sustos aleatorios")
+    parser.add_argument("--jugadores", type=int, default=100000)
+    parser.add_argument("--segundos", type=int, default=10800)
+    parser.add_argument("--peligro", type=int, default=10, help="nivel de peligro de la habitación (0-10)")
+    parser.add_argument("--multiplicadores", type=float, nargs="+",
+                        help="multiplicadores a probar (por defecto, los de cada dificultad)")
+    parser.add_argument("--paso", type=int, default=PASO_CURVA, help="segundos entre puntos de la curva")
+    parser.add_argument("--semilla", type=int)
+    parser.add_argument("--comparar", type=int, metavar="N",
+                        help="contrasta con N partidas del motor escalar por dificultad")
+    args = parser.parse_args(argumentos)
+    if np is None:
+        print("Este modelo necesita NumPy (pip install numpy)")
+        return 1
+
+    if args.comparar:
+        todo_concuerda = True
+        for dificultad in main.MODIFICADOR_SUSTOS:
+            resultado = comparar(args.comparar, args.jugadores, args.segundos, args.peligro, dificultad,
+                                 args.semilla or 0, args.paso)
+            todo_concuerda &= resultado["concuerda"]
+            medias = ", ".join(f"{campo} {escalar:.2f}/{lote:.2f}" for campo, (escalar, lote) in resultado["medias"].items())
+            print(f"{dificultad:10s} {'concuerda' if resultado['concuerda'] else 'NO CONCUERDA':13s} "
+                  f"desviación máx. {resultado['desviacion_curva']:.4f}  {medias}  "
+                  f"aceleración x{resultado['aceleracion']:.0f}")
+        return 0 if todo_concuerda else 1
+
+    inicio = time.perf_counter()
+    curvas = curvas_por_dificultad(args.jugadores, args.segundos, args.peligro, args.multiplicadores,
+                                   args.semilla, args.paso)
+    duracion = time.perf_counter() - inicio
+    instantes = next(iter(curvas.values()))[0]
+    print(f"{'segundo':>10s}" + "".join(f"{nombre:>11s}" for nombre in curvas))
+    for posicion, instante in enumerate(instantes):
+        print(f"{instante:10d}" + "".join(f"{curva[posicion]:11.4f}" for _, curva in curvas.values()))
+    print(f"{len(curvas)} curvas de {args.jugadores} jugadores en {duracion:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_modelo())
@@ -0,0 +1,223 @@
+"""Recalcula en bloque las puntuaciones históricas con otros pesos
+
+Lee los resultados archivados (mansion_resultados.jsonl, una partida por
+línea, o un JSON con una lista como mansion_puntuaciones.json), los pasa a
+columnas de NumPy y aplica calcular_puntuacion a todos a la vez, sin crear
+ningún MotorJuego. Después compara la clasificación de cada dificultad con
+la anterior.
+
+Uso:
+    python puntuaciones_lote.py mansion_resultados.jsonl --pesos pesos.json
+    python puntuaciones_lote.py resultados.jsonl --pesos pesos.json --top 50 --salida nuevos.jsonl
+
+pesos.json solo necesita las claves que cambian respecto a PESOS_PUNTUACION,
+por ejemplo {"susto": 40, "dificultad": {"Pesadilla": 2.0}}.
+
+Los resultados anteriores a que se archivaran vida, cordura, secretos y
+sustos no se pueden recalcular: conservan su puntuación y se cuentan aparte.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:  # Solo hace falta para el recálculo en bloque
+    np = None
+
+import main
+
+# Columnas que hacen falta para recalcular, además de tiempo, objetos, victoria y dificultad
+DETALLES = ("vida", "cordura", "secretos_descubiertos", "sustos_recibidos")
+TOP_PREDETERMINADO = 20
+TAMANO_BLOQUE_LECTURA = 1 << 22  # Bytes de JSONL que se analizan de una vez
+
+
+def leer_resultados(rutas):
+    """Recorre los resultados de los archivos sin cargarlos todos en memoria"""
+    for ruta in rutas:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            if ruta.endswith(".jsonl"):
+                # Se analizan bloques de líneas de una vez: mucho más rápido que línea a línea
+                while True:
+                    lineas = [linea for linea in f.readlines(TAMANO_BLOQUE_LECTURA) if linea.strip()]
+                    if not lineas:
+                        break
+                    yield from json.loads("[" + ",".join(lineas) + "]")
+            else:
+                yield from json.load(f)
+
+
+def a_columnas(resultados):
+    """Convierte los resultados en un diccionario de columnas de NumPy
+
+    La dificultad se guarda como códigos enteros ("dificultades" da el nombre
+    de cada código); las columnas de detalle que faltan quedan a 0 y la
+    máscara "recalculable" indica qué filas las tenían todas.
+    """
+    if np is None:
+        raise RuntimeError("El recálculo en bloque necesita NumPy (pip install numpy)")
+    campos = ("puntos", "tiempo", "items_encontrados", "nivel_completado") + DETALLES
+    numericas = {campo: [] for campo in campos}
+    anadir = [(campo, numericas[campo].append) for campo in campos]
+    nombres, fechas, codigos = [], [], []
+    dificultades = {}
+    for resultado in resultados:
+        obtener = resultado.get
+        nombres.append(obtener("nombre", ""))
+        fechas.append(obtener("fecha", ""))
+        for campo, agregar in anadir:
+            agregar(obtener(campo))
+        codigos.append(dificultades.setdefault(obtener("dificultad", "Normal"), len(dificultades)))
+
+    # Las filas con algún detalle ausente (None) no se pueden recalcular
+    recalculable = [all(fila) for fila in zip(*([valor is not None for valor in numericas[campo]] for campo in DETALLES))]
+    for valores in numericas.values():
+        if None in valores:
+            valores[:] = [valor or 0 for valor in valores]
+    columnas = {campo: np.asarray(valores, dtype=np.float64 if campo == "tiempo" else np.int64)
+                for campo, valores in numericas.items()}
+    columnas["nivel_completado"] = columnas["nivel_completado"].astype(bool)
+    columnas["dificultad"] = np.asarray(codigos, dtype=np.int64)
+    columnas["dificultades"] = list(dificultades)
+    columnas["recalculable"] = np.asarray(recalculable, dtype=bool)
+    columnas["nombre"] = nombres
+    columnas["fecha"] = fechas
+    return columnas
+
+
+def combinar_pesos(cambios):
+    """PESOS_PUNTUACION con los cambios indicados (la tabla de dificultad se mezcla clave a clave)"""
+    pesos = dict(main.PESOS_PUNTUACION)
+    pesos["dificultad"] = dict(pesos["dificultad"])
+    for clave, valor in (cambios or {}).items():
+        if clave == "dificultad":
+            pesos["dificultad"].update(valor)
+        else:
+            pesos[clave] = valor
+    return pesos
+
+
+def recalcular(columnas, pesos=main.PESOS_PUNTUACION):
+    """Versión vectorizada de calcular_puntuacion para todas las filas a la vez
+
+    Las filas sin detalles conservan su puntuación anterior.
+    """
+    base = np.where(columnas["nivel_completado"], pesos["base_victoria"], pesos["base_derrota"])
+    tiempo_actual = np.minimum(columnas["tiempo"], pesos["tiempo_max"])
+    # np.trunc reproduce el int() del cálculo escalar
+    bonus_tiempo = np.trunc((1 - tiempo_actual / pesos["tiempo_max"]) * pesos["bonus_tiempo"])
+    bonus_vida = np.trunc(columnas["vida"] * pesos["vida"])
+    bonus_cordura = np.trunc(columnas["cordura"] * pesos["cordura"])
+    bonus_objetos = columnas["items_encontrados"] * pesos["objeto"]
+    bonus_secretos = columnas["secretos_descubiertos"] * pesos["secreto"]
+    penalizacion_sustos = columnas["sustos_recibidos"] * pesos["susto"]
+
+    modificadores = np.array([pesos["dificultad"].get(nombre, 1.0) for nombre in columnas["dificultades"]] or [1.0])
+    mod_dificultad = modificadores[columnas["dificultad"]]
+    puntos = np.trunc((base + bonus_tiempo + bonus_vida + bonus_cordura +
+                       bonus_objetos + bonus_secretos - penalizacion_sustos) * mod_dificultad)
+    puntos = np.maximum(puntos, 0).astype(np.int64)
+    return np.where(columnas["recalculable"], puntos, columnas["puntos"])
+
+
+def clasificaciones(columnas, puntos, top=TOP_PREDETERMINADO):
+    """Índices de las top mejores filas de cada dificultad, de mayor a menor puntuación
+
+    A igual puntuación gana el resultado más antiguo (el que aparece antes).
+    """
+    resultado = {}
+    for codigo, nombre in enumerate(columnas["dificultades"]):
+        filas = np.flatnonzero(columnas["dificultad"] == codigo)
+        # Orden estable: conserva el orden de llegada entre empates
+        orden = np.argsort(-puntos[filas], kind="stable")
+        resultado[nombre] = filas[orden[:top]]
+    return resultado
+
+
+def diferencias(antes, despues):
+    """Cambios entre dos clasificaciones de clasificaciones()
+
+    Devuelve {dificultad: {"movimientos": [(fila, puesto anterior o None, puesto nuevo)],
+    "salen": [(fila, puesto anterior)]}} con los puestos contados desde 1.
+    """
+    cambios = {}
+    for dificultad, filas_nuevas in despues.items():
+        puestos_anteriores = {int(fila): puesto for puesto, fila in enumerate(antes.get(dificultad, ()), 1)}
+        nuevas = {int(fila) for fila in filas_nuevas}
+        cambios[dificultad] = {
+            "movimientos": [(int(fila), puestos_anteriores.get(int(fila)), puesto)
+                            for puesto, fila in enumerate(filas_nuevas, 1)],
+            "salen": [(fila, puesto) for fila, puesto in puestos_anteriores.items() if fila not in nuevas]
+        }
+    return cambios
+
+
+def escribir_resultados(rutas, puntos, salida):
+    """Escribe de nuevo los resultados en JSONL con la puntuación recalculada"""
+    with open(salida, 'w', encoding='utf-8') as f:
+        for resultado, nuevos in zip(leer_resultados(rutas), puntos):
+            if int(nuevos) != resultado.get("puntos"):
+                resultado["puntos_anteriores"] = resultado.get("puntos")
+                resultado["puntos"] = int(nuevos)
+            f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+
+
+def _describir_movimiento(anterior, nuevo):
+    if anterior is None:
+        return "nuevo"
+    if anterior == nuevo:
+        return "="
+    return f"{'+' if anterior > nuevo else '-'}{abs(anterior - nuevo)}"
+
+
+def main_lote(argumentos=None):
+    parser = argparse.ArgumentParser(description="Recalcula puntuaciones históricas con otros pesos")
+    parser.add_argument("archivos", nargs="+", help="resultados .jsonl o listas .json")
+    parser.add_argument("--pesos", help="JSON con los pesos que cambian")
+    parser.add_argument("--top", type=int, default=TOP_PREDETERMINADO)
+    parser.add_argument("--salida", help="JSONL donde escribir los resultados recalculados")
+    args = parser.parse_args(argumentos)
+    if np is None:
+        print("Esta herramienta necesita NumPy (pip install numpy)")
+        return 1
+
+    cambios = {}
+    if args.pesos:
+        with open(args.pesos, 'r', encoding='utf-8') as f:
+            cambios = json.load(f)
+    pesos = combinar_pesos(cambios)
+
+    inicio = time.perf_counter()
+    columnas = a_columnas(leer_resultados(args.archivos))
+    lectura = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    nuevos = recalcular(columnas, pesos)
+    calculo = time.perf_counter() - inicio
+
+    antes = clasificaciones(columnas, columnas["puntos"], args.top)
+    despues = clasificaciones(columnas, nuevos, args.top)
+    for dificultad, cambio in diferencias(antes, despues).items():
+        print(f"\n== {dificultad} ==")
+        for fila, anterior, puesto in cambio["movimientos"]:
+            print(f"{puesto:4d}. {columnas['nombre'][fila][:20]:20s} {columnas['puntos'][fila]:7d} -> {nuevos[fila]:7d}"
+                  f"  {_describir_movimiento(anterior, puesto)}")
+        for fila, anterior in cambio["salen"]:
+            print(f"  sale: {columnas['nombre'][fila][:20]:20s} (era {anterior}.º)")
+
+    total = len(columnas["nombre"])
+    sin_detalles = int((~columnas["recalculable"]).sum())
+    cambiados = int((nuevos != columnas["puntos"]).sum())
+    print(f"\n{total} resultados ({sin_detalles} sin detalles, no recalculados); {cambiados} cambian de puntuación")
+    print(f"Lectura {lectura:.2f} s, recálculo {calculo * 1000:.1f} ms")
+
+    if args.salida:
+        escribir_resultados(args.archivos, nuevos, args.salida)
+        print(f"Resultados recalculados en {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_lote())
@@ -0,0 +1,384 @@
+"""Servidor de texto multijugador (estilo telnet) para La Mansión Embrujada
+
+Cada conexión es una sesión independiente con su propio MotorJuego. Todas las
+sesiones comparten un único bucle asyncio y un único planificador de ticks:
+una sesión solo se despierta cuando tiene un evento programado o cuando su
+jugador envía una orden, así que miles de sesiones inactivas no cuestan nada.
+
+Uso:
+    python servidor_texto.py [--host 127.0.0.1] [--puerto 4000]
+    python servidor_texto.py --carga 1000 --comandos 20   Prueba de carga local
+"""
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from main import (Configuracion, GestorGuardado, MotorJuego, Perfilador, RelojJuego, SistemaPuntuacion,
+                  NOMBRE_JUEGO, VERSION_JUEGO, configurar_registro, configurar_telemetria, log_motor)
+
+PUERTO_PREDETERMINADO = 4000
+PROMPT = b"\n> "
+MAX_HISTORIA_SESION = 50  # Mensajes que conserva cada sesión en memoria
+
+DIRECCIONES = {
+    "n": "norte", "norte": "norte",
+    "s": "sur", "sur": "sur",
+    "e": "este", "este": "este",
+    "o": "oeste", "oeste": "oeste",
+    "arriba": "arriba", "subir": "arriba",
+    "abajo": "abajo", "bajar": "abajo"
+}
+
+AYUDA = (
+    "Órdenes: norte/sur/este/oeste/arriba/abajo (o n/s/e/o), ir <dirección>, mirar,\n"
+    "examinar <objeto>, coger <objeto>, usar <objeto>, inventario, guardar <n>,\n"
+    "cargar <n>, partidas, ayuda, salir"
+)
+
+
+class SesionJugador:
+    """Una conexión de jugador con su propio motor de juego"""
+
+    def __init__(self, servidor, id_sesion, lector, escritor):
+        self.servidor = servidor
+        self.id = id_sesion
+        self.lector = lector
+        self.escritor = escritor
+        self.root = None  # Sin campana de Tk
+        self.nombre = f"jugador{id_sesion}"
+        self.motor = MotorJuego(
+            servidor.configuracion,
+            reloj=RelojJuego(simulado=True),
+            gestor_guardado=servidor.gestor_guardado,
+            sistema_puntuacion=servidor.sistema_puntuacion
+        )
+        self.motor.perfilador = servidor.perfilador  # Un solo juego de histogramas para todo el servidor
+        self.motor.set_ui(self)
+        self.enviados = 0  # Mensajes de la historia ya enviados al cliente
+        self.version_agenda = 0
+
+    # --- Métodos que llama el motor ---
+
+    def actualizar_interfaz(self):
+        pass
+
+    def actualizar_mensajes(self):
+        pass
+
+    def mostrar_resultado(self, titulo, mensaje, puntuacion):
+        jugador = self.motor.jugador
+        self.servidor.registrar_puntuacion(
+            self.nombre,
+            puntuacion,
+            jugador.tiempo_jugado,
+            jugador.items_encontrados,
+            titulo == "¡VICTORIA!",
+            self.motor.configuracion.dificultad,
+            jugador.detalles_puntuacion()
+        )
+        self.motor.historia.append(f"{titulo}\n{mensaje}")
+
+    # --- Sincronización con el reloj del servidor ---
+
+    def sincronizar(self):
+        """Pone el motor al día con el tick global y programa su próximo despertar"""
+        pendiente = self.servidor.tick_global - self.motor.tick
+        if pendiente > 0 and self.motor.tiempo_inicio is not None:
+            self.motor.simular(pendiente)
+        self.programar()
+
+    def programar(self):
+        """Registra en el planificador del servidor el próximo tick con eventos"""
+        self.version_agenda += 1
+        if self.motor.juego_terminado or self.motor.tiempo_inicio is None:
+            return
+        proximo = self.motor.proximo_evento_programado()
+        if proximo is not None:
+            self.servidor.programar(self, self.servidor.tick_global + (proximo - self.motor.tick))
+
+    def mensajes_nuevos(self):
+        """Devuelve el texto pendiente de enviar y recorta la historia"""
+        historia = self.motor.historia
+        if self.enviados > len(historia):
+            self.enviados = 0  # Partida nueva o cargada
+        texto = "\n".join(historia[self.enviados:])
+        if len(historia) > MAX_HISTORIA_SESION:
+            # Se sustituye la lista en vez de recortarla: las instantáneas pueden compartirla
+            historia = self.motor.historia = historia[-MAX_HISTORIA_SESION:]
+        self.enviados = len(historia)
+        return texto
+
+    def enviar(self, texto, prompt=True):
+        if texto:
+            self.escritor.write(texto.encode("utf-8"))
+        if prompt:
+            self.escritor.write(PROMPT)
+
+    def enviar_pendientes(self, prompt=False):
+        texto = self.mensajes_nuevos()
+        if texto or prompt:
+            self.enviar(("\n" + texto) if texto and not prompt else texto, prompt)
+
+    # --- Órdenes ---
+
+    def _buscar_item(self, texto, items):
+        texto = texto.lower()
+        for item in items:
+            if item.id == texto or item.nombre.lower() == texto or texto in item.nombre.lower():
+                return item
+        return None
+
+    async def ejecutar_orden(self, linea):
+        """Interpreta una orden del jugador. Devuelve False para cerrar la sesión"""
+        motor = self.motor
+        partes = linea.strip().split(maxsplit=1)
+        if not partes:
+            return True
+        orden = partes[0].lower()
+        argumento = partes[1] if len(partes) > 1 else ""
+
+        if orden in ("salir", "quit", "exit"):
+            return False
+        if orden == "ayuda":
+            motor.historia.append(AYUDA)
+            return True
+        if orden == "partidas":
+            propias = [p for p in motor.gestor_guardado.partidas_guardadas
+                       if str(p.get("slot", "")).startswith(f"{self.nombre}/")]
+            motor.historia.append("\n".join(
+                f"{p['slot'].split('/', 1)[1]}: {p.get('fecha', '')}" for p in propias
+            ) or "No tienes partidas guardadas.")
+            return True
+        if orden == "cargar":
+            if motor.cargar_partida(f"{self.nombre}/{argumento.strip()}"):
+                self.enviados = len(motor.historia)  # No se reenvía la historia guardada
+                motor.historia.append("Partida cargada.")
+            else:
+                motor.historia.append("No existe esa partida.")
+            self.motor.tick = self.servidor.tick_global
+            return True
+        if motor.juego_terminado:
+            motor.historia.append("La partida ha terminado. Escribe 'cargar <n>' o 'salir'.")
+            return True
+
+        if orden == "ir":
+            orden = argumento.lower()
+        if orden in DIRECCIONES:
+            motor.mover_jugador(DIRECCIONES[orden])
+        elif orden in ("mirar", "examinar", "x"):
+            item = self._buscar_item(argumento, motor.obtener_habitacion_actual().items + motor.jugador.inventario) if argumento else None
+            motor.examinar(item.id if item else (argumento or None))
+        elif orden in ("coger", "recoger"):
+            item = self._buscar_item(argumento, motor.obtener_habitacion_actual().items)
+            if item:
+                motor.recoger_item(item.id)
+            else:
+                motor.agregar_mensaje("No encuentras ese objeto en la habitación.")
+        elif orden == "usar":
+            item = self._buscar_item(argumento, motor.jugador.inventario)
+            motor.usar_item(item.id if item else argumento)
+        elif orden in ("inventario", "i"):
+            motor.inventario()
+        elif orden == "guardar":
+            datos = motor.datos_partida(f"{self.nombre}/{argumento.strip() or '1'}")
+            # La escritura del archivo se hace fuera del bucle, en un único hilo de persistencia
+            await self.servidor.guardar(datos)
+            motor.agregar_mensaje("Partida guardada.")
+        else:
+            motor.agregar_mensaje("No entiendo esa orden. Escribe 'ayuda'.")
+        return True
+
+    async def atender(self):
+        """Bucle de lectura de órdenes de la conexión"""
+        self.enviar(f"{NOMBRE_JUEGO} v{VERSION_JUEGO}\n¿Cómo te llamas?", prompt=True)
+        await self.escritor.drain()
+        linea = await self.lector.readline()
+        nombre = linea.decode("utf-8", "ignore").strip()
+        if nombre:
+            self.nombre = "".join(c for c in nombre if c.isalnum() or c in "_-")[:20] or self.nombre
+
+        self.motor.iniciar_nuevo_juego()
+        self.motor.tick = self.servidor.tick_global
+        self.motor.historia.append(AYUDA)
+        self.programar()
+        self.enviar_pendientes(prompt=True)
+        await self.escritor.drain()
+
+        while True:
+            linea = await self.lector.readline()
+            if not linea:
+                break
+            self.sincronizar()
+            continuar = await self.ejecutar_orden(linea.decode("utf-8", "ignore"))
+            if not continuar:
+                break
+            self.programar()
+            self.enviar_pendientes(prompt=True)
+            await self.escritor.drain()
+
+
+class ServidorMansion:
+    """Aloja muchas sesiones en un bucle asyncio con un planificador de ticks compartido"""
+
+    def __init__(self, configuracion=None):
+        self.configuracion = configuracion or Configuracion()
+        self.gestor_guardado = GestorGuardado()
+        self.sistema_puntuacion = SistemaPuntuacion()
+        self.perfilador = Perfilador(self.configuracion.perfilador_activo)
+        self.sesiones = {}
+        self.tick_global = 0
+        self._agenda = []  # (tick_global, desempate, sesion, version)
+        self._desempate = itertools.count()
+        self._persistencia = ThreadPoolExecutor(max_workers=1, thread_name_prefix="guardado")
+        self._ids = itertools.count(1)
+
+    def programar(self, sesion, tick):
+        heapq.heappush(self._agenda, (tick, next(self._desempate), sesion, sesion.version_agenda))
+
+    async def guardar(self, datos):
+        """Guarda una partida sin bloquear el bucle de eventos"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._persistencia, self.gestor_guardado.guardar_partida, datos)
+
+    def registrar_puntuacion(self, *datos):
+        """Añade una puntuación; el archivo se escribe en el hilo de persistencia"""
+        self._persistencia.submit(self.sistema_puntuacion.agregar_puntuacion, *datos)
+
+    async def bucle_ticks(self):
+        """Un tick por segundo para todas las sesiones; solo se despiertan las que tienen eventos"""
+        inicio = time.monotonic()
+        while True:
+            # Se corrige la deriva para que el tick global siga al reloj real
+            await asyncio.sleep(max(0.0, inicio + self.tick_global + 1 - time.monotonic()))
+            self.tick_global += 1
+            while self._agenda and self._agenda[0][0] <= self.tick_global:
+                _, _, sesion, version = heapq.heappop(self._agenda)
+                if sesion.id not in self.sesiones or version != sesion.version_agenda:
+                    continue  # Sesión cerrada o ya reprogramada
+                sesion.sincronizar()
+                sesion.enviar_pendientes()
+
+    async def atender_conexion(self, lector, escritor):
+        sesion = SesionJugador(self, next(self._ids), lector, escritor)
+        self.sesiones[sesion.id] = sesion
+        try:
+            await sesion.atender()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.sesiones.pop(sesion.id, None)
+            sesion.motor.sistema_sonido.detener_todos_sonidos()
+            escritor.close()
+
+    async def iniciar(self, host="127.0.0.1", puerto=PUERTO_PREDETERMINADO):
+        """Arranca el servidor y el planificador; devuelve el servidor asyncio"""
+        self._tarea_ticks = asyncio.create_task(self.bucle_ticks())
+        servidor = await asyncio.start_server(self.atender_conexion, host, puerto, limit=2 ** 16, backlog=4096)
+        log_motor.info("Servidor escuchando en %s:%s", host, servidor.sockets[0].getsockname()[1])
+        return servidor
+
+    async def detener(self, servidor):
+        """Cierra el servidor, para el planificador y termina las escrituras pendientes"""
+        servidor.close()
+        await servidor.wait_closed()
+        self._tarea_ticks.cancel()
+        try:
+            await self._tarea_ticks
+        except asyncio.CancelledError:
+            pass
+        # Espera, fuera del bucle, a que se escriban los guardados y puntuaciones ya encolados
+        await asyncio.to_thread(self._persistencia.shutdown)
+
+
+# --- Cliente de prueba de carga ---
+
+ORDENES_PRUEBA = ["mirar", "norte", "sur", "oeste", "inventario", "este", "examinar", "norte", "este", "sur"]
+
+
+async def _cliente_carga(host, puerto, num_ordenes, latencias):
+    """Cliente que juega una secuencia fija de órdenes y mide la latencia de cada una"""
+    lector, escritor = await asyncio.open_connection(host, puerto, limit=2 ** 20)
+    await lector.readuntil(PROMPT)
+    escritor.write(b"bot\n")
+    await lector.readuntil(PROMPT)
+    for orden in itertools.islice(itertools.cycle(ORDENES_PRUEBA), num_ordenes):
+        inicio = time.perf_counter()
+        escritor.write(orden.encode("utf-8") + b"\n")
+        await lector.readuntil(PROMPT)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    escritor.write(b"salir\n")
+    escritor.close()
+
+
+async def prueba_carga(num_clientes, num_ordenes, host="127.0.0.1"):
+    """Levanta un servidor local y lanza clientes concurrentes contra él"""
+    servidor_mansion = ServidorMansion()
+    servidor = await servidor_mansion.iniciar(host, 0)
+    puerto = servidor.sockets[0].getsockname()[1]
+    latencias = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_cliente_carga(host, puerto, num_ordenes, latencias) for _ in range(num_clientes)))
+    duracion = time.perf_counter() - inicio
+    await servidor_mansion.detener(servidor)
+
+    latencias.sort()
+    return {
+        "clientes": num_clientes,
+        "ordenes": len(latencias),
+        "ordenes_por_segundo": len(latencias) / duracion,
+        "p50_ms": latencias[len(latencias) // 2],
+        "p99_ms": latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))],
+        "media_ms": statistics.mean(latencias)
+    }
+
+
+def _ampliar_limite_descriptores(necesarios):
+    """Sube el límite de archivos abiertos si el sistema lo permite"""
+    try:
+        import resource
+        blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if blando < necesarios:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(necesarios, duro), duro))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def main_servidor(argumentos=None):
+    parser = argparse.ArgumentParser(description=f"Servidor de texto de {NOMBRE_JUEGO}")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO_PREDETERMINADO)
+    parser.add_argument("--carga", type=int, metavar="CLIENTES", help="ejecuta una prueba de carga local")
+    parser.add_argument("--comandos", type=int, default=20, help="órdenes por cliente en la prueba de carga")
+    args = parser.parse_args(argumentos)
+
+    configurar_registro()
+    if args.carga:
+        _ampliar_limite_descriptores(args.carga * 2 + 64)
+        resultado = asyncio.run(prueba_carga(args.carga, args.comandos, args.host))
+        for clave, valor in resultado.items():
+            print(f"{clave:22s} {valor:.2f}" if isinstance(valor, float) else f"{clave:22s} {valor}")
+        return 0
+
+    # Solo las partidas reales: la prueba de carga no debe llenar la telemetría
+    configurar_telemetria()
+
+    async def ejecutar():
+        servidor = await ServidorMansion().iniciar(args.host, args.puerto)
+        async with servidor:
+            await servidor.serve_forever()
+
+    try:
+        asyncio.run(ejecutar())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_servidor())
@@ -0,0 +1,167 @@
+"""Resume la telemetría de juego (mansion_telemetria.jsonl y sus copias rotadas)
+
+Recorre los eventos con generadores, sin cargar los archivos en memoria, así
+que sirve para registros de varios gigabytes. Muestra un mapa de calor por
+habitación (visitas y tiempo de permanencia) y tablas de frecuencia de sustos.
+
+Uso:
+    python telemetria_agregada.py                      Telemetría del directorio actual
+    python telemetria_agregada.py registros/*.jsonl*   Varios archivos (también .gz)
+    python telemetria_agregada.py --orden sustos --top 15
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import sys
+from collections import Counter, defaultdict
+
+import main
+
+TAMANO_BLOQUE_LECTURA = 1 << 22  # Bytes de JSONL que se analizan de una vez
+ANCHO_BARRA = 30
+TOP_PREDETERMINADO = 25
+ORDENES = ("visitas", "permanencia", "sustos")
+
+
+def archivos_telemetria(ruta=main.TELEMETRIA_ARCHIVO):
+    """Archivo de telemetría y sus copias rotadas, de la más antigua a la actual"""
+    copias = [c for c in glob.glob(glob.escape(ruta) + ".*") if c[len(ruta) + 1:].isdigit()]
+    copias.sort(key=lambda c: int(c[len(ruta) + 1:]), reverse=True)
+    return copias + ([ruta] if os.path.exists(ruta) else [])
+
+
+def _abrir(ruta):
+    if ruta.endswith(".gz"):
+        return gzip.open(ruta, 'rt', encoding='utf-8')
+    return open(ruta, 'r', encoding='utf-8')
+
+
+def leer_eventos(rutas, errores=None):
+    """Recorre los eventos de los archivos en orden
+
+    Las líneas que no son JSON válido (por ejemplo, la última de un archivo
+    cortado al cerrarse el juego) se saltan y se cuentan en errores["lineas"].
+    """
+    for ruta in rutas:
+        with _abrir(ruta) as f:
+            while True:
+                lineas = [linea for linea in f.readlines(TAMANO_BLOQUE_LECTURA) if linea.strip()]
+                if not lineas:
+                    break
+                try:
+                    # Analizar el bloque de una vez es mucho más rápido que línea a línea
+                    yield from json.loads("[" + ",".join(lineas) + "]")
+                except ValueError:
+                    for linea in lineas:
+                        try:
+                            yield json.loads(linea)
+                        except ValueError:
+                            if errores is not None:
+                                errores["lineas"] = errores.get("lineas", 0) + 1
+
+
+def _estadisticas_habitacion():
+    return {"visitas": 0, "permanencia": 0.0, "salidas": 0, "sustos": 0, "dano": 0, "muertes": 0, "objetos": 0}
+
+
+def agregar(eventos):
+    """Acumula los eventos por habitación; la memoria solo crece con el número de habitaciones"""
+    habitaciones = defaultdict(_estadisticas_habitacion)
+    intensidades = Counter()
+    tipos = Counter()
+    partidas = 0
+    for evento in eventos:
+        tipo = evento.get("tipo")
+        tipos[tipo] += 1
+        habitacion = habitaciones[evento.get("habitacion")]
+        if tipo == "entrar_habitacion":
+            habitacion["visitas"] += 1
+        elif tipo == "salir_habitacion":
+            habitacion["permanencia"] += evento.get("permanencia", 0.0)
+            habitacion["salidas"] += 1
+        elif tipo == "susto":
+            habitacion["sustos"] += 1
+            habitacion["dano"] += evento.get("dano", 0)
+            intensidades[evento.get("intensidad", 0)] += 1
+        elif tipo == "muerte":
+            habitacion["muertes"] += 1
+        elif tipo == "recoger":
+            habitacion["objetos"] += 1
+        elif tipo in ("inicio", "carga"):
+            # La partida empieza dentro de una habitación: cuenta como visita
+            habitacion["visitas"] += 1
+            partidas += 1
+    habitaciones.pop(None, None)
+    return {"habitaciones": dict(habitaciones), "intensidades": intensidades, "tipos": tipos, "partidas": partidas}
+
+
+def _barra(valor, maximo):
+    if maximo <= 0:
+        return ""
+    return "#" * max(1 if valor else 0, round(valor / maximo * ANCHO_BARRA))
+
+
+def mapa_calor(agregado, orden="visitas", top=TOP_PREDETERMINADO):
+    """Líneas del mapa de calor por habitación, ordenado por la columna indicada"""
+    habitaciones = agregado["habitaciones"]
+    filas = sorted(habitaciones.items(), key=lambda par: par[1][orden], reverse=True)[:top]
+    maximo = max((estadisticas[orden] for _, estadisticas in filas), default=0)
+    lineas = [f"{'Habitación':22s} {'Visitas':>8s} {'Media (s)':>10s} {'Total (min)':>12s}  {orden}"]
+    for hab_id, estadisticas in filas:
+        media = estadisticas["permanencia"] / estadisticas["salidas"] if estadisticas["salidas"] else 0.0
+        lineas.append(f"{str(hab_id)[:22]:22s} {estadisticas['visitas']:8d} {media:10.1f} "
+                      f"{estadisticas['permanencia'] / 60:12.1f}  {_barra(estadisticas[orden], maximo)}")
+    return lineas
+
+
+def tabla_sustos(agregado, top=TOP_PREDETERMINADO):
+    """Líneas con la frecuencia de sustos por habitación y el reparto de intensidades"""
+    habitaciones = agregado["habitaciones"]
+    filas = sorted(((hab_id, e) for hab_id, e in habitaciones.items() if e["sustos"]),
+                   key=lambda par: par[1]["sustos"], reverse=True)[:top]
+    lineas = [f"{'Habitación':22s} {'Sustos':>8s} {'Por visita':>11s} {'Por hora':>9s} {'Daño medio':>11s} {'Muertes':>8s}"]
+    for hab_id, e in filas:
+        por_visita = e["sustos"] / e["visitas"] if e["visitas"] else 0.0
+        por_hora = e["sustos"] / (e["permanencia"] / 3600) if e["permanencia"] else 0.0
+        lineas.append(f"{str(hab_id)[:22]:22s} {e['sustos']:8d} {por_visita:11.2f} {por_hora:9.1f} "
+                      f"{e['dano'] / e['sustos']:11.1f} {e['muertes']:8d}")
+
+    intensidades = agregado["intensidades"]
+    if intensidades:
+        maximo = max(intensidades.values())
+        lineas.append("")
+        lineas.append(f"{'Intensidad':>10s} {'Sustos':>8s}")
+        for intensidad in sorted(intensidades):
+            lineas.append(f"{intensidad:10d} {intensidades[intensidad]:8d}  {_barra(intensidades[intensidad], maximo)}")
+    return lineas
+
+
+def main_telemetria(argumentos=None):
+    parser = argparse.ArgumentParser(description="Resume la telemetría de juego")
+    parser.add_argument("archivos", nargs="*", help=f"archivos .jsonl (por defecto {main.TELEMETRIA_ARCHIVO} y copias)")
+    parser.add_argument("--orden", choices=ORDENES, default="visitas", help="columna del mapa de calor")
+    parser.add_argument("--top", type=int, default=TOP_PREDETERMINADO)
+    args = parser.parse_args(argumentos)
+
+    rutas = args.archivos or archivos_telemetria()
+    if not rutas:
+        print(f"No hay telemetría en {main.TELEMETRIA_ARCHIVO}")
+        return 1
+
+    errores = {}
+    agregado = agregar(leer_eventos(rutas, errores))
+    total = sum(agregado["tipos"].values())
+    print(f"{total} eventos de {agregado['partidas']} partidas en {len(rutas)} archivos"
+          + (f" ({errores['lineas']} líneas dañadas)" if errores else ""))
+    print("\n== Mapa de calor ==")
+    print("\n".join(mapa_calor(agregado, args.orden, args.top)))
+    print("\n== Sustos ==")
+    print("\n".join(tabla_sustos(agregado, args.top)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_telemetria())
@@ -0,0 +1,39 @@
+"""Base común de las pruebas que crean archivos o motores de juego"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+RECORRIDO_PRUEBA = ("norte", "norte", "arriba", "este")  # Del recibidor al dormitorio principal
+
+
+class PruebaEnDirectorioTemporal(unittest.TestCase):
+    """Ejecuta cada prueba en un directorio temporal propio
+
+    Configuracion(), los guardados, las puntuaciones y la telemetría escriben
+    en el directorio actual; así ninguna prueba toca los archivos del
+    repositorio ni ve los de otra.
+    """
+
+    def setUp(self):
+        directorio_original = os.getcwd()
+        self.directorio = tempfile.TemporaryDirectory()
+        os.chdir(self.directorio.name)
+        # Se limpia aunque la subclase falle en su setUp o no llame a super().tearDown()
+        self.addCleanup(self.directorio.cleanup)
+        self.addCleanup(os.chdir, directorio_original)
+
+    def crear_motor(self, semilla=None, recorrido=(), iniciar=True):
+        """Motor con reloj simulado; si se inicia la partida, recorre las direcciones indicadas"""
+        motor = main.MotorJuego(main.Configuracion(), reloj=main.RelojJuego(simulado=True, inicio=0.0),
+                                semilla=semilla)
+        if iniciar:
+            motor.iniciar_nuevo_juego()
+            for direccion in recorrido:
+                motor.mover_jugador(direccion)
+        return motor
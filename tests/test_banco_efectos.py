@@ -0,0 +1,76 @@
+import mmap
+import os
+import unittest
+import wave
+from array import array
+
+from base import PruebaEnDirectorioTemporal, main
+
+import banco_efectos
+
+
+def escribir_wav(ruta, muestras, canales):
+    with wave.open(ruta, 'wb') as archivo:
+        archivo.setnchannels(canales)
+        archivo.setsampwidth(2)
+        archivo.setframerate(main.FRECUENCIA_MUSICA)
+        archivo.writeframes(array('h', muestras).tobytes())
+
+
+class PruebaBancoEfectos(PruebaEnDirectorioTemporal):
+    def setUp(self):
+        super().setUp()
+        os.mkdir("sonidos")
+        escribir_wav("sonidos/susto.wav", [30000, -30000] * 3000, 2)
+        escribir_wav("sonidos/recoger_item.wav", list(range(-500, 501)), 1)
+        self.assertEqual(banco_efectos.main_banco([]), 0)
+        self.configuracion = main.Configuracion()
+        self.configuracion.volumen_efectos = 100
+
+    def test_clips_sin_copia(self):
+        banco = main.BancoEfectos()
+        self.assertEqual(banco.nombres(), ["recoger_item", "susto"])
+        clip = banco.clip("recoger_item")
+        # Vista sobre el archivo proyectado: ni copia ni decodificación al dispararlo
+        self.assertIsInstance(clip, memoryview)
+        self.assertIsInstance(clip.obj, mmap.mmap)
+        self.assertEqual(clip[:4].tolist(), [-500, -500, -499, -499])
+        for inicio, _ in banco.indice.values():
+            self.assertEqual(inicio % main.ALINEACION_BANCO_EFECTOS, 0)
+        self.assertIsNone(banco.clip("inexistente"))
+        self.assertAlmostEqual(banco.duracion("susto"), 3000 / main.FRECUENCIA_MUSICA)
+        banco.cerrar()
+        self.assertIn("susto", "\n".join(banco_efectos.listar()))
+
+    def test_mezcla_sobre_la_musica_con_recorte(self):
+        sonido = main.SistemaSonido(self.configuracion)
+        sonido.activar_musica(None)
+        self.assertIsNotNone(sonido.cargar_banco_efectos())
+        sonido.reproducir_efecto("susto")
+        sonido.reproducir_efecto("susto")
+        bloque = array('h', sonido.reproductor.generar(1000))
+        self.assertEqual(bloque[:4].tolist(), [32767, -32768, 32767, -32768])
+        while sonido.reproductor.sonando():
+            sonido.reproductor.generar()
+        self.assertEqual(sonido.reproductor.generar(10), bytes(10 * main.BYTES_POR_FRAME_MUSICA))
+
+        for _ in range(main.MAX_EFECTOS_SIMULTANEOS + 3):
+            sonido.reproducir_efecto("recoger_item", volumen=50)
+        self.assertEqual(len(sonido.reproductor._clips), main.MAX_EFECTOS_SIMULTANEOS)
+        sonido.detener_todos_sonidos()
+        self.assertFalse(sonido.reproductor.sonando())
+        sonido.reproductor.cerrar()
+        sonido.banco.cerrar()
+
+    def test_banco_danado(self):
+        with open(main.BANCO_EFECTOS_ARCHIVO, 'r+b') as f:
+            f.write(b"XXXX")
+        with self.assertRaises(ValueError):
+            main.BancoEfectos()
+        sonido = main.SistemaSonido(self.configuracion)
+        self.assertIsNone(sonido.cargar_banco_efectos())
+        sonido.reproducir_efecto("susto")  # Sin banco no suena nada ni falla
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import unittest
+
+from base import PruebaEnDirectorioTemporal, main
+
+
+def dar_item(motor, item_id, **propiedades):
+    motor.jugador.agregar_item(main.Item(item_id, item_id.capitalize(), "", "util", propiedades=propiedades))
+
+
+class PruebaEfectos(PruebaEnDirectorioTemporal):
+    def motor_sin_sustos(self):
+        motor = self.crear_motor(5)
+        # Sin sustos ni eventos: solo se prueban los efectos
+        motor.habitaciones["recibidor"].nivel_peligro = 0
+        motor.habitaciones["recibidor"].eventos = []
+        return motor
+
+    def test_linterna_se_descarga_sin_coste_por_tick(self):
+        motor = self.motor_sin_sustos()
+        dar_item(motor, "linterna")
+        motor.jugador.bateria_linterna = 40
+        motor.usar_item("linterna")
+        motor.simular(15)
+        self.assertEqual(motor.jugador.bateria_linterna, 25)
+        # Sin nada más programado, simular salta directamente al tick en que se agota
+        self.assertEqual(motor.proximo_evento_programado(), motor.tick + 25)
+        motor.simular(100)
+        self.assertFalse(motor.jugador.linterna_activa)
+        self.assertEqual(motor.jugador.bateria_linterna, 0)
+        self.assertIn("Tu linterna se ha quedado sin batería", motor.historia)
+
+    def test_guardar_y_cargar_conserva_los_efectos(self):
+        motor = self.motor_sin_sustos()
+        for item_id in ("linterna", "vela", "amuleto"):
+            dar_item(motor, item_id, proteccion=25)
+        motor.jugador.bateria_linterna = 80
+        motor.usar_item("linterna")
+        motor.usar_item("vela")
+        motor.usar_item("amuleto")
+        motor.simular(37)
+
+        datos = json.loads(json.dumps(motor.jugador.to_dict()))
+        cargado = main.Jugador.from_dict(datos)
+        self.assertEqual(cargado.bateria_linterna, 43)
+        self.assertTrue(cargado.linterna_activa)
+        for efecto in ("linterna", "vela", "amuleto", "regeneracion_cordura"):
+            self.assertEqual(cargado.efectos.restante(efecto), motor.jugador.efectos.restante(efecto), efecto)
+
+        # Al seguir jugando, la partida cargada evoluciona igual que la original
+        otro = self.motor_sin_sustos()
+        otro.jugador = cargado
+        otro.simular(400)
+        motor.simular(400)
+        for jugador in (motor.jugador, otro.jugador):
+            self.assertFalse(jugador.tiene_item("vela"))
+            self.assertFalse(jugador.tiene_item("amuleto"))
+            self.assertFalse(jugador.linterna_activa)
+        self.assertEqual(otro.jugador.cordura, motor.jugador.cordura)
+
+    def test_amuleto_regenera_y_protege(self):
+        motor = self.motor_sin_sustos()
+        dar_item(motor, "amuleto", proteccion=50)
+        motor.jugador.cordura = 50
+        motor.usar_item("amuleto")
+        motor.simular(main.PERIODO_REGENERACION_CORDURA * 4)
+        self.assertEqual(motor.jugador.cordura, 54)
+        self.assertFalse(motor.usar_item("amuleto"))
+
+        protegido = motor.registrar_susto(10)
+        self.assertLessEqual(protegido, 5)
+        motor.simular(main.DURACION_AMULETO)
+        self.assertFalse(motor.jugador.efectos.activo("regeneracion_cordura"))
+        self.assertFalse(motor.jugador.tiene_item("amuleto"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import random
+import unittest
+
+from base import PruebaEnDirectorioTemporal, main
+
+DT = 1 / main.FOTOGRAMAS_POR_SEGUNDO_EFECTOS
+
+
+class PruebaEfectosPantalla(unittest.TestCase):
+    def setUp(self):
+        self.efectos = main.EfectosPantalla("Alta", random.Random(1))
+
+    def test_susto_se_desvanece(self):
+        self.assertFalse(self.efectos.animando())
+        self.efectos.susto(30)
+        tramas, temblores = [], []
+        while self.efectos.animando():
+            estado = self.efectos.fotograma(DT, 100)
+            tramas.append(estado["destello"])
+            temblores.append(max(map(abs, estado["temblor"])))
+        # El destello pasa de la trama más opaca a la más clara y se apaga antes que el temblor
+        destellos = [trama for trama in tramas if trama]
+        self.assertEqual(destellos[0], main.TRAMAS_EFECTOS[0])
+        self.assertEqual(destellos[-1], main.TRAMAS_EFECTOS[-1])
+        self.assertAlmostEqual(len(tramas) * DT, main.DURACION_TEMBLOR, delta=DT)
+        self.assertLessEqual(max(temblores), 15)
+        self.assertEqual(self.efectos.fotograma(DT, 100)["temblor"], (0, 0))
+
+    def test_vineta_y_parpadeo(self):
+        self.assertEqual(self.efectos.fotograma(DT, 100)["vineta"], 0)
+        self.assertEqual(self.efectos.fotograma(DT, 0)["vineta"], main.ANCHO_VINETA_PX)
+        self.assertFalse(self.efectos.animando(True, 80))
+        self.assertTrue(self.efectos.animando(True, 5))
+        self.assertFalse(self.efectos.animando(False, 5))
+        parpadeos = [self.efectos.fotograma(DT, 100, True, 5)["parpadeo"] for _ in range(200)]
+        self.assertTrue(any(parpadeos) and not all(parpadeos))
+
+    def test_calidad_baja(self):
+        efectos = main.EfectosPantalla("Baja", random.Random(1))
+        efectos.susto(30)
+        estado = efectos.fotograma(DT, 50, True, 1)
+        self.assertEqual(estado["temblor"], (0, 0))
+        self.assertFalse(estado["parpadeo"])
+        self.assertIsNotNone(estado["destello"])
+        self.assertEqual(efectos.anillos_vineta, 1)
+
+    def test_presupuesto_quita_y_recupera(self):
+        presupuesto = self.efectos.presupuesto_ms
+        self.efectos.registrar_tiempo(presupuesto * 3)
+        self.assertEqual(self.efectos.activos, ["temblor", "vineta", "destello"])
+        self.efectos.registrar_tiempo(presupuesto * 3)
+        self.assertEqual(self.efectos.activos, ["vineta", "destello"])
+        self.assertEqual(self.efectos.recortes, 2)
+        # Cuando sobra tiempo vuelven de uno en uno, el último quitado primero
+        for _ in range(main.FOTOGRAMAS_RECUPERAR_EFECTO):
+            self.efectos.registrar_tiempo(presupuesto / 10)
+        self.assertEqual(self.efectos.activos, ["temblor", "vineta", "destello"])
+        for _ in range(main.FOTOGRAMAS_RECUPERAR_EFECTO):
+            self.efectos.registrar_tiempo(presupuesto / 10)
+        self.assertEqual(self.efectos.activos, list(main.CALIDADES_EFECTOS["Alta"]["efectos"]))
+
+
+class PruebaSustoEnInterfaz(PruebaEnDirectorioTemporal):
+    def test_motor_avisa_a_la_interfaz(self):
+        sustos = []
+
+        class Interfaz:
+            def al_susto(self, intensidad):
+                sustos.append(intensidad)
+
+        motor = self.crear_motor(iniciar=False)
+        motor.ui = Interfaz()
+        motor.registrar_susto(20)
+        self.assertEqual(sustos, [20])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+
+class PruebaColaEntrada(unittest.TestCase):
+    def setUp(self):
+        self.cola = main.ColaEntrada(ritmo=5, ritmo_corriendo=10, reloj=lambda: 0.0)
+
+    def test_autorrepeticion_agrupada_y_ritmo(self):
+        # Un segundo con la tecla pulsada: autorrepetición a 30 Hz, fotogramas cada 1/60 s
+        movimientos = 0
+        for fotograma in range(60):
+            ahora = fotograma / 60
+            if fotograma % 2 == 0:
+                self.cola.pulsar("mover", "norte", ahora)
+            movimientos += len(self.cola.listas(ahora))
+        self.assertEqual(movimientos, 5)
+        self.assertLessEqual(self.cola.pendientes(), 1)
+        self.assertGreater(self.cola.agrupadas, 20)
+
+    def test_correr_acelera(self):
+        self.cola.corriendo = True
+        self.cola.pulsar("mover", "sur", 0.0)
+        self.assertEqual(len(self.cola.listas(0.0)), 1)
+        self.cola.pulsar("mover", "sur", 0.05)
+        self.assertAlmostEqual(self.cola.espera(0.05), 0.05)
+        self.assertEqual(self.cola.listas(0.1), [("mover", "sur", 0.05)])
+
+    def test_orden_y_limite(self):
+        self.cola.pulsar("mover", "norte", 0.0)
+        self.cola.pulsar("mover", "este", 0.01)
+        self.cola.pulsar("inventario", None, 0.02)
+        self.assertEqual([a[1] for a in self.cola.listas(0.03)], ["norte"])
+        # El inventario espera a que salga el movimiento pulsado antes
+        self.assertAlmostEqual(self.cola.espera(0.03), 0.2)
+        self.assertEqual(self.cola.listas(0.2), [])
+        self.assertEqual([a[0] for a in self.cola.listas(0.24)], ["mover", "inventario"])
+        self.assertIsNone(self.cola.espera(0.24))
+
+        for i in range(main.LIMITE_COLA_ENTRADA + 4):
+            self.cola.pulsar("mover", "norte" if i % 2 else "sur", 1.0)
+        self.assertEqual(self.cola.pendientes(), main.LIMITE_COLA_ENTRADA)
+
+
+if __name__ == "__main__":
+    unittest.main()
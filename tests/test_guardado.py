@@ -0,0 +1,39 @@
+import json
+import unittest
+
+from base import RECORRIDO_PRUEBA, PruebaEnDirectorioTemporal, main
+
+
+class PruebaGuardado(PruebaEnDirectorioTemporal):
+    def test_partida_no_comparte_datos_con_el_registro(self):
+        motor = self.crear_motor(5)
+        motor.modo_oscuridad = False
+        motor.mover_jugador("oeste")
+        motor.recoger_item("linterna")
+        self.assertTrue(motor.guardar_partida(1))
+        registro = motor.gestor_guardado.partidas_guardadas[0]
+        guardado = json.dumps(registro, sort_keys=True)
+
+        # Jugar después de guardar no cambia el registro guardado
+        motor.usar_item("linterna")
+        motor.jugador.inventario[0].propiedades["marca"] = True
+        for direccion in ("este",) + RECORRIDO_PRUEBA:
+            motor.mover_jugador(direccion)
+        motor.simular(20)
+        self.assertEqual(json.dumps(registro, sort_keys=True), guardado)
+
+        # Ni jugar después de cargarlo
+        self.assertTrue(motor.cargar_partida(1))
+        motor.modo_oscuridad = False
+        motor.usar_item("linterna")
+        motor.jugador.inventario[0].propiedades["marca"] = True
+        motor.habitaciones["recibidor"].conexiones["sur"] = "jardin"
+        for direccion in ("este",) + RECORRIDO_PRUEBA:
+            motor.mover_jugador(direccion)
+        motor.simular(20)
+        self.assertEqual(json.dumps(registro, sort_keys=True), guardado)
+        self.assertEqual(json.dumps(main.GestorGuardado().partidas_guardadas[0], sort_keys=True), guardado)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+
+def escribir_ppm(ruta, color):
+    with open(ruta, 'wb') as f:
+        f.write(b"P6 2 2 255\n" + bytes(color) * 4)
+
+
+class PruebaCacheImagenes(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        for i, nombre in enumerate(("recibidor", "pasillo", "cocina", "sotano", "linterna")):
+            escribir_ppm(os.path.join(self.directorio.name, f"{nombre}.ppm"), (i, i, i))
+        with open(os.path.join(self.directorio.name, "rota.png"), 'wb') as f:
+            f.write(b"no es un png")
+        # Sin Tk en las pruebas: la "imagen" son los datos decodificados
+        self.cache = main.CacheImagenes(self.directorio.name, capacidad=3, crear=self.crear)
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    @staticmethod
+    def crear(datos):
+        if not datos.startswith(b"P6"):
+            raise ValueError("formato desconocido")
+        return datos
+
+    def esperar(self):
+        limite = time.monotonic() + 5
+        while self.cache.pendientes() and time.monotonic() < limite:
+            self.cache.procesar_listas()
+            time.sleep(0.001)
+        self.assertEqual(self.cache.pendientes(), 0)
+
+    def test_pedir_precargar_y_expulsar(self):
+        cargadas = []
+        ruta = self.cache.ruta("recibidor")
+        self.assertIsNone(self.cache.obtener(ruta, cargadas.append))
+        self.cache.precargar([self.cache.ruta(nombre) for nombre in ("pasillo", "cocina", "inexistente")])
+        self.esperar()
+        self.assertEqual(len(cargadas), 1)
+        self.assertTrue(cargadas[0].startswith(b"P6 2 2"))
+
+        # Las vecinas precargadas ya no esperan a decodificarse
+        self.assertIsNotNone(self.cache.obtener(self.cache.ruta("pasillo")))
+        self.assertIsNotNone(self.cache.obtener(ruta))
+        self.assertEqual((self.cache.aciertos, self.cache.fallos), (2, 1))
+
+        # Con capacidad 3, la menos usada (cocina) sale al entrar el sótano
+        self.cache.obtener(self.cache.ruta("sotano"))
+        self.esperar()
+        self.assertIsNone(self.cache.obtener(self.cache.ruta("cocina")))
+        self.assertIsNotNone(self.cache.obtener(self.cache.ruta("sotano")))
+        self.esperar()
+        estadisticas = self.cache.estadisticas()
+        self.assertEqual(estadisticas["en_cache"], 3)
+        self.assertEqual(estadisticas["decodificacion"]["total"], 5)
+
+    def test_imagen_no_valida(self):
+        cargadas = []
+        ruta = self.cache.ruta("rota")
+        self.cache.obtener(ruta, cargadas.append)
+        self.esperar()
+        self.assertEqual(cargadas, [None])
+        # No se vuelve a intentar en cada visita
+        self.cache.obtener(ruta)
+        self.assertEqual(self.cache.pendientes(), 0)
+
+    def test_ruta_por_imagen_o_id(self):
+        self.assertEqual(self.cache.ruta("imagenes/cocina.png"), os.path.join(self.directorio.name, "cocina.ppm"))
+        self.assertIsNone(self.cache.ruta(None))
+        self.assertIsNone(main.CacheImagenes(os.path.join(self.directorio.name, "no_existe")).ruta("cocina"))
+
+
+if __name__ == "__main__":
+    unittest.main()
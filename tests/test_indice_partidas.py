@@ -0,0 +1,67 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+DIFICULTADES = list(main.MODIFICADOR_SUSTOS)
+
+
+def crear_partidas(cantidad):
+    return [{
+        "slot": slot,
+        "nombre": f"Autoguardado {slot}",
+        "fecha": f"{slot % 28 + 1:02d}/01/2026 10:00:00",
+        "timestamp": 1000.0 + slot,
+        "tiempo_jugado": (slot * 37) % 500,
+        "dificultad": DIFICULTADES[slot % len(DIFICULTADES)],
+        "jugador": {
+            "ubicacion_actual": "cocina",
+            "vida": 90,
+            "inventario": [{"id": "llave", "nombre": "Llave oxidada"}]
+        },
+        "habitaciones": {"cocina": {"nombre": "Cocina"}}
+    } for slot in range(cantidad)]
+
+
+class PruebaIndicePartidas(unittest.TestCase):
+    def setUp(self):
+        self.partidas = crear_partidas(5000)
+        self.indice = main.IndicePartidas(self.partidas)
+
+    def test_orden(self):
+        self.assertEqual([c.slot for c in self.indice.filas(0, 3)], [4999, 4998, 4997])
+        self.indice.ordenar("tiempo", descendente=False)
+        tiempos = [c.tiempo_jugado for c in self.indice.filas(0, len(self.indice))]
+        self.assertEqual(tiempos, sorted(tiempos))
+        self.indice.ordenar("dificultad")
+        self.assertEqual(self.indice.fila(0).dificultad, DIFICULTADES[-1])
+        self.assertEqual(self.indice.fila(len(self.indice) - 1).dificultad, DIFICULTADES[0])
+
+    def test_busqueda_incremental(self):
+        self.indice.buscar("autoguardado 12")
+        self.assertEqual(len(self.indice), 111)  # 12, 120-129 y 1200-1299
+        self.indice.buscar("Autoguardado 123")
+        self.assertEqual(sorted(c.slot for c in self.indice.filas(0, 20)), [123] + list(range(1230, 1240)))
+        # El orden cambia sin perder la búsqueda y volver atrás recupera los resultados
+        self.indice.ordenar("fecha", descendente=False)
+        self.assertEqual(self.indice.fila(0).slot, 123)
+        self.assertEqual(self.indice.posicion(1239), 10)
+        self.indice.buscar("")
+        self.assertEqual(len(self.indice), len(self.partidas))
+        self.assertIsNone(main.IndicePartidas([]).posicion(1))
+
+    def test_vista_previa_perezosa(self):
+        cabecera = self.indice.fila(0)
+        previa = self.indice.vista_previa(cabecera)
+        self.assertEqual(previa, {"habitacion": "Cocina", "vida": 90, "cordura": 100, "objetos": ["Llave oxidada"]})
+        self.assertIs(self.indice.vista_previa(cabecera), previa)
+        for posicion in range(main.CAPACIDAD_VISTAS_PREVIAS + 10):
+            self.indice.vista_previa(self.indice.fila(posicion))
+        self.assertEqual(len(self.indice._previas), main.CAPACIDAD_VISTAS_PREVIAS)
+
+
+if __name__ == "__main__":
+    unittest.main()
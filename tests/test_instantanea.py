@@ -0,0 +1,40 @@
+import random
+import unittest
+
+from base import RECORRIDO_PRUEBA, PruebaEnDirectorioTemporal, main
+
+
+class PruebaInstantanea(PruebaEnDirectorioTemporal):
+    def estado(self, motor):
+        jugador = motor.jugador
+        return (motor.tick, jugador.vida, jugador.cordura, jugador.sustos_recibidos,
+                list(jugador.historia_visitada), list(motor.historia))
+    
+    def test_restaurar_repite_la_misma_partida(self):
+        motor = self.crear_motor(7, RECORRIDO_PRUEBA)
+        instantanea = motor.instantanea()
+        motor.simular(600)
+        esperado = self.estado(motor)
+        for _ in range(3):
+            motor.restaurar(instantanea)
+            motor.simular(600)
+            self.assertEqual(self.estado(motor), esperado)
+    
+    def test_restaurar_no_afecta_a_otras_partidas(self):
+        testigo = self.crear_motor(3, RECORRIDO_PRUEBA)
+        testigo.simular(600)
+        
+        otra = self.crear_motor(3, RECORRIDO_PRUEBA)
+        vecina = self.crear_motor(11, RECORRIDO_PRUEBA)
+        instantanea = vecina.instantanea()
+        estado_global = random.getstate()
+        for _ in range(10):
+            otra.simular(60)
+            vecina.simular(60)
+            vecina.restaurar(instantanea)
+        self.assertEqual(self.estado(otra), self.estado(testigo))
+        self.assertEqual(random.getstate(), estado_global)
+
+
+if __name__ == "__main__":
+    unittest.main()
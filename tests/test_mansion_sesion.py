@@ -0,0 +1,40 @@
+import unittest
+
+from base import PruebaEnDirectorioTemporal, main
+
+
+class PruebaMansionSesion(PruebaEnDirectorioTemporal):
+    def test_sesiones_aisladas_y_plantilla_intacta(self):
+        primera = self.crear_motor(5)
+        segunda = self.crear_motor(6)
+        plantilla = primera.habitaciones.plantilla
+        self.assertIs(plantilla, segunda.habitaciones.plantilla)
+        datos_plantilla = {hab_id: habitacion.to_dict() for hab_id, habitacion in plantilla.items()}
+
+        # Leer no copia nada: la partida sigue usando las listas de la plantilla
+        primera.modo_oscuridad = False
+        primera.mover_jugador("oeste")
+        primera.examinar()
+        sala = primera.habitaciones["sala_estar"]
+        self.assertIs(sala.items, plantilla["sala_estar"].items)
+        self.assertNotIn("eventos", vars(sala))
+
+        # Recoger y gastar la linterna, dejar otro objeto y disparar un evento
+        self.assertTrue(primera.recoger_item("linterna"))
+        primera.usar_item("linterna")
+        primera.simular(30)
+        sala.agregar_item(main.Item("reloj", "Reloj", "", "coleccionable"))
+        comedor = primera.habitaciones["comedor"]
+        comedor.activar_evento(comedor.eventos[0], primera)
+        self.assertEqual([item.id for item in sala.items], ["reloj"])
+        self.assertTrue(comedor.eventos[0].activado)
+
+        # La otra partida no ve ninguno de esos cambios
+        self.assertEqual([item.id for item in segunda.habitaciones["sala_estar"].items], ["linterna"])
+        self.assertFalse(segunda.habitaciones["comedor"].eventos[0].activado)
+        self.assertEqual({hab_id: habitacion.to_dict() for hab_id, habitacion in plantilla.items()},
+                         datos_plantilla)
+
+
+if __name__ == "__main__":
+    unittest.main()
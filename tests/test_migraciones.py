@@ -0,0 +1,85 @@
+import json
+import os
+import unittest
+
+from base import PruebaEnDirectorioTemporal, main
+
+import migrar_guardados
+
+
+def partida_antigua(slot):
+    """Partida tal como la guardaba la versión 1.0.0 (lista completa de visitas, linterna sin efecto)"""
+    return {
+        "slot": slot,
+        "nombre": f"Partida {slot}",
+        "jugador": {
+            "vida": 80,
+            "ubicacion_actual": "pasillo",
+            "linterna_activa": True,
+            "bateria_linterna": 30,
+            "historia_visitada": ["recibidor", "pasillo", "recibidor", "pasillo"]
+        },
+        "habitaciones": {},
+        "tiempo_jugado": 120,
+        "version": "1.0.0"
+    }
+
+
+class PruebaMigraciones(PruebaEnDirectorioTemporal):
+    def test_cargar_guardado_antiguo(self):
+        with open(main.GUARDADO_ARCHIVO, 'w', encoding='utf-8') as f:
+            json.dump([partida_antigua(1)], f)
+        motor = main.MotorJuego(main.Configuracion())
+        self.assertEqual(motor.gestor_guardado.partidas_guardadas[0]["version"], main.VERSION_JUEGO)
+        self.assertTrue(motor.cargar_partida(1))
+        motor.timer_actualizacion.cancel()
+        self.assertTrue(motor.jugador.linterna_activa)
+        self.assertEqual(motor.jugador.bateria_linterna, 30)
+        self.assertEqual(motor.jugador.recorrido.visitas_de("pasillo"), 2)
+        self.assertEqual(motor.jugador.recorrido.retrocesos, 2)
+
+        # Al guardar, el archivo lleva la versión en la cabecera
+        motor.guardar_partida(2)
+        self.assertEqual(migrar_guardados.version_cabecera(main.GUARDADO_ARCHIVO), main.VERSION_JUEGO)
+        self.assertEqual(len(main.GestorGuardado().partidas_guardadas), 2)
+
+    def test_version_desconocida(self):
+        partida = main.migrar_partida({"slot": 1, "version": "9.0.0", "jugador": {}})
+        self.assertEqual(partida, {"slot": 1, "version": "9.0.0", "jugador": {}})
+
+    def test_migracion_en_bloque(self):
+        os.makedirs("jugadores/b")
+        rutas = []
+        for i in range(6):
+            ruta = os.path.join("jugadores" if i % 2 else "jugadores/b", f"mansion_guardado_{i}.json")
+            if i < 4:
+                with open(ruta, 'w', encoding='utf-8') as f:
+                    json.dump([partida_antigua(1), partida_antigua(2)], f)
+            else:
+                main.escribir_guardado(ruta, [])
+            rutas.append(ruta)
+        with open("jugadores/mansion_guardado_roto.json", 'w', encoding='utf-8') as f:
+            f.write("[{")
+        al_dia = os.stat(rutas[4]).st_mtime_ns
+
+        self.assertEqual(migrar_guardados.main_migrar(["jugadores", "--comprobar"]), 1)
+        self.assertEqual(migrar_guardados.version_cabecera(rutas[0]), main.VERSION_GUARDADO_INICIAL)
+
+        resultados = migrar_guardados.migrar_archivos(migrar_guardados.buscar_guardados(["jugadores"]), procesos=2)
+        estados = {os.path.basename(ruta): (estado, migradas) for ruta, estado, migradas, _ in resultados}
+        self.assertEqual(estados["mansion_guardado_0.json"], ("migrado", 2))
+        self.assertEqual(estados["mansion_guardado_4.json"], ("al_dia", 0))
+        self.assertEqual(estados["mansion_guardado_roto.json"][0], "error")
+        self.assertEqual(os.stat(rutas[4]).st_mtime_ns, al_dia)
+
+        with open(rutas[1], 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        self.assertEqual(datos["version"], main.VERSION_JUEGO)
+        self.assertNotIn("historia_visitada", datos["partidas"][0]["jugador"])
+        os.remove("jugadores/mansion_guardado_roto.json")
+        self.assertEqual(migrar_guardados.main_migrar(["jugadores", "--procesos", "1"]), 0)
+        self.assertFalse([r for r in os.listdir("jugadores") if r.endswith(".tmp")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modelo_sustos
+
+
+@unittest.skipIf(modelo_sustos.np is None, "NumPy no está instalado")
+class PruebaModeloSustos(unittest.TestCase):
+    def test_concuerda_con_el_motor(self):
+        for dificultad in ("Fácil", "Pesadilla"):
+            with self.subTest(dificultad=dificultad):
+                resultado = modelo_sustos.comparar(300, 20000, 5400, 10, dificultad, semilla=1)
+                self.assertTrue(resultado["concuerda"], resultado)
+    
+    def test_curva_supervivencia(self):
+        instantes, curva = modelo_sustos.curva_supervivencia([-1, 10, 30, -1], 40, paso=20)
+        self.assertEqual(instantes, [0, 20, 40])
+        self.assertEqual(list(curva), [1.0, 0.75, 0.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import math
+import os
+import threading
+import unittest
+import wave
+from array import array
+
+from base import PruebaEnDirectorioTemporal, main
+
+
+def escribir_wav(ruta, segundos, canales, frecuencia_tono):
+    frames = int(segundos * main.FRECUENCIA_MUSICA)
+    muestras = array('h')
+    for i in range(frames):
+        valor = int(8000 * math.sin(2 * math.pi * frecuencia_tono * i / main.FRECUENCIA_MUSICA))
+        muestras.extend([valor] * canales)
+    with wave.open(ruta, 'wb') as archivo:
+        archivo.setnchannels(canales)
+        archivo.setsampwidth(2)
+        archivo.setframerate(main.FRECUENCIA_MUSICA)
+        archivo.writeframes(muestras.tobytes())
+    return muestras.tobytes()
+
+
+class PruebaMusica(PruebaEnDirectorioTemporal):
+    def setUp(self):
+        super().setUp()
+        os.mkdir("musica")
+        self.ambiente = escribir_wav("musica/ambiente_mansion.wav", 1.5, 2, 220)
+        escribir_wav("musica/victoria.wav", 0.5, 1, 440)
+        self.configuracion = main.Configuracion()
+        self.configuracion.volumen_musica = 100
+
+    def generar_segundos(self, reproductor, segundos):
+        bloques = math.ceil(segundos * main.FRECUENCIA_MUSICA / main.FRAMES_BLOQUE_MUSICA)
+        datos = bytearray()
+        for _ in range(bloques):
+            # Sin hilo de salida se espera a que el decodificador tenga el bloque listo
+            while reproductor.pista and reproductor.pista.buffer.disponibles() < main.FRAMES_BLOQUE_MUSICA * 4 \
+                    and not reproductor.pista.agotada:
+                threading.Event().wait(0.001)
+            datos += reproductor.generar()
+        return bytes(datos)
+
+    def test_buffer_circular_conserva_los_datos(self):
+        buffer = main.BufferCircular(1000)
+        datos = bytes(range(256)) * 200
+        escritor = threading.Thread(target=buffer.escribir, args=(datos,))
+        escritor.start()
+        leidos = bytearray()
+        while len(leidos) < len(datos):
+            leidos += buffer.leer(300)
+        escritor.join()
+        self.assertEqual(bytes(leidos), datos)
+
+    def test_bucle_y_fundido_cruzado(self):
+        reproductor = main.ReproductorMusica(None, self.configuracion, fundido=0.1)
+        reproductor.reproducir("ambiente_mansion")
+        audio = self.generar_segundos(reproductor, 4)
+        # Pasado el fundido de entrada suena la pista tal cual y vuelve a empezar al acabar
+        inicio_bucle = len(self.ambiente)
+        self.assertEqual(audio[inicio_bucle:inicio_bucle + 40000], self.ambiente[:40000])
+        self.assertEqual(audio[20000:60000], self.ambiente[20000:60000])
+        self.assertEqual(reproductor.pista.buffer.capacidad, main.CAPACIDAD_BUFFER_MUSICA)
+
+        salida = main.SalidaArchivo("grabacion.wav")
+        reproductor.reproducir("victoria", bucle=False)
+        while reproductor.sonando():
+            salida.escribir(self.generar_segundos(reproductor, 0.1))
+        salida.cerrar()
+        with wave.open("grabacion.wav", 'rb') as archivo:
+            self.assertEqual(archivo.getnchannels(), 2)
+            self.assertGreaterEqual(archivo.getnframes(), main.FRECUENCIA_MUSICA // 2)
+        self.assertEqual(reproductor.subejecuciones, 0)
+
+    def test_sistema_sonido_con_salida_nula(self):
+        sonido = main.SistemaSonido(self.configuracion)
+        salida = main.SalidaNula(tiempo_real=False)
+        sonido.activar_musica(salida)
+        sonido.reproducir_musica("victoria")
+        sonido.reproductor._hilo.join(timeout=10)
+        self.assertFalse(sonido.reproductor.sonando())
+        self.assertGreaterEqual(salida.frames, main.FRECUENCIA_MUSICA // 2)
+        sonido.reproducir_musica("inexistente")  # Sin archivo no suena nada ni falla
+        sonido.detener_todos_sonidos()
+        sonido.reproductor.cerrar()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import math
+import random
+import unittest
+
+from base import PruebaEnDirectorioTemporal, main
+
+
+class PruebaEsperaGeometrica(unittest.TestCase):
+    def test_media_es_inversa_de_la_probabilidad(self):
+        rng = random.Random(2024)
+        muestras_por_caso = 20000
+        for probabilidad in (0.02, 0.1, 0.5, 0.9):
+            with self.subTest(probabilidad=probabilidad):
+                esperas = [main.muestrear_espera_geometrica(probabilidad, rng) for _ in range(muestras_por_caso)]
+                self.assertGreaterEqual(min(esperas), 1)
+                media = sum(esperas) / muestras_por_caso
+                # Margen de 4 errores típicos: varianza de la geométrica (1 - p) / p²
+                error_tipico = math.sqrt((1 - probabilidad) / probabilidad ** 2 / muestras_por_caso)
+                self.assertAlmostEqual(media, 1 / probabilidad, delta=4 * error_tipico)
+                # Acertar en el primer tick debe ocurrir con probabilidad p
+                self.assertAlmostEqual(esperas.count(1) / muestras_por_caso, probabilidad, delta=0.02)
+
+    def test_casos_extremos(self):
+        rng = random.Random(1)
+        self.assertEqual(main.muestrear_espera_geometrica(1, rng), 1)
+        self.assertEqual(main.muestrear_espera_geometrica(1.5, rng), 1)
+        self.assertIsNone(main.muestrear_espera_geometrica(0, rng))
+
+
+class PruebaReplanificacion(PruebaEnDirectorioTemporal):
+    def setUp(self):
+        super().setUp()
+        self.motor = self.crear_motor(5)
+        self.replanificaciones = []
+        replanificar = self.motor._replanificar
+
+        def contar():
+            self.replanificaciones.append(self.motor.tick)
+            replanificar()
+        self.motor._replanificar = contar
+
+    def avanzar(self, ticks):
+        for _ in range(ticks):
+            self.motor._paso_simulado()
+
+    def test_tick_sin_cambios_no_replanifica(self):
+        self.avanzar(50)
+        self.assertEqual(self.replanificaciones, [0])
+
+        # Solo vuelve a muestrear al cambiar la cordura, la dificultad o la habitación
+        self.motor.jugador.cordura -= 10
+        self.avanzar(20)
+        self.assertEqual(len(self.replanificaciones), 2)
+        self.motor.configuracion.dificultad = "Difícil"
+        self.avanzar(20)
+        self.assertEqual(len(self.replanificaciones), 3)
+        self.motor.modo_oscuridad = False
+        self.motor.mover_jugador("oeste")
+        self.avanzar(20)
+        self.assertEqual(len(self.replanificaciones), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import puntuaciones_lote
+
+
+def resultado_aleatorio(rng):
+    return {
+        "nombre": f"j{rng.randrange(1000)}",
+        "puntos": rng.randrange(3000),
+        "tiempo": rng.uniform(0, 5000),
+        "items_encontrados": rng.randrange(15),
+        "nivel_completado": rng.random() < 0.5,
+        "dificultad": rng.choice(list(main.PESOS_PUNTUACION["dificultad"])),
+        "vida": rng.randrange(101),
+        "cordura": rng.randrange(101),
+        "secretos_descubiertos": rng.randrange(6),
+        "sustos_recibidos": rng.randrange(80)
+    }
+
+
+@unittest.skipIf(puntuaciones_lote.np is None, "NumPy no está instalado")
+class PruebaPuntuacionesLote(unittest.TestCase):
+    def test_igual_que_el_calculo_escalar(self):
+        rng = random.Random(3)
+        resultados = [resultado_aleatorio(rng) for _ in range(5000)]
+        columnas = puntuaciones_lote.a_columnas(resultados)
+        for cambios in ({}, {"susto": 40, "vida": 2.5, "dificultad": {"Pesadilla": 2.0}}):
+            with self.subTest(cambios=cambios):
+                pesos = puntuaciones_lote.combinar_pesos(cambios)
+                nuevos = puntuaciones_lote.recalcular(columnas, pesos)
+                esperados = [main.calcular_puntuacion(r["nivel_completado"], r["tiempo"], r["vida"], r["cordura"],
+                                                      r["items_encontrados"], r["secretos_descubiertos"],
+                                                      r["sustos_recibidos"], r["dificultad"], pesos)
+                             for r in resultados]
+                self.assertEqual(nuevos.tolist(), esperados)
+    
+    def test_resultados_sin_detalles_y_diferencias(self):
+        resultados = [
+            {"nombre": "antiguo", "puntos": 900, "tiempo": 100, "items_encontrados": 1,
+             "nivel_completado": False, "dificultad": "Normal"},
+            dict(resultado_aleatorio(random.Random(1)), nombre="nuevo", puntos=100, dificultad="Normal",
+                 sustos_recibidos=0, nivel_completado=True)
+        ]
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "resultados.jsonl")
+            with open(ruta, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(r) + "\n" for r in resultados)
+            columnas = puntuaciones_lote.a_columnas(puntuaciones_lote.leer_resultados([ruta]))
+        
+        nuevos = puntuaciones_lote.recalcular(columnas, puntuaciones_lote.combinar_pesos({"base_victoria": 5000}))
+        self.assertEqual(nuevos[0], 900)  # Sin detalles: conserva la puntuación
+        antes = puntuaciones_lote.clasificaciones(columnas, columnas["puntos"], top=1)
+        despues = puntuaciones_lote.clasificaciones(columnas, nuevos, top=1)
+        cambios = puntuaciones_lote.diferencias(antes, despues)["Normal"]
+        self.assertEqual(cambios["movimientos"], [(1, None, 1)])
+        self.assertEqual(cambios["salen"], [(0, 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import json
+import os
+import time
+import unittest
+
+from base import PruebaEnDirectorioTemporal, main
+
+
+class PruebaRecargaContenido(PruebaEnDirectorioTemporal):
+    def setUp(self):
+        super().setUp()
+        # La recarga cambia la plantilla compartida del proceso
+        self.addCleanup(setattr, main.GeneradorMapa, "_plantilla", main.GeneradorMapa._plantilla)
+
+        main.VigilanteContenido.exportar(main.GeneradorMapa().generar_mansion())
+        self.vigilante = main.VigilanteContenido()
+        self.assertEqual(len(self.vigilante.recompilar()[0]), 17)
+        self.motor = self.crear_motor(5)
+        self.motor.modo_oscuridad = False
+        self.motor.mover_jugador("oeste")
+        self.assertTrue(self.motor.recoger_item("linterna"))
+        comedor = self.motor.habitaciones["comedor"]
+        comedor.activar_evento(comedor.eventos[0], self.motor)
+
+    def editar(self, hab_id, cambio):
+        ruta = os.path.join(main.CONTENIDO_DIRECTORIO, f"{hab_id}.json")
+        with open(ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        cambio(datos)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(datos, f)
+        # La fecha de modificación puede no cambiar entre dos escrituras seguidas
+        estado = os.stat(ruta)
+        os.utime(ruta, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000))
+
+    def recargar(self):
+        inicio = time.perf_counter()
+        nuevas, eliminadas = self.vigilante.recompilar()
+        recargadas = self.motor.recargar_habitaciones(nuevas, eliminadas)
+        return recargadas, eliminadas, (time.perf_counter() - inicio) * 1000
+
+    def test_recarga_conserva_la_partida(self):
+        def ampliar_sala(datos):
+            datos["descripcion"] = "Una sala recién redecorada."
+            reloj = main.Item("reloj", "Reloj de bolsillo", "Parado a medianoche.", "coleccionable")
+            datos["items"].append(reloj.to_dict())
+        self.editar("sala_estar", ampliar_sala)
+        self.editar("comedor", lambda datos: datos["eventos"][0].update(probabilidad=10))
+
+        recargadas, _, duracion = self.recargar()
+        self.assertEqual(sorted(recargadas), ["comedor", "sala_estar"])
+        self.assertLess(duracion, 50)
+        sala = self.motor.obtener_habitacion_actual()
+        self.assertEqual(self.motor.jugador.ubicacion_actual, "sala_estar")
+        self.assertEqual(sala.descripcion, "Una sala recién redecorada.")
+        self.assertTrue(sala.visitada)
+        # La linterna ya recogida no vuelve a la sala; el objeto nuevo sí aparece
+        self.assertEqual([item.id for item in sala.items], ["reloj"])
+        self.assertTrue(self.motor.jugador.tiene_item("linterna"))
+        comedor = self.motor.habitaciones["comedor"]
+        self.assertEqual(comedor.eventos[0].probabilidad, 10)
+        self.assertTrue(comedor.eventos[0].activado)
+        # Las partidas nuevas ya usan el contenido recargado
+        self.assertEqual(main.GeneradorMapa().nueva_mansion()["sala_estar"].descripcion, "Una sala recién redecorada.")
+
+        # Una partida cargada de archivo (habitaciones independientes) también se rebasa
+        self.motor.habitaciones = {hab_id: main.Habitacion.from_dict(habitacion.to_dict())
+                                   for hab_id, habitacion in self.motor.habitaciones.items()}
+        self.editar("sala_estar", lambda datos: datos.update(nombre="Salón"))
+        self.recargar()
+        sala = self.motor.obtener_habitacion_actual()
+        self.assertIs(type(sala), main.Habitacion)
+        self.assertEqual((sala.nombre, [item.id for item in sala.items]), ("Salón", ["reloj"]))
+
+    def test_sin_cambios_errores_y_eliminadas(self):
+        self.editar("cocina", lambda datos: None)
+        self.assertEqual(self.vigilante.recompilar(), ({}, []))
+
+        self.editar("cocina", lambda datos: datos["eventos"][0].update(condicion={"desconocida": 1}))
+        self.assertEqual(self.vigilante.recompilar(), ({}, []))
+        self.assertIn("desconocida", self.vigilante.errores[os.path.join(main.CONTENIDO_DIRECTORIO, "cocina.json")])
+        self.editar("cocina", lambda datos: datos["eventos"][0].update(condicion={"cordura_menor": 50}))
+        self.assertEqual(list(self.vigilante.recompilar()[0]), ["cocina"])
+        self.assertEqual(self.vigilante.errores, {})
+
+        os.remove(os.path.join(main.CONTENIDO_DIRECTORIO, "despensa.json"))
+        os.remove(os.path.join(main.CONTENIDO_DIRECTORIO, "sala_estar.json"))
+        recargadas, eliminadas, _ = self.recargar()
+        # La cocina pierde la salida a la despensa, así que también se recarga
+        self.assertEqual((recargadas, sorted(eliminadas)), (["cocina"], ["despensa", "sala_estar"]))
+        # La habitación donde está el jugador no se elimina
+        self.assertNotIn("despensa", self.motor.habitaciones)
+        self.assertIn("sala_estar", self.motor.habitaciones)
+        for habitaciones in (self.motor.habitaciones, main.GeneradorMapa().plantilla_mansion()):
+            self.assertEqual(dict(habitaciones["cocina"].conexiones), {"sur": "comedor"})
+        self.assertEqual(main.GeneradorMapa().nueva_mansion()["cocina"].nivel_peligro, 6)
+
+    def test_salida_a_habitacion_inexistente(self):
+        # Partida cargada de archivo (habitaciones independientes) a la que le falta una habitación
+        self.motor.habitaciones = {hab_id: main.Habitacion.from_dict(habitacion.to_dict())
+                                   for hab_id, habitacion in self.motor.habitaciones.items()}
+        del self.motor.habitaciones["recibidor"]
+        self.assertFalse(self.motor.mover_jugador("este"))
+        self.assertEqual(self.motor.mensaje_actual, "No puedes ir en esa dirección.")
+        self.assertEqual(self.motor.jugador.ubicacion_actual, "sala_estar")
+
+
+if __name__ == "__main__":
+    unittest.main()
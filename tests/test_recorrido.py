@@ -0,0 +1,48 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+
+class PruebaRecorrido(unittest.TestCase):
+    def test_contadores_y_retrocesos(self):
+        jugador = main.Jugador()
+        for instante, habitacion in enumerate(["recibidor", "pasillo", "recibidor", "pasillo", "cocina", "cocina"]):
+            jugador.mover_a(habitacion, float(instante))
+        recorrido = jugador.recorrido
+        self.assertEqual(recorrido.habitaciones_visitadas(), 3)
+        self.assertEqual(recorrido.visitas_de("pasillo"), 2)
+        self.assertEqual(recorrido.visitas_de("sotano"), 0)
+        self.assertEqual(recorrido.retrocesos, 2)
+        self.assertEqual(recorrido.ultimos(3), ["pasillo", "cocina", "cocina"])
+        codigo = recorrido.habitaciones.index("recibidor")
+        self.assertEqual((recorrido.primera[codigo], recorrido.ultima[codigo]), (0.0, 2.0))
+
+    def test_guardado_acotado(self):
+        jugador = main.Jugador()
+        for paso in range(20000):
+            jugador.mover_a("pasillo" if paso % 2 else "escaleras", float(paso))
+        datos = json.loads(json.dumps(jugador.to_dict()))
+        self.assertLess(len(json.dumps(datos)), 2000)
+
+        cargado = main.Jugador.from_dict(datos)
+        self.assertEqual(cargado.historia_visitada, jugador.historia_visitada)
+        self.assertEqual(len(cargado.historia_visitada), main.LIMITE_RECORRIDO)
+        self.assertEqual(cargado.recorrido.movimientos, 20000)
+        self.assertEqual(cargado.recorrido.visitas_de("pasillo"), 10000)
+        cargado.mover_a("escaleras", 1.0)
+        self.assertEqual(cargado.recorrido.retrocesos, jugador.recorrido.retrocesos + 1)
+
+    def test_guardados_antiguos(self):
+        partida = main.migrar_partida({"jugador": {"historia_visitada": ["recibidor", "pasillo", "recibidor"]}})
+        cargado = main.Jugador.from_dict(partida["jugador"])
+        self.assertEqual(cargado.historia_visitada, ["recibidor", "pasillo", "recibidor"])
+        self.assertEqual(cargado.recorrido.retrocesos, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+from base import PruebaEnDirectorioTemporal, main
+
+
+class PruebaReglas(PruebaEnDirectorioTemporal):
+    def setUp(self):
+        super().setUp()
+        self.motor = self.crear_motor(5)
+
+    def test_compilar_y_evaluar_condicion(self):
+        funcion, hechos = main.compilar_condicion(
+            {"en_habitacion": ["recibidor", "atico"], "tiene_item": "linterna", "cordura_menor": 50})
+        self.assertEqual(hechos, {"habitacion", "inventario", "cordura"})
+        jugador = self.motor.jugador
+        jugador.cordura = 30
+        self.assertFalse(funcion(self.motor))
+        jugador.agregar_item(main.Item("linterna", "Linterna", "", "util"))
+        self.assertTrue(funcion(self.motor))
+        jugador.cordura = 80
+        self.assertFalse(funcion(self.motor))
+
+        funcion, hechos = main.compilar_condicion({"alguno": [{"vida_menor": 10}, {"no": {"tiene_item": "llave"}}]})
+        self.assertEqual(hechos, {"vida", "inventario"})
+        self.assertTrue(funcion(self.motor))
+
+        for expresion in ({}, {"desconocida": 1}, "cordura_menor"):
+            with self.assertRaises(ValueError):
+                main.compilar_condicion(expresion)
+
+    def test_compilar_y_ejecutar_accion(self):
+        accion = main.compilar_accion([
+            {"mensaje": "Algo cae del techo."},
+            {"cordura": -200, "vida": -10},
+            {"dar_item": main.Item("llave", "Llave", "", "llave").to_dict()}
+        ])
+        vida = self.motor.jugador.vida
+        accion(self.motor)
+        self.assertEqual(self.motor.mensaje_actual, "Algo cae del techo.")
+        self.assertEqual(self.motor.jugador.cordura, 0)  # Se recorta al rango 0-100
+        self.assertEqual(self.motor.jugador.vida, vida - 10)
+        self.assertTrue(self.motor.jugador.tiene_item("llave"))
+        with self.assertRaises(ValueError):
+            main.compilar_accion([{"teletransporte": "atico"}])
+
+    def test_cache_no_reevalua_sin_cambios(self):
+        evento = main.Evento("susto", "Un susurro.", condicion={"cordura_menor": 50})
+        self.assertEqual(evento.hechos, ("cordura",))
+        evaluaciones = []
+        condicion = evento.condicion
+        evento.condicion = lambda motor: evaluaciones.append(motor.jugador.cordura) or condicion(motor)
+
+        self.motor.jugador.cordura = 80
+        self.assertFalse(evento.condicion_cumplida(self.motor))
+        # Cambios en hechos que la condición no usa no la vuelven a evaluar
+        self.motor.jugador.vida -= 5
+        self.motor.jugador.agregar_item(main.Item("vela", "Vela", "", "util"))
+        self.assertFalse(evento.condicion_cumplida(self.motor))
+        self.assertEqual(evaluaciones, [80])
+
+        self.motor.jugador.cordura = 40
+        self.assertTrue(evento.condicion_cumplida(self.motor))
+        self.assertTrue(evento.condicion_cumplida(self.motor))
+        self.assertEqual(evaluaciones, [80, 40])
+
+    def test_guardar_y_cargar_conserva_reglas_y_activado(self):
+        condicion = {"tiene_item": "linterna"}
+        accion = [{"mensaje": "La luz revela un símbolo."}, {"cordura": -5}]
+        recibidor = self.motor.habitaciones["recibidor"]
+        recibidor.agregar_evento(main.Evento("descubrimiento", "Un símbolo en la pared.", condicion, accion))
+        recibidor.eventos[-1].activado = True
+        self.assertTrue(self.motor.guardar_partida(1))
+
+        otro = self.crear_motor(9)
+        self.assertTrue(otro.cargar_partida(1))
+        evento = otro.habitaciones["recibidor"].eventos[-1]
+        self.assertTrue(evento.activado)
+        self.assertEqual((evento.regla_condicion, evento.regla_accion), (condicion, accion))
+        self.assertEqual(evento.hechos, ("inventario",))
+        self.assertTrue(evento.serializable)
+        # Los eventos que no se dispararon se cargan sin activar
+        activados = {hab_id: [e.activado for e in habitacion.eventos]
+                     for hab_id, habitacion in otro.habitaciones.items() if hab_id != "recibidor"}
+        self.assertFalse(any(any(estado) for estado in activados.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
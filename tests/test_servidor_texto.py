@@ -0,0 +1,55 @@
+import asyncio
+import unittest
+
+from base import PruebaEnDirectorioTemporal, main
+
+import servidor_texto
+
+
+async def jugar_sesion(ordenes):
+    """Levanta un servidor, juega las órdenes como un cliente y devuelve cada respuesta"""
+    servidor_mansion = servidor_texto.ServidorMansion()
+    servidor = await servidor_mansion.iniciar("127.0.0.1", 0)
+    puerto = servidor.sockets[0].getsockname()[1]
+    lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+    try:
+        await lector.readuntil(servidor_texto.PROMPT)
+        escritor.write(b"bot\n")
+        await lector.readuntil(servidor_texto.PROMPT)
+        respuestas = []
+        for orden in ordenes:
+            escritor.write(orden.encode("utf-8") + b"\n")
+            respuestas.append((await lector.readuntil(servidor_texto.PROMPT)).decode("utf-8"))
+        escritor.write(b"salir\n")
+        await lector.read()
+    finally:
+        escritor.close()
+        await servidor_mansion.detener(servidor)
+    return respuestas
+
+
+class PruebaServidorTexto(PruebaEnDirectorioTemporal):
+    def test_prueba_carga(self):
+        clientes, ordenes_por_cliente = 5, 12
+        resultado = asyncio.run(servidor_texto.prueba_carga(clientes, ordenes_por_cliente))
+        self.assertEqual(resultado["clientes"], clientes)
+        self.assertEqual(resultado["ordenes"], clientes * ordenes_por_cliente)
+        self.assertGreater(resultado["ordenes_por_segundo"], 0)
+        self.assertLessEqual(resultado["p50_ms"], resultado["p99_ms"])
+        # Cota holgada: en local una orden tarda milisegundos
+        self.assertLess(resultado["p99_ms"], 2000)
+
+    def test_guardar_y_cargar(self):
+        respuestas = asyncio.run(jugar_sesion(["norte", "guardar 2", "sur", "cargar 2", "sur"]))
+        self.assertIn("Partida guardada.", respuestas[1])
+        self.assertIn("Partida cargada.", respuestas[3])
+        # El guardado llegó al archivo antes de cerrar el servidor
+        partidas = main.GestorGuardado().partidas_guardadas
+        self.assertEqual([partida["slot"] for partida in partidas], ["bot/2"])
+        self.assertEqual(partidas[0]["jugador"]["ubicacion_actual"], "pasillo_principal")
+        # Tras cargar se vuelve a estar en el pasillo: al sur queda el recibidor
+        self.assertIn("Recibidor", respuestas[4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import random
+import unittest
+
+from base import RECORRIDO_PRUEBA, PruebaEnDirectorioTemporal, main
+
+
+class PruebaSimulacion(PruebaEnDirectorioTemporal):
+    def jugar(self, semilla, avanzar):
+        random.seed(semilla)
+        motor = self.crear_motor(recorrido=RECORRIDO_PRUEBA)
+        avanzar(motor, 3600)
+        jugador = motor.jugador
+        return (motor.tick, jugador.vida, jugador.cordura, jugador.sustos_recibidos,
+                jugador.bateria_linterna, motor.juego_terminado, motor.historia)
+    
+    def test_simular_igual_que_tick_a_tick(self):
+        def tick_a_tick(motor, segundos):
+            for _ in range(segundos):
+                if motor.juego_terminado:
+                    break
+                motor._paso_simulado()
+        
+        for semilla in (1, 5, 42):
+            with self.subTest(semilla=semilla):
+                saltando = self.jugar(semilla, main.MotorJuego.simular)
+                self.assertEqual(saltando, self.jugar(semilla, tick_a_tick))
+
+
+if __name__ == "__main__":
+    unittest.main()
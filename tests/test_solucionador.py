@@ -0,0 +1,23 @@
+import unittest
+
+from base import PruebaEnDirectorioTemporal, main
+
+
+class PruebaSolucionador(PruebaEnDirectorioTemporal):
+    def test_mansion_predefinida(self):
+        solucionador = main.SolucionadorMansion(main.GeneradorMapa().generar_mansion())
+        acciones = solucionador.resolver()
+        self.assertIsNotNone(acciones)
+        self.assertTrue(solucionador.optima)
+        self.assertTrue(solucionador.validar(acciones))
+    
+    def test_mansion_procedural_grande(self):
+        habitaciones = main.GeneradorMapa().generar_mansion_procedural(10000, 7)
+        solucionador = main.SolucionadorMansion(habitaciones)
+        acciones = solucionador.resolver()
+        self.assertIsNotNone(acciones)
+        self.assertTrue(solucionador.validar(acciones))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import random
+import unittest
+
+from base import PruebaEnDirectorioTemporal, main
+
+import telemetria_agregada
+
+
+class PruebaTelemetria(PruebaEnDirectorioTemporal):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(main._detener_telemetria)
+
+    def jugar(self, semilla):
+        random.seed(semilla)
+        motor = self.crear_motor()
+        for direccion in ("norte", "norte", "arriba", "este", "oeste", "abajo", "sur"):
+            motor.simular(120)
+            motor.mover_jugador(direccion)
+        motor.simular(3600)
+        return motor
+
+    def test_eventos_rotados_y_agregados(self):
+        sin_telemetria = self.jugar(7)
+        main.configurar_telemetria(tamano_maximo=2000, copias=50)
+        motores = [self.jugar(semilla) for semilla in (7, 8, 9)]
+        main._detener_telemetria()
+
+        # La telemetría no consume números del generador del juego
+        self.assertEqual(motores[0].historia, sin_telemetria.historia)
+
+        rutas = telemetria_agregada.archivos_telemetria()
+        self.assertGreater(len(rutas), 1)
+        self.assertEqual(rutas[-1], main.TELEMETRIA_ARCHIVO)
+        eventos = list(telemetria_agregada.leer_eventos(rutas))
+        self.assertEqual([e["tipo"] for e in eventos if e["tipo"] == "inicio"], ["inicio"] * 3)
+        self.assertEqual(len({e["sesion"] for e in eventos}), 3)
+
+        agregado = telemetria_agregada.agregar(eventos)
+        sustos = sum(motor.jugador.sustos_recibidos for motor in motores)
+        self.assertEqual(sum(e["sustos"] for e in agregado["habitaciones"].values()), sustos)
+        self.assertEqual(sum(agregado["intensidades"].values()), sustos)
+        # Cada movimiento sale de una habitación tras 120 s de juego
+        salidas = agregado["habitaciones"]["recibidor"]
+        self.assertEqual(salidas["salidas"], 3)
+        self.assertAlmostEqual(salidas["permanencia"], 3 * 120.0)
+        self.assertTrue(telemetria_agregada.mapa_calor(agregado))
+        self.assertTrue(telemetria_agregada.tabla_sustos(agregado))
+
+    def test_lineas_danadas(self):
+        with open("telemetria.jsonl", "w", encoding="utf-8") as f:
+            f.write('{"tipo": "entrar_habitacion", "habitacion": "sotano"}\n{"tipo": "sus')
+        errores = {}
+        eventos = list(telemetria_agregada.leer_eventos(["telemetria.jsonl"], errores))
+        self.assertEqual(len(eventos), 1)
+        self.assertEqual(errores, {"lineas": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()